@@ -0,0 +1,123 @@
+import numpy as np
+from typing import Dict
+from config import BARS_PER_YEAR
+from engine import BacktestResult, TRADE_BUY
+
+
+def drawdown(equity: np.ndarray):
+    """
+    Largest peak-to-trough decline of an equity curve and its duration.
+
+    Returns:
+        tuple: (max drawdown in percent, longest time below a previous
+        peak in bars)
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) == 0:
+        return 0.0, 0
+    peaks = np.maximum.accumulate(equity)
+    depth = float(np.max((peaks - equity) / peaks)) * 100
+    # Bars since the last new high; the longest stretch is the drawdown duration
+    bars = np.arange(len(equity))
+    last_peak = np.maximum.accumulate(np.where(equity >= peaks, bars, 0))
+    return depth, int(np.max(bars - last_peak))
+
+
+def round_trips(result: BacktestResult) -> Dict[str, np.ndarray]:
+    """
+    Per-trade P&L from the columnar ledger.
+
+    Each exit row closes the BUY directly before it. A position still open
+    at the end is valued at the last price (as in final_balance), with
+    exit_bar set to the last bar and is_open True.
+    Zero-share BUY rows (price above the sized budget) are not trades.
+
+    Returns:
+        dict: entry_bar, exit_bar, shares, entry_price, exit_price, pnl,
+        return_pct (price change of the trade) and is_open arrays
+    """
+    trades = result.trades
+    buys = np.flatnonzero((trades["type"] == TRADE_BUY) & (trades["position"] > 0))
+    exits = buys + 1
+    is_open = exits >= result.num_trades
+    exits = np.minimum(exits, max(result.num_trades - 1, 0))
+    shares = trades["position"][buys]
+    entry_price = trades["price"][buys]
+
+    n_bars = len(result.equity) if result.equity is not None else 0
+    exit_price = np.where(is_open, 0.0, trades["price"][exits])
+    exit_bar = np.where(is_open, n_bars - 1, trades["bar"][exits])
+    if is_open.any():
+        # Cash after the entry plus the position at the last close gives final_balance
+        exit_price[is_open] = (result.final_balance - trades["balance"][buys[is_open]]) / shares[is_open]
+
+    pnl = shares * (exit_price - entry_price)
+    return {
+        "entry_bar": trades["bar"][buys],
+        "exit_bar": exit_bar,
+        "shares": shares,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "pnl": pnl,
+        "return_pct": (exit_price / entry_price - 1) * 100,
+        "is_open": is_open,
+    }
+
+
+def performance(result: BacktestResult, bars_per_year: int = BARS_PER_YEAR) -> Dict[str, float]:
+    """
+    Performance statistics from the per-bar equity curve and the ledger.
+
+    Returns are bar-to-bar changes of equity (cash plus the open position),
+    so open positions count; Sharpe and Sortino are annualized with
+    `bars_per_year` and use a zero risk-free rate. Exposure is the share
+    of bars with an open position, including the last bar for a position
+    still open; turnover is traded value (entries and executed exits, so
+    an open position is not counted as sold) divided by average equity.
+
+    Args:
+        result (BacktestResult): Engine output with an equity curve
+        bars_per_year (int): Bars per year used for annualization
+
+    Returns:
+        dict: total_return_pct, sharpe, sortino, max_drawdown_pct,
+        max_drawdown_bars, exposure_pct, turnover, num_trades, win_rate,
+        avg_trade_pct, best_trade_pct, worst_trade_pct, total_pnl and
+        profit_factor
+    """
+    equity = np.asarray(result.equity, dtype=np.float64)
+    n_bars = len(equity)
+    previous = np.concatenate(([result.initial_balance], equity[:-1]))
+    returns = equity / previous - 1
+
+    scale = np.sqrt(bars_per_year)
+    mean = returns.mean() if n_bars else 0.0
+    std = returns.std() if n_bars else 0.0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2)) if n_bars else 0.0  # Semi-deviation below zero
+    depth, duration = drawdown(equity)
+
+    trips = round_trips(result)
+    # An exit bar is not held, but an open position is held through the last bar
+    held_bars = int(np.sum(trips["exit_bar"] - trips["entry_bar"] + trips["is_open"]))
+    exit_price = np.where(trips["is_open"], 0.0, trips["exit_price"])
+    traded_value = float(np.sum(trips["shares"] * (trips["entry_price"] + exit_price)))
+    pnl = trips["pnl"]
+    gains, losses = pnl[pnl > 0].sum(), -pnl[pnl < 0].sum()
+    num_trades = len(pnl)
+
+    return {
+        "total_return_pct": (result.final_balance / result.initial_balance - 1) * 100,
+        "sharpe": float(mean / std * scale) if std > 0 else 0.0,
+        "sortino": float(mean / downside * scale) if downside > 0 else 0.0,
+        "max_drawdown_pct": depth,
+        "max_drawdown_bars": duration,
+        "exposure_pct": held_bars / n_bars * 100 if n_bars else 0.0,
+        "turnover": traded_value / float(equity.mean()) if n_bars else 0.0,
+        "num_trades": num_trades,
+        "win_rate": float(np.mean(pnl > 0) * 100) if num_trades else 0.0,
+        "avg_trade_pct": float(trips["return_pct"].mean()) if num_trades else 0.0,
+        "best_trade_pct": float(trips["return_pct"].max()) if num_trades else 0.0,
+        "worst_trade_pct": float(trips["return_pct"].min()) if num_trades else 0.0,
+        "total_pnl": float(pnl.sum()),
+        "profit_factor": float(gains / losses) if losses > 0 else float("inf") if gains > 0 else 0.0,
+    }
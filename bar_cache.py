@@ -0,0 +1,102 @@
+import os
+import re
+import pandas as pd
+from typing import Optional
+from config import CACHE_DIR
+
+_PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "days", "y": "days"}
+_PERIOD_DAYS = {"mo": 30, "y": 365}
+# A period may start on a weekend or holiday, so its first bar can come a few days later
+PERIOD_START_SLACK = pd.Timedelta(days=4)
+
+
+def cache_path(ticker: str, interval: str, cache_dir: Optional[str] = None) -> str:
+    """Return the cache file path for a ticker/interval pair."""
+    safe_ticker = re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+    return os.path.join(cache_dir or CACHE_DIR, f"{safe_ticker}_{interval}.pkl")
+
+
+def load_bars(ticker: str, interval: str, cache_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Load cached bars for a ticker/interval pair.
+
+    Returns:
+        Optional[pd.DataFrame]: Cached bars or None if nothing is cached
+    """
+    path = cache_path(ticker, interval, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception as e:
+        print(f"Error reading bar cache {path}: {str(e)}")
+        return None
+
+
+def save_bars(df: pd.DataFrame, ticker: str, interval: str, cache_dir: Optional[str] = None) -> None:
+    """Atomically write bars to the cache."""
+    path = cache_path(ticker, interval, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def merge_bars(cached: Optional[pd.DataFrame], new: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    Merge newly fetched bars into cached bars.
+
+    Bars with the same timestamp are taken from the new frame, since the
+    most recent bar may have been incomplete when it was cached.
+    """
+    if cached is None or cached.empty:
+        return new
+    if new is None or new.empty:
+        return cached
+    if not cached.columns.equals(new.columns):
+        # Column layout changed (e.g. yfinance upgrade); start over
+        return new
+    merged = pd.concat([cached, new])
+    merged = merged[~merged.index.duplicated(keep="last")]
+    return merged.sort_index()
+
+
+def period_to_timedelta(period: str) -> Optional[pd.Timedelta]:
+    """
+    Convert a yfinance period string ('60d', '1mo', '2y') to a Timedelta.
+
+    Returns:
+        Optional[pd.Timedelta]: None for open-ended periods such as 'max'
+    """
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        return None
+    count, unit = int(match.group(1)), match.group(2)
+    count *= _PERIOD_DAYS.get(unit, 1)
+    return pd.Timedelta(**{_PERIOD_UNITS[unit]: count})
+
+
+def covers_period(cached: Optional[pd.DataFrame], period: str) -> bool:
+    """
+    Check whether cached bars can be extended incrementally for `period`.
+
+    The cache must reach back to the start of the period (give or take
+    PERIOD_START_SLACK for market closures) and its last bar must lie
+    within the period; otherwise a full period download is needed.
+    """
+    if cached is None or cached.empty:
+        return False
+    delta = period_to_timedelta(period)
+    if delta is None:
+        return False
+    first, last = cached.index[0], cached.index[-1]
+    start = pd.Timestamp.now(tz=last.tz) - delta
+    return first <= start + PERIOD_START_SLACK and last >= start
+
+
+def trim_to_period(df: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Keep only the bars within `period` of the most recent bar."""
+    delta = period_to_timedelta(period)
+    if delta is None or df.empty:
+        return df
+    return df[df.index > df.index[-1] - delta]
@@ -0,0 +1,308 @@
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+from config import BARSTORE_DIR, BARSTORE_INDEX_STRIDE
+from engine import column_values
+
+META = "meta.json"
+
+# Column name, file dtype and DataFrame column
+COLUMNS = (
+    ("timestamp", "<i8", None),  # Bar start, nanoseconds since the epoch (UTC)
+    ("open", "<f4", "Open"),
+    ("high", "<f4", "High"),
+    ("low", "<f4", "Low"),
+    ("close", "<f4", "Close"),
+    ("volume", "<i8", "Volume"),
+)
+FRAME_COLUMNS = {frame: name for name, _, frame in COLUMNS if frame}
+SPARSE_INDEX = ("sparse_index", "<i8")  # Every `index_stride`-th timestamp
+
+
+def store_path(ticker: str, interval: str, store_dir: Optional[str] = None) -> str:
+    """Return the bar store directory for a ticker/interval pair."""
+    safe_ticker = re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+    return os.path.join(store_dir or BARSTORE_DIR, f"{safe_ticker}_{interval}.bars")
+
+
+def _column_path(path: str, name: str) -> str:
+    return os.path.join(path, f"{name}.bin")
+
+
+def _read_meta(path: str) -> Dict:
+    with open(os.path.join(path, META)) as file:
+        return json.load(file)
+
+
+def _write_meta(path: str, meta: Dict) -> None:
+    tmp_path = os.path.join(path, f"{META}.tmp")
+    with open(tmp_path, "w") as file:
+        json.dump(meta, file)
+    os.replace(tmp_path, os.path.join(path, META))
+
+
+def _to_arrays(df: pd.DataFrame, timezone: Optional[str]) -> Dict[str, np.ndarray]:
+    """Column arrays in file dtypes, with timestamps as int64 ns UTC."""
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    elif timezone:
+        index = index.tz_localize(timezone).tz_convert("UTC").tz_localize(None)
+    arrays = {"timestamp": index.values.astype("datetime64[ns]").view(np.int64)}
+    for name, dtype, frame_column in COLUMNS[1:]:
+        if frame_column == "Volume":
+            volume = column_values(df, "Volume") if "Volume" in df.columns else np.zeros(len(df))
+            values = np.nan_to_num(np.asarray(volume, dtype=np.float64))
+        else:
+            values = column_values(df, frame_column)
+        arrays[name] = np.ascontiguousarray(values, dtype=dtype)
+    return arrays
+
+
+def _write_rows(path: str, arrays: Dict[str, np.ndarray], first_row: int, index_stride: int) -> None:
+    """
+    Write rows starting at `first_row` into every column file.
+
+    Bytes before `first_row` are left untouched, so appending only writes
+    the new tail of each column. Sparse index entries covering the written
+    rows are rewritten the same way.
+    """
+    for name, dtype, _ in COLUMNS:
+        with open(_column_path(path, name), "r+b") as file:
+            file.seek(first_row * np.dtype(dtype).itemsize)
+            file.write(arrays[name].tobytes())
+    first_entry = -(-first_row // index_stride)
+    positions = np.arange(first_entry * index_stride, first_row + len(arrays["timestamp"]), index_stride)
+    with open(_column_path(path, SPARSE_INDEX[0]), "r+b") as file:
+        file.seek(first_entry * np.dtype(SPARSE_INDEX[1]).itemsize)
+        file.write(arrays["timestamp"][positions - first_row].astype(SPARSE_INDEX[1]).tobytes())
+
+
+def write_bars(df: pd.DataFrame, ticker: str, interval: str, store_dir: Optional[str] = None,
+               index_stride: int = BARSTORE_INDEX_STRIDE) -> str:
+    """
+    Write bars to a new columnar store, replacing any existing one.
+
+    Layout: a directory holding meta.json and one raw little-endian file
+    per column (timestamps as int64 ns UTC, OHLC as float32, volume as
+    int64), plus a sparse index file holding every `index_stride`-th
+    timestamp. Each file can be memory-mapped as a NumPy array directly,
+    and append_bars extends the files in place.
+
+    Returns:
+        str: Path of the store directory
+    """
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    index = pd.DatetimeIndex(df.index)
+    timezone = str(index.tz) if index.tz is not None else None
+
+    path = store_path(ticker, interval, store_dir)
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, _ in [(name, dtype) for name, dtype, _ in COLUMNS] + [SPARSE_INDEX]:
+        open(_column_path(tmp_path, name), "wb").close()
+    _write_rows(tmp_path, _to_arrays(df, timezone), 0, index_stride)
+    _write_meta(tmp_path, {
+        "ticker": ticker, "interval": interval, "rows": len(df), "timezone": timezone,
+        "index_stride": index_stride, "columns": {name: dtype for name, dtype, _ in COLUMNS},
+    })
+
+    # Readers that already mapped the old files keep them until they close
+    old_path = f"{path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return path
+
+
+class Bars:
+    """
+    Read-only columnar bars backed by a memory map.
+
+    Column attributes (timestamps, open, high, low, close, volume) are
+    views into the mapped column files, so opening is O(1) and processes
+    reading the same store share it through the OS page cache. Indexing by
+    DataFrame column name (bars["Close"]) returns the same views, so
+    code written for DataFrames, such as engine.column_values and
+    model.prepare_data, reads Bars directly.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], sparse_index: np.ndarray,
+                 index_stride: int, timezone: Optional[str], offset: int = 0):
+        self._columns = columns
+        self._sparse_index = sparse_index
+        self._stride = index_stride
+        self._offset = offset  # Position of this view's first bar in the file
+        self.timezone = timezone
+
+    def __len__(self) -> int:
+        return len(self._columns["timestamp"])
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get("_columns", {})
+        if name == "timestamps":
+            return columns["timestamp"]
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if column not in FRAME_COLUMNS:
+            raise KeyError(column)
+        return self._columns[FRAME_COLUMNS[column]]
+
+    @property
+    def columns(self):
+        return list(FRAME_COLUMNS)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """Bar timestamps as a DatetimeIndex in the stored time zone (copies)."""
+        index = pd.DatetimeIndex(np.asarray(self._columns["timestamp"]).view("datetime64[ns]"))
+        return index.tz_localize("UTC").tz_convert(self.timezone) if self.timezone else index
+
+    def _position(self, moment, side: str) -> int:
+        """searchsorted on the mapped timestamps, narrowed by the sparse index."""
+        stamp = pd.Timestamp(moment)
+        if stamp.tz is not None:
+            stamp = stamp.tz_convert("UTC").tz_localize(None)
+        elif self.timezone:
+            stamp = stamp.tz_localize(self.timezone).tz_convert("UTC").tz_localize(None)
+        value = stamp.value
+        # Only the block between two sparse entries of the file is searched
+        block = int(np.searchsorted(self._sparse_index, value, side=side))
+        lo = max(0, (block - 1) * self._stride - self._offset)
+        hi = min(len(self), block * self._stride + 1 - self._offset)
+        lo, hi = min(lo, len(self)), max(hi, 0)
+        return lo + int(np.searchsorted(self._columns["timestamp"][lo:hi], value, side=side))
+
+    def range(self, start=None, end=None) -> "Bars":
+        """
+        Bars with start <= timestamp <= end, as zero-copy views.
+
+        Naive bounds are interpreted in the stored time zone.
+        """
+        lo = 0 if start is None else self._position(start, "left")
+        hi = len(self) if end is None else self._position(end, "right")
+        hi = max(lo, hi)
+        return Bars({name: values[lo:hi] for name, values in self._columns.items()},
+                    self._sparse_index, self._stride, self.timezone, self._offset + lo)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Copy the bars into a DataFrame shaped like fetch_stock_data output."""
+        return pd.DataFrame(
+            {frame: np.asarray(self._columns[name]) for frame, name in FRAME_COLUMNS.items()},
+            index=self.index
+        )
+
+
+def open_bars(ticker: str, interval: str, store_dir: Optional[str] = None) -> Bars:
+    """
+    Memory-map a bar store.
+
+    Only the rows recorded in meta.json are mapped, so rows an append is
+    still writing are not visible until it commits.
+
+    Raises:
+        FileNotFoundError: If nothing is stored for the ticker/interval
+    """
+    path = store_path(ticker, interval, store_dir)
+    meta = _read_meta(path)
+    rows, stride = meta["rows"], meta["index_stride"]
+
+    def mapped(name, dtype, length):
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(_column_path(path, name), dtype=dtype, mode="r", shape=(length,))
+
+    arrays = {name: mapped(name, dtype, rows) for name, dtype in meta["columns"].items()}
+    sparse_index = mapped(*SPARSE_INDEX, -(-rows // stride))
+    return Bars(arrays, sparse_index, stride, meta["timezone"])
+
+
+def load_range(ticker: str, interval: str, start=None, end=None, store_dir: Optional[str] = None) -> Bars:
+    """Memory-map a ticker/interval and return the bars in [start, end] as views."""
+    return open_bars(ticker, interval, store_dir).range(start, end)
+
+
+def append_bars(df: pd.DataFrame, ticker: str, interval: str, store_dir: Optional[str] = None) -> str:
+    """
+    Merge new bars into the store, new bars winning on duplicate timestamps.
+
+    Stored rows before the first new timestamp are kept as they are. Only
+    the tail from that row on (the stored bars it overlaps, merged with the
+    new ones) is written, at the end of each column file, and the new row
+    count is then committed to meta.json atomically. Appending after the
+    last stored bar therefore writes only the new bars.
+
+    Returns:
+        str: Path of the store directory
+    """
+    from bar_cache import merge_bars
+
+    path = store_path(ticker, interval, store_dir)
+    try:
+        meta = _read_meta(path)
+    except FileNotFoundError:
+        return write_bars(df, ticker, interval, store_dir)
+
+    new = pd.DataFrame({column: column_values(df, column) for column in FRAME_COLUMNS if column in df.columns},
+                       index=df.index)
+    new = new[~new.index.duplicated(keep="last")].sort_index()
+    if new.empty:
+        return path
+    bars = open_bars(ticker, interval, store_dir)
+    overlap = bars.range(start=new.index[0])  # Usually empty or the last, possibly incomplete bar
+    first_row = len(bars) - len(overlap)
+    tail = merge_bars(overlap.to_frame(), new)
+    del bars, overlap  # Drop the maps before writing
+
+    _write_rows(path, _to_arrays(tail, meta["timezone"]), first_row, meta["index_stride"])
+    meta["rows"] = first_row + len(tail)
+    _write_meta(path, meta)
+    return path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Columnar bar store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    importer = subparsers.add_parser("import", help="Import bars from the pickle cache")
+    info = subparsers.add_parser("info", help="Show what is stored")
+    for sub in (importer, info):
+        sub.add_argument("tickers", nargs="+", help="Ticker symbols")
+        sub.add_argument("--interval", default=None, help="Bar interval (defaults to config.INTERVAL)")
+    args = parser.parse_args(argv)
+
+    from config import INTERVAL
+    interval = args.interval or INTERVAL
+    status = 0
+    for ticker in args.tickers:
+        try:
+            if args.command == "import":
+                from bar_cache import load_bars
+                cached = load_bars(ticker, interval)
+                if cached is None or cached.empty:
+                    print(f"{ticker}: nothing cached for {interval}")
+                    status = 1
+                    continue
+                print(f"{ticker}: wrote {append_bars(cached, ticker, interval)}")
+            bars = open_bars(ticker, interval)
+            span = f"{bars.index[0]} -> {bars.index[-1]}" if len(bars) else "empty"
+            print(f"{ticker} {interval}: {len(bars):,} bars, {span}")
+        except FileNotFoundError:
+            print(f"{ticker}: no bar store for {interval}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
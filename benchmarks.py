@@ -0,0 +1,297 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+from unittest import mock
+from typing import Callable, Dict, List, Optional, Sequence
+from config import STARTUP_BUDGET_SECONDS, BENCHMARK_BASELINE, BENCHMARK_TOLERANCE
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+STARTUP_MODULES = [
+    "config", "strategy", "engine", "indicators", "bar_cache", "fetch_data",
+    "sentiment", "broker", "model", "predictor", "watchlist", "sweep", "main",
+    "exchange", "scheduler", "walkforward", "synthetic", "portfolio", "robustness", "analytics", "train", "dataset",
+]
+
+PIPELINE_SIZES = (1_000, 100_000, 1_000_000)
+SCALAR_SIGNAL_CALLS = 10_000  # trading_signal is per bar, so time a fixed number of calls
+PLACE_TRADE_CALLS = 10_000
+
+# Modules that must not be imported just by importing a project module
+HEAVY_MODULES = ["tensorflow", "sklearn", "textblob", "yfinance", "plotly"]
+
+
+def _run_python(code: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    lines = result.stdout.strip().splitlines()
+    return lines[-1] if lines else ""
+
+
+def measure_import_time(module: str, runs: int = 3) -> float:
+    """
+    Measure the import time of a module in a fresh interpreter.
+
+    Returns:
+        float: Best of `runs` import times in seconds
+    """
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    return min(float(_run_python(code)) for _ in range(runs))
+
+
+def heavy_imports(module: str) -> Sequence[str]:
+    """Return the heavy dependencies loaded as a side effect of importing a module."""
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = _run_python(code)
+    return output.split(",") if output else []
+
+
+def measure_startup(args: Sequence[str] = ("main.py", "--help"), runs: int = 5) -> float:
+    """
+    Measure wall-clock time of a command-line startup.
+
+    Returns:
+        float: Best of `runs` wall-clock times in seconds
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_startup(budget: float = STARTUP_BUDGET_SECONDS, modules: Sequence[str] = STARTUP_MODULES) -> Dict:
+    """
+    Record per-module import times and check `main.py --help` against a budget.
+
+    Returns:
+        dict: Import times, heavy imports, startup time and pass/fail status
+    """
+    results = {
+        "imports": {module: measure_import_time(module) for module in modules},
+        "heavy_imports": {module: heavy_imports(module) for module in modules},
+        "startup_seconds": measure_startup(),
+        "budget_seconds": budget,
+    }
+    results["passed"] = results["startup_seconds"] <= budget
+    return results
+
+
+def _best_time(func: Callable[[], object], repeats: int) -> float:
+    """Best wall-clock time of `repeats` calls, with the function's prints silenced."""
+    timings = []
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _record(results: Dict, name: str, bars: int, seconds: float, items: Optional[int] = None) -> None:
+    items = items or bars
+    results[f"{name}[{bars}]"] = {
+        "name": name, "bars": bars, "seconds": seconds, "items": items,
+        "us_per_item": seconds / items * 1e6,
+    }
+
+
+def bench_pipeline(sizes: Sequence[int] = PIPELINE_SIZES, repeats: int = 3, seed: int = 0) -> Dict:
+    """
+    Time the trading pipeline on synthetic bars, without network access.
+
+    Covers calculate_moving_averages, trading_signals and the scalar
+    trading_signal, backtest.run_backtest and ui.run_backtest (with the
+    data fetch patched to return synthetic bars), prepare_data and
+    place_trade (journaled to a temporary file).
+
+    Returns:
+        dict: Environment metadata and results keyed 'name[bars]'
+    """
+    import numpy as np
+    import backtest
+    from synthetic import generate_ohlcv
+    from indicators import calculate_moving_averages
+    from strategy import trading_signal, trading_signals
+    from model import prepare_data, get_scaler
+    from broker import place_trade, set_journal
+    from journal import TradeJournal
+
+    try:
+        import ui
+    except ImportError as e:
+        ui = None
+        ui_skipped = f"ui not importable: {e}"
+
+    get_scaler()  # Import scikit-learn now so it is not timed as part of prepare_data
+    results: Dict[str, Dict] = {}
+    skipped: Dict[str, str] = {}
+    for bars in sizes:
+        # 1-minute timestamps keep 10M bars within pandas' range; prices still follow 15m bars
+        df = generate_ohlcv(bars, seed=seed, freq="1min")
+        with contextlib.redirect_stdout(io.StringIO()):
+            frame = calculate_moving_averages(df)
+        close, sma_10, sma_50 = (frame[c].to_numpy() for c in ("Close", "SMA_10", "SMA_50"))
+
+        _record(results, "calculate_moving_averages", bars,
+                _best_time(lambda: calculate_moving_averages(df), repeats))
+        _record(results, "trading_signals", bars,
+                _best_time(lambda: trading_signals(close, sma_10, sma_50), repeats))
+
+        calls = min(bars, SCALAR_SIGNAL_CALLS)
+        rows = list(zip(close[-calls:].tolist(), sma_10[-calls:].tolist(), sma_50[-calls:].tolist()))
+        _record(results, "trading_signal", bars,
+                _best_time(lambda: [trading_signal(p, s10, s50, 0.0) for p, s10, s50 in rows], repeats),
+                items=calls)
+
+        with mock.patch("fetch_data.fetch_stock_data", return_value=df):
+            _record(results, "backtest.run_backtest", bars, _best_time(backtest.run_backtest, repeats))
+        if ui is not None:
+            with mock.patch.object(ui, "fetch_stock_data", return_value=df):
+                # Caches are cleared on every call so the cold path is timed
+                _record(results, "ui.run_backtest", bars, _best_time(
+                    lambda: (ui.clear_caches(), ui.run_backtest(10000, 0.02, 0.03, 0.95)), repeats))
+        else:
+            skipped[f"ui.run_backtest[{bars}]"] = ui_skipped
+
+        _record(results, "prepare_data", bars,
+                _best_time(lambda: prepare_data(df), repeats))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = TradeJournal(os.path.join(tmp, "trades.jsonl"))
+        previous = set_journal(journal)
+        try:
+            def trades():
+                for i in range(PLACE_TRADE_CALLS):
+                    place_trade("BUY" if i % 2 == 0 else "SELL", quantity=10, ticker="BENCH")
+                journal.flush()
+            _record(results, "place_trade", PLACE_TRADE_CALLS, _best_time(trades, repeats))
+        finally:
+            set_journal(previous)
+            journal.close()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": seed,
+            "repeats": repeats,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare_to_baseline(
+    current: Dict,
+    baseline: Dict,
+    tolerance: float = BENCHMARK_TOLERANCE,
+    min_seconds: float = 0.001
+) -> List[Dict]:
+    """
+    Flag benchmarks that got slower than the baseline by more than `tolerance`.
+
+    Timings under `min_seconds` are clamped to it, so timer noise on tiny
+    cases is not reported. Benchmarks missing from either run are ignored.
+
+    Returns:
+        list: One dict per regression with baseline/current seconds and ratio
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        reference = baseline.get("results", {}).get(key)
+        if reference is None:
+            continue
+        ratio = max(result["seconds"], min_seconds) / max(reference["seconds"], min_seconds)
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "benchmark": key,
+                "baseline_seconds": reference["seconds"],
+                "current_seconds": result["seconds"],
+                "ratio": ratio,
+            })
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Trading bot benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    startup = subparsers.add_parser("startup", help="Import time and startup budget check")
+    startup.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS,
+                         help="Maximum seconds for 'python main.py --help'")
+    startup.add_argument("--output", default=None, help="Write results as JSON to this file")
+    pipeline = subparsers.add_parser("pipeline", help="Offline pipeline benchmarks on synthetic bars")
+    pipeline.add_argument("--sizes", default=",".join(str(n) for n in PIPELINE_SIZES),
+                          help="Comma-separated bar counts (up to 10000000)")
+    pipeline.add_argument("--repeats", type=int, default=3, help="Runs per benchmark (best is kept)")
+    pipeline.add_argument("--seed", type=int, default=0, help="Synthetic data seed")
+    pipeline.add_argument("--output", default=None, help="Write results as JSON to this file")
+    pipeline.add_argument("--baseline", default=BENCHMARK_BASELINE, help="Baseline JSON to compare against")
+    pipeline.add_argument("--tolerance", type=float, default=BENCHMARK_TOLERANCE,
+                          help="Allowed slowdown before a benchmark is flagged (0.25 = 25%%)")
+    pipeline.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    if args.command == "startup":
+        results = bench_startup(args.budget)
+        print(f"{'Module':<12} {'Import (s)':>10}  Heavy imports")
+        for module, seconds in results["imports"].items():
+            heavy = ", ".join(results["heavy_imports"][module]) or "-"
+            print(f"{module:<12} {seconds:>10.3f}  {heavy}")
+        status = "OK" if results["passed"] else "OVER BUDGET"
+        print(f"\nmain.py --help: {results['startup_seconds']:.3f}s "
+              f"(budget {results['budget_seconds']:.3f}s) {status}")
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(results, file, indent=2)
+        return 0 if results["passed"] else 1
+
+    if args.command == "pipeline":
+        sizes = [int(n) for n in args.sizes.split(",")]
+        results = bench_pipeline(sizes, args.repeats, args.seed)
+        print(f"{'Benchmark':<36} {'Seconds':>10} {'us/item':>10}")
+        for key, result in results["results"].items():
+            print(f"{key:<36} {result['seconds']:>10.4f} {result['us_per_item']:>10.3f}")
+        for key, reason in results["skipped"].items():
+            print(f"{key:<36} skipped ({reason})")
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(results, file, indent=2)
+        if args.save_baseline:
+            with open(args.baseline, "w") as file:
+                json.dump(results, file, indent=2)
+            print(f"\nBaseline written to {args.baseline}")
+            return 0
+
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+            return 0
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']}: {regression['baseline_seconds']:.4f}s -> "
+                  f"{regression['current_seconds']:.4f}s ({regression['ratio']:.2f}x)")
+        if not regressions:
+            print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
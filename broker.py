@@ -1,20 +1,74 @@
+import atexit
 import logging
-from typing import Literal, Optional
-from datetime import datetime
-from config import BROKER_API_KEY, BROKER_SECRET
+from typing import TYPE_CHECKING, Literal, Optional
+from config import TICKER, BROKER_API_KEY, BROKER_SECRET
+from journal import TradeJournal
+
+if TYPE_CHECKING:
+    from exchange import SimulatedExchange
 
 OrderType = Literal["BUY", "SELL"]
 
-def place_trade(order_type: OrderType, quantity: int = 1) -> bool:
+_journal: Optional[TradeJournal] = None
+_exchange: Optional["SimulatedExchange"] = None
+
+def get_journal() -> TradeJournal:
+    """Return the trade journal, starting its writer thread on first use."""
+    global _journal
+    if _journal is None:
+        _journal = TradeJournal()
+        atexit.register(_journal.close)
+    return _journal
+
+def set_journal(journal: Optional[TradeJournal]) -> Optional[TradeJournal]:
+    """
+    Replace the trade journal (e.g. to change path or durability mode).
+
+    Returns:
+        Optional[TradeJournal]: The previous journal, which is not closed
+    """
+    global _journal
+    previous, _journal = _journal, journal
+    return previous
+
+def set_exchange(exchange: Optional["SimulatedExchange"]) -> Optional["SimulatedExchange"]:
     """
-    Simulate placing a trade and log the action.
+    Route orders to an exchange (e.g. exchange.SimulatedExchange), or None
+    to only record them in the journal.
+
+    Returns:
+        Optional[SimulatedExchange]: The previous exchange, which is not closed
+    """
+    global _exchange
+    previous, _exchange = _exchange, exchange
+    return previous
+
+def _record_fill(future) -> None:
+    """Journal the execution report of a routed order (runs on the exchange thread)."""
+    try:
+        report = future.result()
+        get_journal().record(event="ORDER_FILLED", order_id=report.order_id, status=report.status,
+                             quantity=report.filled_quantity, price=report.average_price,
+                             latency_ms=report.latency_ms)
+    except Exception as e:
+        print(f"Error recording fill: {str(e)}")
+
+def place_trade(order_type: OrderType, quantity: int = 1, ticker: Optional[str] = None) -> bool:
+    """
+    Simulate placing a trade and record it in the trade journal.
+
+    The record is handed to the journal's writer thread, so this returns
+    without waiting on file I/O. When an exchange is set with set_exchange(),
+    a market order is also submitted to it and its fill is journaled once
+    reported.
     
     Args:
         order_type (str): Type of order ('BUY' or 'SELL')
         quantity (int): Number of shares to trade
+        ticker (str): Ticker symbol (optional, included in the log entry)
         
     Returns:
-        bool: True if trade was logged successfully, False otherwise
+        bool: True if trade was recorded successfully, False otherwise
     """
     try:
         if order_type not in ["BUY", "SELL"]:
@@ -22,12 +76,15 @@ def place_trade(order_type: OrderType, quantity: int = 1) -> bool:
         if quantity < 1:
             raise ValueError(f"Invalid quantity: {quantity}")
             
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"{timestamp} - TRADE EXECUTED: {order_type} | Quantity: {quantity}"
-        
-        print(log_entry)
-        with open("logs/trading_log.txt", "a") as file:
-            file.write(log_entry + "\n")
+        if _exchange is not None:
+            future = _exchange.submit(order_type, quantity, ticker=ticker or TICKER)
+            get_journal().record(event="ORDER_SUBMITTED", order_id=future.order_id,
+                                 order_type=order_type, quantity=quantity, ticker=ticker)
+            future.add_done_callback(_record_fill)
+            return True
+
+        get_journal().record(event="TRADE_EXECUTED", order_type=order_type,
+                             quantity=quantity, ticker=ticker)
         return True
         
     except Exception as e:
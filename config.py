@@ -12,3 +12,109 @@ LSTM_LOOKBACK = 50  # Past 50 data points for prediction
 # Broker settings (if using a broker API)
 BROKER_API_KEY = "your_broker_api_key"
 BROKER_SECRET = "your_broker_secret"
+
+# Data cache settings
+CACHE_DIR = "data/cache"
+OFFLINE_MODE = False  # Serve bars from the local cache only
+
+# Watchlist settings
+WATCHLIST = [
+    "PETR4.SA", "VALE3.SA", "ITUB4.SA", "BBDC4.SA", "BBAS3.SA",
+    "ABEV3.SA", "B3SA3.SA", "WEGE3.SA", "RENT3.SA", "SUZB3.SA",
+]
+WATCHLIST_BATCH_SIZE = 25  # Tickers per yfinance request
+WATCHLIST_MAX_WORKERS = 4  # Concurrent download requests
+
+# Sentiment cache settings
+SENTIMENT_TTL_SECONDS = 900  # Reuse query results for 15 minutes
+SENTIMENT_ARTICLE_CACHE_SIZE = 1024  # Memoized article polarities (LRU)
+
+# Model artifacts and inference
+MODEL_DIR = "models/lstm"  # Artifacts, or versions v1, v2, ... written by train.py
+PREDICTION_BUDGET_MS = 200  # Warn when a prediction call exceeds this
+
+# Startup budget for `python main.py --help` (see benchmarks.py startup)
+STARTUP_BUDGET_SECONDS = 1.0
+
+# Trade journal settings
+JOURNAL_PATH = "logs/trades.jsonl"
+JOURNAL_FSYNC = False  # fsync every record instead of batched flushes
+JOURNAL_BATCH_SIZE = 256  # Records written per batch
+JOURNAL_FLUSH_INTERVAL = 0.5  # Seconds between flushes in batched mode
+JOURNAL_SHUTDOWN_TIMEOUT = 2.0  # Max seconds to drain the queue on exit
+
+# Simulated exchange settings (see exchange.py)
+EXCHANGE_LATENCY_MS = 1.0  # One-way order latency
+EXCHANGE_JITTER_MS = 0.5  # Uniform latency jitter (+/-)
+EXCHANGE_SLIPPAGE_BPS = 2.0  # Adverse slippage applied to market orders
+EXCHANGE_TICK_SIZE = 0.01  # Price step between synthetic liquidity levels
+EXCHANGE_DEPTH = 10  # Synthetic liquidity levels per side
+EXCHANGE_LEVEL_SIZE = 1000  # Shares quoted per level
+
+# Scheduler settings (see scheduler.py)
+MARKET_TIMEZONE = "America/Sao_Paulo"
+MARKET_OPEN = "10:00"  # B3 regular session
+MARKET_CLOSE = "17:55"
+MARKET_HOLIDAYS = []  # "YYYY-MM-DD" dates with no session
+BAR_CLOSE_DELAY_SECONDS = 20  # Wait after a bar closes before fetching it
+BAR_RETRY_BASE_SECONDS = 5  # First retry delay for a late bar (doubles each attempt)
+BAR_RETRY_MAX_ATTEMPTS = 5
+SENTIMENT_REFRESH_SECONDS = 900  # Sentiment stage cadence
+
+# Walk-forward settings (see walkforward.py)
+WALKFORWARD_TRAIN_BARS = 2000  # About three months of 15m B3 bars
+WALKFORWARD_TEST_BARS = 500  # About three weeks
+WALKFORWARD_LSTM_EPOCHS = 5  # Epochs per fold when refitting the LSTM
+WALKFORWARD_SEED = 42
+
+# Benchmark regression checks (see benchmarks.py pipeline)
+BENCHMARK_BASELINE = "bench_baseline.json"
+BENCHMARK_TOLERANCE = 0.25  # Flag benchmarks more than 25% slower than the baseline
+
+# Metrics export (see metrics.py)
+METRICS_PREFIX = "tradingbot"
+METRICS_PORT = 9108  # Prometheus /metrics endpoint for run_bot (None to disable)
+METRICS_HOST = "127.0.0.1"  # Interface the endpoint listens on ("0.0.0.0" exposes it to the network)
+METRICS_TEXTFILE = None  # Also rewrite this file after every cycle, e.g. "logs/metrics.prom"
+
+# Dashboard settings (see ui.py)
+UI_DATA_TTL_SECONDS = 300  # Refetch bars at most every 5 minutes
+UI_INDICATOR_CACHE_SIZE = 16  # Indicator frames kept, keyed by data hash
+UI_BACKTEST_CACHE_SIZE = 256  # Backtest results kept (LRU), keyed by data hash and parameters
+UI_CHART_POINTS = 2000  # Min/max buckets per chart (about the chart width in pixels)
+UI_WEBGL_THRESHOLD = 5000  # Draw traces with more points than this using WebGL
+
+# Columnar bar store (see barstore.py)
+BARSTORE_DIR = "data/bars"
+BARSTORE_INDEX_STRIDE = 4096  # Bars between sparse index entries
+
+# Portfolio backtest settings (see portfolio.py)
+PORTFOLIO_MAX_POSITIONS = 10  # Tickers held at once; each entry targets 1/N of the invested equity
+
+# Robustness analysis settings (see robustness.py)
+ROBUSTNESS_PATHS = 10000  # Resampled paths per analysis
+ROBUSTNESS_BLOCK_BARS = 32  # Bootstrap block length, about one B3 session of 15m bars
+ROBUSTNESS_CHUNK_PATHS = 500  # Paths simulated together as arrays per worker task
+ROBUSTNESS_CONFIDENCE = 0.95
+ROBUSTNESS_SEED = 42
+
+# Performance analytics settings (see analytics.py)
+BARS_PER_YEAR = 252 * 32  # 15m bars in a 10:00-17:55 B3 session; annualizes ratios and scales synthetic volatility
+
+# Training settings (see train.py)
+TRAIN_EPOCHS = 50  # Maximum epochs for a full retrain (early stopping usually ends sooner)
+TRAIN_FINETUNE_EPOCHS = 5  # Maximum epochs when fine-tuning on new bars
+TRAIN_PATIENCE = 3  # Epochs without validation improvement before stopping
+TRAIN_BATCH_SIZE = 256
+TRAIN_VALIDATION_FRACTION = 0.1  # Newest windows held out for early stopping
+TRAIN_REPLAY_BARS = 2000  # Earlier bars mixed into a fine-tune
+TRAIN_KEEP_VERSIONS = 5  # Model versions kept on disk (0 keeps all)
+TRAIN_INTRA_OP_THREADS = 0  # Threads per TensorFlow kernel (0 = one per core)
+TRAIN_INTER_OP_THREADS = 0  # Concurrent TensorFlow kernels (0 = TensorFlow default)
+
+# Training dataset settings (see dataset.py)
+DATASET_DIR = "data/datasets"
+DATASET_SHARD_WINDOWS = 65536  # Windows per float32 shard file (about 13 MB at lookback 50)
+DATASET_CYCLE_LENGTH = 4  # Shards read and interleaved concurrently
+DATASET_SHUFFLE_BUFFER = 16384  # Windows mixed across shards before batching
+DATASET_MAX_WORKERS = 4  # Tickers preprocessed concurrently
@@ -0,0 +1,344 @@
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import hashlib
+import argparse
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import (
+    INTERVAL, LSTM_LOOKBACK, WATCHLIST, DATASET_DIR, DATASET_SHARD_WINDOWS,
+    DATASET_SHUFFLE_BUFFER, DATASET_CYCLE_LENGTH, DATASET_MAX_WORKERS, TRAIN_BATCH_SIZE
+)
+
+MANIFEST = "manifest.json"
+MICRO_BATCH = 32  # Windows per tf.data element before rebatching
+
+
+def dataset_path(interval: str = INTERVAL, lookback: int = LSTM_LOOKBACK,
+                 dataset_dir: Optional[str] = None) -> str:
+    """Directory of the window cache for an interval/lookback pair."""
+    return os.path.join(dataset_dir or DATASET_DIR, f"{interval}_lb{lookback}")
+
+
+def _safe(ticker: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+
+
+def _load_close(ticker: str, interval: str, source: str) -> Optional[Tuple[np.ndarray, str]]:
+    """Closes and the last timestamp of a ticker from the bar cache or the bar store."""
+    if source == "store":
+        from barstore import open_bars
+        try:
+            bars = open_bars(ticker, interval)
+        except FileNotFoundError:
+            return None
+        close, index = np.asarray(bars["Close"], dtype=np.float64), bars.index
+    elif source == "cache":
+        from bar_cache import load_bars
+        df = load_bars(ticker, interval)
+        if df is None or df.empty:
+            return None
+        close, index = np.asarray(df["Close"], dtype=np.float64).reshape(-1), df.index
+    else:
+        raise ValueError(f"Unknown bar source: {source}")
+    valid = ~np.isnan(close)
+    if not valid.any():
+        return None
+    return close[valid], str(index[-1])
+
+
+def _write_ticker(ticker: str, close: np.ndarray, directory: str, lookback: int,
+                  shard_windows: int) -> Dict:
+    """
+    Scale one ticker's closes and write its windows as float32 shards.
+
+    Each shard is an .npy array of shape (windows, lookback + 1): the
+    first `lookback` columns are the input window and the last one the
+    target, as in model.prepare_data.
+    """
+    low, high = float(close.min()), float(close.max())
+    scale = 1.0 / (high - low) if high > low else 1.0
+    # Same parameters as MinMaxScaler(feature_range=(0, 1)) fitted on this ticker
+    scaled = (close * scale - low * scale).astype(np.float32)
+
+    # Remove this ticker's old shards (the exact pattern spares tickers sharing a prefix)
+    pattern = re.compile(re.escape(_safe(ticker)) + r"_\d{5}\.npy")
+    for name in os.listdir(directory):
+        if pattern.fullmatch(name):
+            os.remove(os.path.join(directory, name))
+    shards = []
+    if len(scaled) > lookback:
+        windows = sliding_window_view(scaled, lookback + 1)
+        for number, start in enumerate(range(0, len(windows), shard_windows)):
+            name = f"{_safe(ticker)}_{number:05d}.npy"
+            tmp_path = os.path.join(directory, f"{name}.tmp")
+            with open(tmp_path, "wb") as file:
+                np.save(file, np.ascontiguousarray(windows[start:start + shard_windows]))
+            os.replace(tmp_path, os.path.join(directory, name))
+            shards.append({"file": name, "samples": int(min(shard_windows, len(windows) - start))})
+    return {"scale": scale, "min": -low * scale, "shards": shards}
+
+
+def load_manifest(directory: str) -> Optional[Dict]:
+    """Manifest of a built window cache, or None if there is none."""
+    try:
+        with open(os.path.join(directory, MANIFEST)) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def build_dataset(
+    tickers: Sequence[str],
+    interval: str = INTERVAL,
+    lookback: int = LSTM_LOOKBACK,
+    dataset_dir: Optional[str] = None,
+    source: str = "cache",
+    shard_windows: int = DATASET_SHARD_WINDOWS,
+    max_workers: int = DATASET_MAX_WORKERS
+) -> Dict:
+    """
+    Build (or reuse) the on-disk window cache for many tickers.
+
+    Each ticker is min/max scaled on its own history, so tickers at very
+    different price levels share the [0, 1] input range, and its windows
+    are written as float32 shards. The manifest records every ticker's
+    scaling parameters and a fingerprint of its bars (row count, last
+    timestamp and a hash of the closes, so revised history is noticed
+    too); only tickers whose bars changed are preprocessed again,
+    so later builds and training epochs read the shards directly.
+
+    Args:
+        tickers: Ticker symbols
+        interval (str): Bar interval
+        lookback (int): Window length
+        dataset_dir (str): Root directory for window caches
+        source (str): "cache" (bar_cache pickles) or "store" (barstore files)
+        shard_windows (int): Windows per shard file
+        max_workers (int): Tickers preprocessed concurrently
+
+    Returns:
+        dict: Manifest with path, lookback, samples, per-ticker entries and
+        build statistics
+    """
+    start = time.perf_counter()
+    directory = dataset_path(interval, lookback, dataset_dir)
+    os.makedirs(directory, exist_ok=True)
+    previous = load_manifest(directory) or {}
+    old_entries = previous.get("tickers", {}) if previous.get("shard_windows") == shard_windows else {}
+
+    def process(ticker):
+        loaded = _load_close(ticker, interval, source)
+        if loaded is None:
+            return ticker, None, False
+        close, last = loaded
+        fingerprint = {
+            "rows": int(len(close)),
+            "last": last,
+            "hash": hashlib.blake2b(close.tobytes(), digest_size=16).hexdigest(),
+        }
+        old = old_entries.get(ticker)
+        if old is not None and old["fingerprint"] == fingerprint and all(
+                os.path.exists(os.path.join(directory, shard["file"])) for shard in old["shards"]):
+            return ticker, old, False
+        entry = _write_ticker(ticker, close, directory, lookback, shard_windows)
+        entry["fingerprint"] = fingerprint
+        return ticker, entry, True
+
+    entries, rebuilt, missing = {}, [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for ticker, entry, fresh in executor.map(process, tickers):
+            if entry is None:
+                missing.append(ticker)
+                continue
+            entries[ticker] = entry
+            if fresh:
+                rebuilt.append(ticker)
+
+    # Shards of tickers no longer in the dataset are removed
+    for ticker in set(old_entries) - set(entries):
+        for shard in old_entries[ticker]["shards"]:
+            path = os.path.join(directory, shard["file"])
+            if os.path.exists(path):
+                os.remove(path)
+
+    manifest = {
+        "path": directory,
+        "interval": interval,
+        "lookback": lookback,
+        "shard_windows": shard_windows,
+        "samples": sum(shard["samples"] for entry in entries.values() for shard in entry["shards"]),
+        "tickers": entries,
+    }
+    tmp_path = os.path.join(directory, f"{MANIFEST}.tmp")
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST))
+
+    manifest["rebuilt"] = rebuilt
+    manifest["missing"] = missing
+    manifest["build_seconds"] = time.perf_counter() - start
+    return manifest
+
+
+def shard_paths(manifest: Dict) -> List[str]:
+    """Paths of every shard in a manifest."""
+    return [
+        os.path.join(manifest["path"], shard["file"])
+        for entry in manifest["tickers"].values() for shard in entry["shards"]
+    ]
+
+
+def make_tf_dataset(
+    manifest: Dict,
+    batch_size: int = TRAIN_BATCH_SIZE,
+    shuffle: bool = True,
+    seed: Optional[int] = None,
+    cycle_length: int = DATASET_CYCLE_LENGTH,
+    shuffle_buffer: int = DATASET_SHUFFLE_BUFFER
+):
+    """
+    Stream training batches from the shard cache with tf.data.
+
+    Shards are read by `cycle_length` parallel readers whose windows
+    (shuffled within each shard, in blocks of MICRO_BATCH) are
+    interleaved, so the shuffle buffer mixes tickers within every batch.
+    Batches are split into (X, y) in parallel and prefetched so the next
+    batches are ready while the model trains on the current one.
+
+    Without a seed, readers deliver windows as soon as they are ready
+    (fastest). With a seed, the interleave order is fixed and each
+    shard's permutation depends only on the seed, the shard and the
+    epoch, so the batch sequence is reproducible.
+
+    Args:
+        manifest (dict): Output of build_dataset or load_manifest
+        batch_size (int): Windows per batch
+        shuffle (bool): Shuffle shard order and windows each epoch
+        seed (int): Random seed for shuffling (None: not reproducible)
+        cycle_length (int): Shards read concurrently
+        shuffle_buffer (int): Windows in the shuffle buffer
+
+    Returns:
+        tf.data.Dataset: Batches of (X, y) with X shaped (batch, lookback, 1)
+    """
+    import tensorflow as tf
+
+    lookback = manifest["lookback"]
+    paths = shard_paths(manifest)
+    if not paths:
+        raise ValueError("Dataset has no windows")
+
+    files = tf.data.Dataset.from_tensor_slices(paths)
+    if shuffle:
+        files = files.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+    loads, lock = {}, threading.Lock()
+
+    def load(path):
+        windows = np.load(path.decode())
+        if not shuffle:
+            return windows
+        with lock:
+            epoch = loads[path] = loads.get(path, -1) + 1
+        # Seeded per shard and epoch: parallel readers call load in no fixed order
+        rng = np.random.default_rng(None if seed is None else [seed, zlib.crc32(path), epoch])
+        return windows[rng.permutation(len(windows))]
+
+    def read_shard(path):
+        windows = tf.ensure_shape(tf.numpy_function(load, [path], tf.float32), (None, lookback + 1))
+        # Windows travel in small blocks: far fewer tf.data elements than one per window
+        return tf.data.Dataset.from_tensor_slices(windows).batch(MICRO_BATCH)
+
+    dataset = files.interleave(
+        read_shard, cycle_length=cycle_length, num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=not shuffle or seed is not None
+    )
+    if shuffle:
+        dataset = dataset.shuffle(max(1, shuffle_buffer // MICRO_BATCH), seed=seed, reshuffle_each_iteration=True)
+    return dataset.rebatch(batch_size).map(
+        lambda w: (w[:, :lookback, tf.newaxis], w[:, lookback]), num_parallel_calls=tf.data.AUTOTUNE
+    ).prefetch(tf.data.AUTOTUNE)
+
+
+def measure_input_throughput(dataset, max_batches: Optional[int] = None) -> Dict[str, float]:
+    """
+    Read batches without training to measure the input pipeline alone.
+
+    Returns:
+        dict: samples, seconds and samples_per_sec
+    """
+    start = time.perf_counter()
+    samples = 0
+    for number, (_, y) in enumerate(dataset):
+        samples += int(y.shape[0])
+        if max_batches is not None and number + 1 >= max_batches:
+            break
+    seconds = time.perf_counter() - start
+    return {"samples": samples, "seconds": seconds, "samples_per_sec": samples / seconds if seconds else 0.0}
+
+
+def throughput_callback(samples_per_epoch: int, results: List[float]):
+    """
+    Keras callback appending each epoch's training samples/sec to `results`.
+    """
+    import tensorflow as tf
+
+    started = {}
+    return tf.keras.callbacks.LambdaCallback(
+        on_epoch_begin=lambda epoch, logs: started.__setitem__("time", time.perf_counter()),
+        on_epoch_end=lambda epoch, logs: results.append(
+            samples_per_epoch / (time.perf_counter() - started["time"])
+        )
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Multi-ticker LSTM window datasets")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Build or refresh the shard cache")
+    bench = subparsers.add_parser("bench", help="Report input pipeline and training samples/sec")
+    for sub in (build, bench):
+        sub.add_argument("tickers", nargs="*", help="Ticker symbols (defaults to config.WATCHLIST)")
+        sub.add_argument("--interval", default=INTERVAL, help="Bar interval")
+        sub.add_argument("--lookback", type=int, default=LSTM_LOOKBACK, help="Window length")
+        sub.add_argument("--source", choices=("cache", "store"), default="cache", help="Where bars are read from")
+    bench.add_argument("--batch-size", type=int, default=TRAIN_BATCH_SIZE, help="Windows per batch")
+    bench.add_argument("--epochs", type=int, default=2, help="Training epochs to time")
+    args = parser.parse_args(argv)
+
+    manifest = build_dataset(args.tickers or WATCHLIST, args.interval, args.lookback, source=args.source)
+    for ticker in manifest["missing"]:
+        print(f"{ticker}: no bars for {args.interval}")
+    print(f"{len(manifest['tickers'])} tickers, {manifest['samples']:,} windows in {manifest['path']} "
+          f"({len(manifest['rebuilt'])} preprocessed, {manifest['build_seconds']:.2f}s)")
+    if not manifest["samples"]:
+        return 1
+    if args.command == "build":
+        return 0
+
+    from model import create_lstm_model
+
+    dataset = make_tf_dataset(manifest, batch_size=args.batch_size)
+    measure_input_throughput(dataset, max_batches=10)  # Warm up readers and tracing
+    pipeline = measure_input_throughput(dataset)
+    print(f"Input pipeline: {pipeline['samples_per_sec']:,.0f} samples/sec")
+
+    speeds = []
+    model = create_lstm_model(args.lookback)
+    model.fit(dataset, epochs=args.epochs, verbose=0,
+              callbacks=[throughput_callback(manifest["samples"], speeds)])
+    for epoch, speed in enumerate(speeds, 1):
+        print(f"Training epoch {epoch}: {speed:,.0f} samples/sec")
+    if speeds and pipeline["samples_per_sec"] < max(speeds) * 1.5:
+        print("Warning: input pipeline has little headroom over training; raise cycle_length or shard size")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
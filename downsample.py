@@ -0,0 +1,58 @@
+import numpy as np
+from typing import Iterable, Optional, Sequence
+
+
+def minmax_indices(values: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Indices of the minimum and maximum of each of `n_buckets` equal buckets.
+
+    Unlike averaging or LTTB, min/max bucketing never drops a local
+    extreme, so spikes and the overall high/low survive exactly. NaNs are
+    ignored; the first and last points are always included.
+
+    Args:
+        values (np.ndarray): 1-D series
+        n_buckets (int): Number of buckets (about the chart width in pixels)
+
+    Returns:
+        np.ndarray: Sorted unique int64 indices (at most 2 * n_buckets + 2)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= 2 * n_buckets:
+        return np.arange(n, dtype=np.int64)
+
+    size = -(-n // n_buckets)  # Ceiling division
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = values
+    buckets = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets, dtype=np.int64) * size
+    valid = ~np.isnan(buckets)
+    low = np.argmin(np.where(valid, buckets, np.inf), axis=1) + offsets
+    high = np.argmax(np.where(valid, buckets, -np.inf), axis=1) + offsets
+
+    indices = np.concatenate([low, high, [0, n - 1]])
+    return np.unique(indices[indices < n])
+
+
+def downsample_indices(
+    series: Sequence[np.ndarray],
+    n_buckets: int,
+    keep: Optional[Iterable[int]] = None
+) -> np.ndarray:
+    """
+    Shared indices for several aligned series (e.g. Close and its SMAs).
+
+    The union of every series' min/max indices is returned together with
+    `keep` (e.g. bars with trades), so all traces share one x axis, each
+    keeps its extremes and the line passes exactly through kept bars.
+
+    Returns:
+        np.ndarray: Sorted unique int64 indices
+    """
+    parts = [minmax_indices(values, n_buckets) for values in series]
+    if keep is not None:
+        parts.append(np.asarray(list(keep), dtype=np.int64))
+    n = len(series[0]) if series else 0
+    indices = np.unique(np.concatenate(parts)) if parts else np.arange(0)
+    return indices[(indices >= 0) & (indices < n)]
@@ -0,0 +1,253 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Optional
+from strategy import trading_signals, SIGNAL_BUY, SIGNAL_SELL
+
+# Trade type codes used in the columnar ledger
+TRADE_BUY = 0
+TRADE_SELL = 1
+TRADE_STOP_LOSS = 2
+TRADE_TAKE_PROFIT = 3
+TRADE_TYPES = ("BUY", "SELL", "STOP_LOSS", "TAKE_PROFIT")
+
+WARMUP_BARS = 50
+
+
+@dataclass
+class BacktestResult:
+    """Columnar trade ledger and final account state of a backtest run."""
+    trades: Dict[str, np.ndarray]
+    final_balance: float
+    initial_balance: float
+    equity: Optional[np.ndarray] = None  # Cash plus position at each bar's close
+
+    @property
+    def num_trades(self) -> int:
+        return len(self.trades["bar"])
+
+
+def column_values(df, column: str) -> np.ndarray:
+    """
+    Extract a DataFrame column as a flat float64 array.
+
+    yfinance returns MultiIndex columns, so df[column] may be a
+    single-column DataFrame rather than a Series.
+    """
+    return np.asarray(df[column], dtype=np.float64).reshape(-1)
+
+
+def _first_hit(predicate, start: int, stop: int) -> int:
+    """
+    Return the first index in [start, stop) where predicate(lo, hi) is True.
+
+    The range is scanned in geometrically growing chunks so short holding
+    periods stay cheap while long ones still cost O(bars) in total.
+    """
+    chunk = 64
+    while start < stop:
+        end = min(start + chunk, stop)
+        hits = np.flatnonzero(predicate(start, end))
+        if hits.size:
+            return start + int(hits[0])
+        start = end
+        chunk *= 2
+    return -1
+
+
+def run_engine(
+    close: np.ndarray,
+    sma_10: np.ndarray,
+    sma_50: np.ndarray,
+    initial_balance: float = 10000,
+    stop_loss_pct: float = 0.02,
+    take_profit_pct: float = 0.03,
+    position_size_pct: float = 0.95,
+    signals: np.ndarray = None,
+    warmup: int = WARMUP_BARS,
+) -> BacktestResult:
+    """
+    Run the long-only SMA strategy over price arrays.
+
+    Signals are computed for all bars up front; the position state machine
+    then jumps from event to event (entry, stop-loss, take-profit, sell)
+    using vectorized searches instead of visiting every bar.
+
+    Args:
+        close (np.ndarray): Close prices
+        sma_10 (np.ndarray): 10-period Simple Moving Average
+        sma_50 (np.ndarray): 50-period Simple Moving Average
+        initial_balance (float): Starting cash
+        stop_loss_pct (float): Stop loss as a fraction of entry price
+        take_profit_pct (float): Take profit as a fraction of entry price
+        position_size_pct (float): Fraction of cash used per entry
+        signals (np.ndarray): Precomputed signal codes (optional)
+        warmup (int): Number of leading bars to skip
+
+    Returns:
+        BacktestResult: Columnar trade ledger and final balance
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if signals is None:
+        signals = trading_signals(close, sma_10, sma_50)
+
+    n = len(close)
+    balance = initial_balance
+    bars, types, prices, positions, balances = [], [], [], [], []
+
+    def record(i, trade_type, price, position):
+        bars.append(i)
+        types.append(trade_type)
+        prices.append(price)
+        positions.append(position)
+        balances.append(balance)
+
+    i = warmup
+    while i < n:
+        # Flat: wait for a BUY the cash balance can afford
+        cash = balance
+        j = _first_hit(
+            lambda lo, hi: (signals[lo:hi] == SIGNAL_BUY) & (close[lo:hi] < cash),
+            i, n
+        )
+        if j < 0:
+            break
+
+        price = close[j]
+        position = (balance * position_size_pct) // price
+        balance -= position * price
+        record(j, TRADE_BUY, price, position)
+        if position == 0:
+            i = j + 1
+            continue
+
+        # Long: wait for stop loss, take profit or a SELL signal
+        entry_price = price
+        k = _first_hit(
+            lambda lo, hi: (
+                ((close[lo:hi] - entry_price) / entry_price <= -stop_loss_pct)
+                | ((close[lo:hi] - entry_price) / entry_price >= take_profit_pct)
+                | (signals[lo:hi] == SIGNAL_SELL)
+            ),
+            j + 1, n
+        )
+        if k < 0:
+            balance += position * close[-1]
+            break
+
+        price = close[k]
+        change = (price - entry_price) / entry_price
+        if change <= -stop_loss_pct:
+            trade_type = TRADE_STOP_LOSS
+        elif change >= take_profit_pct:
+            trade_type = TRADE_TAKE_PROFIT
+        else:
+            trade_type = TRADE_SELL
+        balance += position * price
+        record(k, trade_type, price, 0.0)
+        i = k + 1
+
+    balances_arr = np.array(balances, dtype=np.float64)
+    trades = {
+        "bar": np.array(bars, dtype=np.int64),
+        "type": np.array(types, dtype=np.int8),
+        "price": np.array(prices, dtype=np.float64),
+        "position": np.array(positions, dtype=np.float64),
+        "balance": balances_arr,
+        "return_pct": (balances_arr - initial_balance) / initial_balance * 100,
+    }
+    return BacktestResult(trades=trades, final_balance=float(balance),
+                          initial_balance=float(initial_balance),
+                          equity=equity_curve(close, trades, initial_balance))
+
+
+def equity_curve(close: np.ndarray, trades: Dict[str, np.ndarray], initial_balance: float) -> np.ndarray:
+    """
+    Account value at every bar: cash plus the open position at the close.
+
+    Cash and position are piecewise constant between ledger rows, so each
+    bar looks up the latest row at or before it.
+
+    Args:
+        close (np.ndarray): Close prices the ledger was produced from
+        trades (dict): Columnar ledger from run_engine
+        initial_balance (float): Starting cash
+
+    Returns:
+        np.ndarray: float64 equity per bar
+    """
+    n = len(close)
+    cash = np.concatenate(([initial_balance], trades["balance"]))
+    position = np.concatenate(([0.0], trades["position"]))
+    row = np.cumsum(np.bincount(trades["bar"], minlength=n))  # Ledger rows at or before each bar
+    held = position[row]
+    return cash[row] + np.where(held > 0, held * close, 0.0)
+
+
+def win_rate(result: BacktestResult) -> float:
+    """Percentage of ledger rows with a positive cumulative return."""
+    if result.num_trades == 0:
+        return 0.0
+    return float(np.count_nonzero(result.trades["return_pct"] > 0) / result.num_trades * 100)
+
+
+def run_engine_on_frame(df, **params) -> BacktestResult:
+    """
+    Run the engine on a DataFrame with 'Close', 'SMA_10' and 'SMA_50' columns.
+
+    Args:
+        df (pd.DataFrame): DataFrame from calculate_moving_averages
+        **params: Keyword arguments forwarded to run_engine
+
+    Returns:
+        BacktestResult: Columnar trade ledger and final balance
+    """
+    return run_engine(
+        column_values(df, "Close"),
+        column_values(df, "SMA_10"),
+        column_values(df, "SMA_50"),
+        **params
+    )
+
+
+def run_engine_on_bars(bars, **params) -> BacktestResult:
+    """
+    Run the engine on a barstore.Bars range, computing the SMAs from its closes.
+
+    Args:
+        bars (barstore.Bars): Memory-mapped bars (e.g. from barstore.load_range)
+        **params: Keyword arguments forwarded to run_engine
+
+    Returns:
+        BacktestResult: Columnar trade ledger and final balance
+    """
+    from indicators import sma
+
+    close = column_values(bars, "Close")
+    return run_engine(close, sma(close, 10), sma(close, 50), **params)
+
+
+def trades_to_frame(result: BacktestResult, index):
+    """
+    Convert a columnar ledger into the trade DataFrame used for display.
+
+    Args:
+        result (BacktestResult): Engine output
+        index: Bar index (e.g. df.index) used to resolve trade dates
+
+    Returns:
+        pd.DataFrame: One row per trade with date, type, price, position,
+        balance and return_pct columns
+    """
+    import pandas as pd
+
+    trades = result.trades
+    if result.num_trades == 0:
+        return pd.DataFrame()
+    return pd.DataFrame({
+        "date": index[trades["bar"]],
+        "type": np.array(TRADE_TYPES, dtype=object)[trades["type"]],
+        "price": trades["price"],
+        "position": trades["position"],
+        "balance": trades["balance"],
+        "return_pct": trades["return_pct"],
+    })
@@ -0,0 +1,344 @@
+import sys
+import time
+import heapq
+import queue
+import random
+import argparse
+import itertools
+import threading
+import numpy as np
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from config import (
+    TICKER, EXCHANGE_LATENCY_MS, EXCHANGE_JITTER_MS, EXCHANGE_SLIPPAGE_BPS,
+    EXCHANGE_TICK_SIZE, EXCHANGE_DEPTH, EXCHANGE_LEVEL_SIZE
+)
+
+_STOP = object()
+
+
+@dataclass
+class Order:
+    """Order submitted to the simulated exchange (price=None for market orders)."""
+    order_id: int
+    side: str
+    quantity: int
+    ticker: str
+    price: Optional[float] = None
+    submitted_at: float = field(default_factory=time.perf_counter)
+    remaining: int = 0
+
+    def __post_init__(self):
+        self.remaining = self.quantity
+
+
+@dataclass
+class Fill:
+    order_id: int
+    price: float
+    quantity: int
+
+
+@dataclass
+class ExecutionReport:
+    """Outcome of an order, delivered asynchronously through a Future."""
+    order_id: int
+    status: str  # 'FILLED', 'PARTIAL', 'RESTING' or 'REJECTED'
+    fills: List[Fill]
+    submitted_at: float
+    reported_at: float
+
+    @property
+    def filled_quantity(self) -> int:
+        return sum(fill.quantity for fill in self.fills)
+
+    @property
+    def average_price(self) -> float:
+        filled = self.filled_quantity
+        return sum(f.price * f.quantity for f in self.fills) / filled if filled else 0.0
+
+    @property
+    def latency_ms(self) -> float:
+        return (self.reported_at - self.submitted_at) * 1000
+
+
+class OrderBook:
+    """Limit order book with price-time priority for one ticker."""
+
+    def __init__(self):
+        self._bids: list = []  # (-price, seq, order)
+        self._asks: list = []  # (price, seq, order)
+        self._seq = itertools.count()
+        self.last_price: Optional[float] = None
+
+    def best_bid(self) -> Optional[float]:
+        return -self._bids[0][0] if self._bids else None
+
+    def best_ask(self) -> Optional[float]:
+        return self._asks[0][0] if self._asks else None
+
+    def depth(self, side: str) -> int:
+        """Total resting quantity on one side ('BUY' for bids, 'SELL' for asks)."""
+        levels = self._bids if side == "BUY" else self._asks
+        return sum(entry[2].remaining for entry in levels)
+
+    def add(self, order: Order) -> None:
+        """Rest a limit order on the book."""
+        if order.side == "BUY":
+            heapq.heappush(self._bids, (-order.price, next(self._seq), order))
+        else:
+            heapq.heappush(self._asks, (order.price, next(self._seq), order))
+
+    def match(self, order: Order) -> List[Fill]:
+        """
+        Match an incoming order against the opposite side of the book.
+
+        Limit orders rest any unfilled remainder; market orders do not.
+
+        Returns:
+            List[Fill]: Fills for the incoming order, one per resting order hit
+        """
+        fills = []
+        book = self._asks if order.side == "BUY" else self._bids
+        while order.remaining and book:
+            key, _, resting = book[0]
+            level_price = key if order.side == "BUY" else -key
+            if order.price is not None and (
+                (order.side == "BUY" and level_price > order.price)
+                or (order.side == "SELL" and level_price < order.price)
+            ):
+                break
+            quantity = min(order.remaining, resting.remaining)
+            order.remaining -= quantity
+            resting.remaining -= quantity
+            fills.append(Fill(order.order_id, level_price, quantity))
+            self.last_price = level_price
+            if resting.remaining == 0:
+                heapq.heappop(book)
+
+        if order.remaining and order.price is not None:
+            self.add(order)
+        return fills
+
+
+class SimulatedExchange:
+    """
+    In-process exchange with latency, slippage and asynchronous fills.
+
+    submit() returns a Future immediately. A matching thread releases each
+    order once its simulated network latency has elapsed, matches it
+    against the ticker's order book and resolves the Future with an
+    ExecutionReport. Synthetic market-maker liquidity is kept around the
+    last traded price so market orders can always be tested.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = EXCHANGE_LATENCY_MS,
+        jitter_ms: float = EXCHANGE_JITTER_MS,
+        slippage_bps: float = EXCHANGE_SLIPPAGE_BPS,
+        reference_prices: Optional[Dict[str, float]] = None,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.slippage_bps = slippage_bps
+        self.reference_prices = dict(reference_prices or {})
+        self.books: Dict[str, OrderBook] = {}
+        self._ids = itertools.count(1)
+        self._random = random.Random(seed)
+        self._inbound: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._closed = False
+        self._lock = threading.Lock()  # Orders are never queued behind the stop marker
+        self._thread = threading.Thread(target=self._run, name="exchange-matching", daemon=True)
+        self._thread.start()
+
+    def submit(self, side: str, quantity: int, ticker: str = TICKER, price: Optional[float] = None) -> Future:
+        """
+        Submit an order without waiting for it to be processed.
+
+        Args:
+            side (str): 'BUY' or 'SELL'
+            quantity (int): Number of shares
+            ticker (str): Ticker symbol
+            price (float): Limit price, or None for a market order
+
+        Returns:
+            Future: Resolves to an ExecutionReport; its `order_id` attribute
+            is set immediately. After close() it fails at once with
+            RuntimeError.
+        """
+        if side not in ("BUY", "SELL"):
+            raise ValueError(f"Invalid order type: {side}")
+        if quantity < 1:
+            raise ValueError(f"Invalid quantity: {quantity}")
+        order = Order(next(self._ids), side, quantity, ticker, price)
+        future: Future = Future()
+        future.order_id = order.order_id
+        delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        with self._lock:
+            if self._closed:
+                future.set_exception(RuntimeError("Exchange is closed"))
+            else:
+                self._inbound.put((order.submitted_at + delay, order, future))
+        return future
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Stop the matching thread after pending orders are processed."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._inbound.put(_STOP)
+        self._thread.join(timeout)
+
+    def _book(self, ticker: str) -> OrderBook:
+        book = self.books.get(ticker)
+        if book is None:
+            book = self.books[ticker] = OrderBook()
+            book.last_price = self.reference_prices.get(ticker, 100.0)
+        return book
+
+    def _replenish(self, book: OrderBook, ticker: str) -> None:
+        """
+        Keep EXCHANGE_DEPTH levels of market-maker quotes on both sides.
+
+        Quotes are placed around the last traded price but never cross the
+        other side: a limit order left resting by a sweep (e.g. an ask
+        below the last fill) moves the new bids below it, since add() does
+        not match.
+        """
+        mid = book.last_price
+        for side, sign in (("BUY", -1), ("SELL", 1)):
+            if book.depth(side) >= EXCHANGE_DEPTH * EXCHANGE_LEVEL_SIZE // 2:
+                continue
+            anchor = mid
+            if side == "BUY" and book.best_ask() is not None:
+                anchor = min(mid, book.best_ask())
+            elif side == "SELL" and book.best_bid() is not None:
+                anchor = max(mid, book.best_bid())
+            for level in range(1, EXCHANGE_DEPTH + 1):
+                price = round(anchor + sign * level * EXCHANGE_TICK_SIZE, 2)
+                book.add(Order(0, side, EXCHANGE_LEVEL_SIZE, ticker, price))
+
+    def _execute(self, order: Order, future: Future) -> None:
+        book = self._book(order.ticker)
+        self._replenish(book, order.ticker)
+        fills = book.match(order)
+
+        if order.price is None:
+            # Market orders pay slippage on top of the book price
+            factor = 1 + (self.slippage_bps / 10000) * (1 if order.side == "BUY" else -1)
+            for fill in fills:
+                fill.price = round(fill.price * factor, 4)
+
+        if order.remaining == 0:
+            status = "FILLED"
+        elif fills:
+            status = "PARTIAL"
+        elif order.price is not None:
+            status = "RESTING"
+        else:
+            status = "REJECTED"
+        future.set_result(ExecutionReport(
+            order.order_id, status, fills, order.submitted_at, time.perf_counter()
+        ))
+
+    def _run(self) -> None:
+        pending: list = []  # (due, order_id, order, future)
+        stopping = False
+        while not (stopping and not pending):
+            timeout = None
+            if pending:
+                timeout = max(0.0, pending[0][0] - time.perf_counter())
+            try:
+                item = self._inbound.get(timeout=timeout) if not stopping else None
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                due, order, future = item
+                heapq.heappush(pending, (due, order.order_id, order, future))
+
+            now = time.perf_counter()
+            while pending and pending[0][0] <= now:
+                _, _, order, future = heapq.heappop(pending)
+                try:
+                    self._execute(order, future)
+                except Exception as e:
+                    future.set_exception(e)
+            if stopping and pending:
+                time.sleep(max(0.0, pending[0][0] - time.perf_counter()))
+
+
+def run_load(
+    exchange: SimulatedExchange,
+    num_orders: int = 10000,
+    rate: Optional[float] = None,
+    ticker: str = TICKER,
+    quantity: int = 10
+) -> Dict[str, float]:
+    """
+    Drive the exchange with alternating market orders and measure round trips.
+
+    Args:
+        exchange (SimulatedExchange): Exchange under test
+        num_orders (int): Orders to submit
+        rate (float): Target orders/sec (None submits as fast as possible)
+        ticker (str): Ticker symbol
+        quantity (int): Shares per order
+
+    Returns:
+        dict: Orders/sec and p50/p99/max round-trip latency in milliseconds
+    """
+    futures = []
+    start = time.perf_counter()
+    for i in range(num_orders):
+        if rate:
+            # Pace submissions against the schedule rather than sleeping per order
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        futures.append(exchange.submit("BUY" if i % 2 == 0 else "SELL", quantity, ticker))
+    reports = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([report.latency_ms for report in reports])
+    return {
+        "orders": num_orders,
+        "orders_per_sec": num_orders / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "filled": sum(report.status == "FILLED" for report in reports),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Order-path load test against the simulated exchange")
+    parser.add_argument("--orders", type=int, default=10000, help="Orders to submit")
+    parser.add_argument("--rate", type=float, default=None, help="Target orders/sec")
+    parser.add_argument("--latency-ms", type=float, default=EXCHANGE_LATENCY_MS, help="One-way latency")
+    parser.add_argument("--jitter-ms", type=float, default=EXCHANGE_JITTER_MS, help="Latency jitter")
+    parser.add_argument("--slippage-bps", type=float, default=EXCHANGE_SLIPPAGE_BPS, help="Market order slippage")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Fail if p99 latency exceeds this")
+    args = parser.parse_args(argv)
+
+    exchange = SimulatedExchange(args.latency_ms, args.jitter_ms, args.slippage_bps, seed=0)
+    try:
+        stats = run_load(exchange, args.orders, args.rate)
+    finally:
+        exchange.close()
+
+    print(f"Orders: {stats['orders']} ({stats['filled']} filled)")
+    print(f"Throughput: {stats['orders_per_sec']:,.0f} orders/sec")
+    print(f"Round trip: p50 {stats['p50_ms']:.3f}ms | p99 {stats['p99_ms']:.3f}ms | max {stats['max_ms']:.3f}ms")
+    if args.max_p99_ms is not None and stats["p99_ms"] > args.max_p99_ms:
+        print(f"p99 latency above {args.max_p99_ms}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
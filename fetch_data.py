@@ -1,37 +1,79 @@
-import yfinance as yf
 import pandas as pd
 from typing import Optional
-from config import TICKER, LOOKBACK_DAYS, INTERVAL
+from config import TICKER, LOOKBACK_DAYS, INTERVAL, OFFLINE_MODE
+from bar_cache import load_bars, save_bars, merge_bars, covers_period, trim_to_period
+
+REQUIRED_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _download(ticker: str, interval: str, **kwargs) -> Optional[pd.DataFrame]:
+    """Download bars from Yahoo Finance and validate the columns."""
+    import yfinance as yf  # Deferred: slow to import and unused in offline mode
+
+    df = yf.download(ticker, interval=interval, progress=False, **kwargs)
+    if df is None or df.empty:
+        return None
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise ValueError("Missing required columns in data")
+    return df
+
 
 def fetch_stock_data(
     ticker: str = TICKER,
     period: str = f"{LOOKBACK_DAYS}d",
-    interval: str = INTERVAL
+    interval: str = INTERVAL,
+    offline: bool = OFFLINE_MODE
 ) -> Optional[pd.DataFrame]:
     """
     Fetch stock data from Yahoo Finance.
-    
+
+    Bars are kept in a local cache keyed by ticker and interval. When the
+    cache already covers the requested period, only bars after the last
+    cached timestamp are downloaded; otherwise the whole period is. In
+    offline mode the cache is served without any network access.
+
     Args:
         ticker (str): Stock ticker symbol
         period (str): Time period to fetch
         interval (str): Data interval
-        
+        offline (bool): Serve from the local cache only
+
     Returns:
         Optional[pd.DataFrame]: DataFrame with stock data or None if error
     """
     try:
+        cached = load_bars(ticker, interval)
+
+        if offline:
+            if cached is None or cached.empty:
+                print(f"Warning: No cached data for {ticker} ({interval}) in offline mode")
+                return None
+            df = trim_to_period(cached, period)
+            print(f"Loaded {len(df)} rows of cached data for {ticker}")
+            return df
+
         print(f"Fetching stock data for {ticker}...")
-        df = yf.download(ticker, period=period, interval=interval, progress=False)
-        
-        if df.empty:
+        try:
+            if covers_period(cached, period):
+                # Refetch from the last cached bar, which may have been incomplete
+                new = _download(ticker, interval, start=cached.index[-1])
+            else:
+                new = _download(ticker, interval, period=period)
+        except Exception as e:
+            if cached is None or cached.empty:
+                raise
+            print(f"Error fetching new bars, using cached data: {str(e)}")
+            new = None
+
+        df = merge_bars(cached, new)
+        if df is None or df.empty:
             print(f"Warning: No data found for {ticker}")
             return None
-            
-        # Ensure all required columns exist
-        required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-        if not all(col in df.columns for col in required_columns):
-            raise ValueError("Missing required columns in data")
-            
+
+        if new is not None:
+            save_bars(df, ticker, interval)
+
+        df = trim_to_period(df, period)
         print(f"Successfully fetched {len(df)} rows of data")
         return df
 
@@ -1,5 +1,7 @@
+import math
+import numpy as np
 import pandas as pd
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 def calculate_moving_averages(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -28,3 +30,510 @@ def calculate_moving_averages(df: pd.DataFrame) -> pd.DataFrame:
     except Exception as e:
         print(f"Error calculating moving averages: {str(e)}")
         return df
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Simple Moving Average of an array, identical to calculate_moving_averages.
+
+    Args:
+        values (np.ndarray): Prices (e.g. a barstore.Bars column)
+        window (int): Number of bars averaged
+
+    Returns:
+        np.ndarray: float64 averages, using fewer bars at the start
+    """
+    return pd.Series(np.asarray(values, dtype=np.float64)).rolling(window=window, min_periods=1).mean().to_numpy()
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling mean over each column's own bars (a 1-D array is one column).
+
+    NaNs (bars a ticker did not trade) are skipped, so each value averages
+    the column's last `window` valid prices, matching
+    series.dropna().rolling(window).mean(). Values are NaN until a column
+    has `window` prices and on its NaN rows, so time x path and time x
+    ticker matrices need no per-column loop. Sums are taken relative to
+    each column's first price so long histories keep their precision.
+
+    Args:
+        values (np.ndarray): Time x column prices, or one price series
+        window (int): Number of prices averaged
+
+    Returns:
+        np.ndarray: float64 averages with the shape of `values`
+    """
+    values = np.asarray(values, dtype=np.float64)
+    matrix = values[:, None] if values.ndim == 1 else values
+    valid = ~np.isnan(matrix)
+    first = matrix[valid.argmax(axis=0), np.arange(matrix.shape[1])] if len(matrix) else np.zeros(matrix.shape[1])
+    shifted = np.where(valid, matrix - np.nan_to_num(first), 0.0)
+    # Move each column's valid prices to the top, so sums can be looked up by count
+    order = np.argsort(~valid, axis=0, kind="stable")
+    zeros = np.zeros((1, matrix.shape[1]))
+    csum = np.concatenate((zeros, np.cumsum(np.take_along_axis(shifted, order, axis=0), axis=0)))
+    count = np.cumsum(valid, axis=0)
+    total = np.take_along_axis(csum, count, axis=0) - np.take_along_axis(csum, np.maximum(count - window, 0), axis=0)
+    return np.where(valid & (count >= window), total / window + first, np.nan).reshape(values.shape)
+
+
+class StreamingSMA:
+    """
+    Simple Moving Average updated in O(1) per bar.
+
+    Keeps the last `window` values in a ring buffer together with the
+    running sum. The arithmetic replicates pandas'
+    rolling(window, min_periods=1).mean() (Kahan-compensated add/remove),
+    so values are bit-identical to recomputing over the same series.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._buffer = [0.0] * window
+        self._head = 0  # Index of the oldest value once the buffer is full
+        self._count = 0
+        self._nobs = 0
+        self._sum = 0.0
+        self._neg_ct = 0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._same_ct = 0
+        self._prev = None
+
+    def _advance(self, value: float) -> tuple:
+        """Compute the state after appending `value` without mutating."""
+        nobs, sum_x, neg_ct = self._nobs, self._sum, self._neg_ct
+        comp_add, comp_remove = self._comp_add, self._comp_remove
+        same_ct, prev = self._same_ct, self._prev
+
+        if self._count == self.window:
+            old = self._buffer[self._head]
+            if old == old:
+                nobs -= 1
+                y = -old - comp_remove
+                t = sum_x + y
+                comp_remove = t - sum_x - y
+                sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    neg_ct -= 1
+
+        if prev is None:
+            prev = value
+        if value == value:
+            nobs += 1
+            y = value - comp_add
+            t = sum_x + y
+            comp_add = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, value) < 0:
+                neg_ct += 1
+            same_ct = same_ct + 1 if value == prev else 1
+            prev = value
+
+        return nobs, sum_x, neg_ct, comp_add, comp_remove, same_ct, prev
+
+    @staticmethod
+    def _mean(nobs: int, sum_x: float, neg_ct: int, same_ct: int, prev: float) -> float:
+        if nobs == 0:
+            return float("nan")
+        result = sum_x / nobs
+        if same_ct >= nobs:
+            result = prev
+        elif neg_ct == 0 and result < 0:
+            result = 0.0
+        elif neg_ct == nobs and result > 0:
+            result = 0.0
+        return result
+
+    @property
+    def value(self) -> float:
+        """Current moving average (NaN before any valid value)."""
+        return self._mean(self._nobs, self._sum, self._neg_ct, self._same_ct, self._prev)
+
+    def update(self, value: float) -> float:
+        """
+        Append a completed bar and return the new moving average.
+
+        Args:
+            value (float): Close price of the new bar
+
+        Returns:
+            float: Moving average including the new bar
+        """
+        value = float(value)
+        (self._nobs, self._sum, self._neg_ct, self._comp_add,
+         self._comp_remove, self._same_ct, self._prev) = self._advance(value)
+
+        if self._count == self.window:
+            self._buffer[self._head] = value
+            self._head = (self._head + 1) % self.window
+        else:
+            self._buffer[self._count] = value
+            self._count += 1
+        return self.value
+
+    def peek(self, value: float) -> float:
+        """Return the moving average if `value` were appended, without storing it."""
+        nobs, sum_x, neg_ct, _, _, same_ct, prev = self._advance(float(value))
+        return self._mean(nobs, sum_x, neg_ct, same_ct, prev)
+
+
+class StreamingIndicators:
+    """
+    Stateful SMA_10 / SMA_50 for the live loop.
+
+    The first call to advance() seeds the averages from the full history;
+    later calls only process bars newer than the last one seen. The most
+    recent bar may still be forming, so it is evaluated with peek() and
+    only committed once a newer bar arrives.
+    """
+
+    def __init__(self, windows: Sequence[int] = (10, 50)):
+        self.smas = {f"SMA_{w}": StreamingSMA(w) for w in windows}
+        self.last_timestamp = None
+        self._last_close = None
+
+    def advance(self, df: pd.DataFrame) -> Dict[str, float]:
+        """
+        Consume new bars from a freshly fetched DataFrame.
+
+        Args:
+            df (pd.DataFrame): DataFrame with 'Close' price column
+
+        Returns:
+            Dict[str, float]: Latest 'Close' and SMA values
+        """
+        if df.empty:
+            raise ValueError("Empty DataFrame provided")
+        if "Close" not in df.columns:
+            raise KeyError("DataFrame missing 'Close' column")
+
+        start = 0
+        if self.last_timestamp is not None:
+            start = df.index.searchsorted(self.last_timestamp, side="right")
+        close = np.asarray(df["Close"].iloc[start:], dtype=np.float64).reshape(-1)
+
+        if len(close) == 0:
+            # No bar newer than the last committed one
+            latest = {"Close": self._last_close}
+            latest.update({name: sma.value for name, sma in self.smas.items()})
+            return latest
+
+        for i in range(len(close) - 1):
+            for sma in self.smas.values():
+                sma.update(close[i])
+        if len(close) > 1:
+            self.last_timestamp = df.index[start + len(close) - 2]
+            self._last_close = close[-2]
+
+        latest = {"Close": float(close[-1])}
+        latest.update({name: sma.peek(close[-1]) for name, sma in self.smas.items()})
+        return latest
+
+
+def _ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Exponential moving average, identical to pandas ewm(alpha=alpha, adjust=False).mean().
+
+    Leading NaNs stay NaN and the average starts at the first valid value;
+    later values must not be NaN (see _ffill).
+    """
+    from scipy.signal import lfilter  # Deferred: only needed for EMA-based indicators
+
+    out = np.full(len(values), np.nan)
+    first = int(np.isnan(values).argmin()) if len(values) else 0
+    if first < len(values) and not np.isnan(values[first]):
+        out[first:], _ = lfilter([alpha], [1.0, alpha - 1.0], values[first:], zi=[(1.0 - alpha) * values[first]])
+    return out
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs so recursive indicators do not propagate them."""
+    mask = np.isnan(values)
+    if not mask.any():
+        return values
+    positions = np.where(mask, 0, np.arange(len(values)))
+    np.maximum.accumulate(positions, out=positions)
+    return values[positions]
+
+
+def parse_indicator(name: str) -> Tuple[str, tuple]:
+    """
+    Parse an indicator declaration such as 'SMA_10', 'EMA_20', 'RSI_14',
+    'MACD_12_26_9', 'BB_20_2' or 'ATR_14'.
+
+    Returns:
+        tuple: (kind, parameters)
+    """
+    kind, *params = name.split("_")
+    arity = {"SMA": 1, "EMA": 1, "RSI": 1, "ATR": 1, "MACD": 3, "BB": 2}
+    if kind not in arity or len(params) != arity[kind]:
+        raise ValueError(f"Unknown indicator: {name}")
+    try:
+        values = tuple(float(p) if kind == "BB" and i == 1 else int(p) for i, p in enumerate(params))
+    except ValueError:
+        raise ValueError(f"Invalid parameters for indicator: {name}")
+    if any(v <= 0 for v in values):
+        raise ValueError(f"Invalid parameters for indicator: {name}")
+    return kind, values
+
+
+def indicator_outputs(name: str) -> List[str]:
+    """Output keys produced by an indicator declaration."""
+    kind, _ = parse_indicator(name)
+    if kind == "MACD":
+        return [name, f"{name}_signal", f"{name}_hist"]
+    if kind == "BB":
+        return [f"{name}_upper", f"{name}_mid", f"{name}_lower"]
+    return [name]
+
+
+class IndicatorEngine:
+    """
+    Compute a declared set of indicators in one pass with shared intermediates.
+
+    Batch mode (compute) reads the OHLC arrays once: every SMA and
+    Bollinger band shares one cumulative sum (and sum of squares) of the
+    close, RSIs share the close deltas, ATRs share the true range and
+    MACDs reuse EMAs of the same span. Streaming mode (prime, then update
+    per bar) carries the same state forward in O(1) per bar. SMAs match
+    calculate_moving_averages (min_periods=1); EMAs, RSI (Wilder), MACD
+    and ATR (Wilder) follow pandas ewm(adjust=False); Bollinger bands use
+    the population standard deviation over the same window as their SMA.
+
+    Args:
+        indicators: Declarations, e.g. ["SMA_10", "RSI_14", "MACD_12_26_9"]
+        dtype: Output dtype (np.float32 halves memory; intermediates stay float64)
+    """
+
+    def __init__(self, indicators: Sequence[str], dtype=np.float64):
+        self.indicators = list(indicators)
+        self.specs = [(name, *parse_indicator(name)) for name in self.indicators]
+        self.dtype = np.dtype(dtype)
+        self.outputs = [key for name in self.indicators for key in indicator_outputs(name)]
+
+        self._windows = sorted({p[0] for _, kind, p in self.specs if kind in ("SMA", "BB")})
+        self._ema_spans = sorted({p[0] for _, kind, p in self.specs if kind == "EMA"}
+                                 | {s for _, kind, p in self.specs if kind == "MACD" for s in p[:2]})
+        self._rsi = sorted({p[0] for _, kind, p in self.specs if kind == "RSI"})
+        self._atr = sorted({p[0] for _, kind, p in self.specs if kind == "ATR"})
+        self._state: Optional[dict] = None
+
+    def compute(self, data) -> Dict[str, np.ndarray]:
+        """
+        Batch mode: compute every declared indicator over the full arrays.
+
+        Args:
+            data: DataFrame or barstore.Bars with 'Close' (and 'High'/'Low' for ATR)
+
+        Returns:
+            Dict[str, np.ndarray]: One array per output key
+        """
+        outputs, _ = self._compute(data)
+        return outputs
+
+    def _compute(self, data) -> Tuple[Dict[str, np.ndarray], dict]:
+        close = np.asarray(data["Close"], dtype=np.float64).reshape(-1)
+        n = len(close)
+        valid = ~np.isnan(close)
+        filled = _ffill(close)
+        # Sums are taken relative to the first price to limit cancellation
+        reference = filled[valid.argmax()] if valid.any() else 0.0
+        shifted = np.where(valid, close - reference, 0.0)
+        positions = np.arange(1, n + 1)
+
+        csum = np.concatenate(([0.0], np.cumsum(shifted)))
+        csq = np.concatenate(([0.0], np.cumsum(shifted * shifted))) if any(
+            kind == "BB" for _, kind, _ in self.specs) else None
+        ccount = np.concatenate(([0], np.cumsum(valid)))
+
+        means, variances = {}, {}
+        for window in self._windows:
+            start = np.maximum(positions - window, 0)
+            count = ccount[positions] - ccount[start]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = (csum[positions] - csum[start]) / count
+                if csq is not None:
+                    variances[window] = np.maximum((csq[positions] - csq[start]) / count - mean * mean, 0.0)
+            means[window] = mean + reference
+
+        emas = {span: _ewm(filled, 2.0 / (span + 1)) for span in self._ema_spans}
+
+        rsi_state = {}
+        if self._rsi:
+            delta = np.diff(filled, prepend=filled[:1])
+            if valid.any():
+                delta[valid.argmax()] = 0.0  # The first close has no change, even after leading NaNs
+            gain, loss = np.maximum(delta, 0.0), np.maximum(-delta, 0.0)
+            for period in self._rsi:
+                avg_gain, avg_loss = _ewm(gain, 1.0 / period), _ewm(loss, 1.0 / period)
+                rsi_state[period] = (avg_gain, avg_loss)
+
+        atr_values = {}
+        if self._atr:
+            high = _ffill(np.asarray(data["High"], dtype=np.float64).reshape(-1))
+            low = _ffill(np.asarray(data["Low"], dtype=np.float64).reshape(-1))
+            previous = np.concatenate((filled[:1], filled[:-1]))
+            # fmax skips a missing previous close, leaving the high-low range
+            true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+            true_range[0] = high[0] - low[0]
+            atr_values = {period: _ewm(true_range, 1.0 / period) for period in self._atr}
+
+        outputs, signals = {}, {}
+        for name, kind, params in self.specs:
+            if kind == "SMA":
+                outputs[name] = means[params[0]]
+            elif kind == "EMA":
+                outputs[name] = emas[params[0]]
+            elif kind == "RSI":
+                outputs[name] = _rsi(*rsi_state[params[0]])
+            elif kind == "ATR":
+                outputs[name] = atr_values[params[0]]
+            elif kind == "MACD":
+                fast, slow, signal = params
+                line = emas[fast] - emas[slow]
+                signals[name] = _ewm(line, 2.0 / (signal + 1))
+                outputs[name] = line
+                outputs[f"{name}_signal"] = signals[name]
+                outputs[f"{name}_hist"] = line - signals[name]
+            elif kind == "BB":
+                window, width = params
+                std = np.sqrt(variances[window])
+                outputs[f"{name}_upper"] = means[window] + width * std
+                outputs[f"{name}_mid"] = means[window]
+                outputs[f"{name}_lower"] = means[window] - width * std
+
+        state = {
+            "close": close,
+            "emas": {span: values[-1] for span, values in emas.items()} if n else {},
+            "rsi": {p: (g[-1], l[-1]) for p, (g, l) in rsi_state.items()} if n else {},
+            "atr": {p: values[-1] for p, values in atr_values.items()} if n else {},
+            "signals": {name: values[-1] for name, values in signals.items()} if n else {},
+            "last_close": filled[-1] if n else None,
+        }
+        return {key: outputs[key].astype(self.dtype, copy=False) for key in self.outputs}, state
+
+    def prime(self, data) -> Dict[str, float]:
+        """
+        Streaming mode: initialise state from history with one batch pass.
+
+        Returns:
+            Dict[str, float]: Indicator values at the last bar
+        """
+        outputs, state = self._compute(data)
+        self._state = {
+            "smas": {w: StreamingSMA(w) for w in self._windows},
+            "sums": {},
+            "emas": dict(state["emas"]),
+            "rsi": dict(state["rsi"]),
+            "atr": dict(state["atr"]),
+            "signals": dict(state["signals"]),
+            "last_close": state["last_close"],
+        }
+        # Replay the tail of the history into the rolling windows
+        longest = max(self._windows, default=0)
+        tail = state["close"][-longest:] if longest else state["close"][:0]
+        for value in tail:
+            for sma in self._state["smas"].values():
+                sma.update(value)
+        for window in self._windows:
+            values = tail[-window:]
+            values = values[~np.isnan(values)]
+            ring = np.full(window, np.nan)
+            ring[window - len(tail[-window:]):] = tail[-window:]
+            self._state["sums"][window] = [ring, 0, float(np.sum(values * values))]
+        return {key: float(values[-1]) for key, values in outputs.items() if len(values)}
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        """
+        Streaming mode: consume one completed bar in O(1) per indicator.
+
+        Returns:
+            Dict[str, float]: Indicator values including the new bar
+        """
+        if self._state is None:
+            raise RuntimeError("Call prime() before update()")
+        state = self._state
+        raw = float(close)
+        previous = state["last_close"]
+        # Rolling windows skip missing closes; recursive indicators carry the last one
+        if close != close and previous is not None:
+            close = previous
+        if previous is None:
+            previous = close
+
+        means, variances = {}, {}
+        for window, sma in state["smas"].items():
+            means[window] = sma.update(raw)
+            ring, head, sum_sq = state["sums"][window]
+            old = ring[head]
+            sum_sq += (raw * raw if raw == raw else 0.0) - (old * old if old == old else 0.0)
+            ring[head] = raw
+            state["sums"][window] = [ring, (head + 1) % window, sum_sq]
+            count = sma._nobs
+            variances[window] = max(sum_sq / count - means[window] ** 2, 0.0) if count else float("nan")
+
+        emas = state["emas"]
+        for span in emas:
+            alpha = 2.0 / (span + 1)
+            emas[span] = alpha * close + (1 - alpha) * emas[span]
+
+        delta = close - previous
+        for period, (avg_gain, avg_loss) in state["rsi"].items():
+            alpha = 1.0 / period
+            state["rsi"][period] = (alpha * max(delta, 0.0) + (1 - alpha) * avg_gain,
+                                    alpha * max(-delta, 0.0) + (1 - alpha) * avg_loss)
+
+        true_range = max(high - low, abs(high - previous), abs(low - previous))
+        for period, atr in state["atr"].items():
+            state["atr"][period] = (true_range + (period - 1) * atr) / period
+        state["last_close"] = close
+
+        latest = {}
+        for name, kind, params in self.specs:
+            if kind == "SMA":
+                latest[name] = means[params[0]]
+            elif kind == "EMA":
+                latest[name] = emas[params[0]]
+            elif kind == "RSI":
+                latest[name] = float(_rsi(*(np.array([v]) for v in state["rsi"][params[0]]))[0])
+            elif kind == "ATR":
+                latest[name] = state["atr"][params[0]]
+            elif kind == "MACD":
+                fast, slow, signal = params
+                line = emas[fast] - emas[slow]
+                alpha = 2.0 / (signal + 1)
+                state["signals"][name] = alpha * line + (1 - alpha) * state["signals"][name]
+                latest[name] = line
+                latest[f"{name}_signal"] = state["signals"][name]
+                latest[f"{name}_hist"] = line - state["signals"][name]
+            elif kind == "BB":
+                window, width = params
+                std = math.sqrt(variances[window])
+                latest[f"{name}_upper"] = means[window] + width * std
+                latest[f"{name}_mid"] = means[window]
+                latest[f"{name}_lower"] = means[window] - width * std
+        return latest
+
+
+def _rsi(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    """Relative Strength Index from Wilder-smoothed gains and losses (100 when there are no losses)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+
+
+def compute_indicators(data, indicators: Sequence[str], dtype=np.float64) -> Dict[str, np.ndarray]:
+    """
+    Compute several indicators in one pass (see IndicatorEngine).
+
+    Args:
+        data: DataFrame or barstore.Bars with OHLC columns
+        indicators: Declarations, e.g. ["SMA_10", "EMA_20", "RSI_14", "BB_20_2", "ATR_14"]
+        dtype: Output dtype (np.float64 or np.float32)
+
+    Returns:
+        Dict[str, np.ndarray]: One array per output key
+    """
+    return IndicatorEngine(indicators, dtype).compute(data)
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import queue
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+from config import (
+    JOURNAL_PATH, JOURNAL_FSYNC, JOURNAL_BATCH_SIZE,
+    JOURNAL_FLUSH_INTERVAL, JOURNAL_SHUTDOWN_TIMEOUT
+)
+
+_STOP = object()
+
+
+def _json_default(value):
+    """Serialize numpy scalars and arrays (e.g. fields from the backtest engine)."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class TradeJournal:
+    """
+    Append-only JSONL trade journal written by a dedicated thread.
+
+    record() only enqueues the entry, so callers never wait on file I/O.
+    The writer thread drains the queue in batches and flushes at least
+    every `flush_interval` seconds; with `fsync=True` every record is
+    flushed and fsynced before the next one is written.
+    """
+
+    def __init__(
+        self,
+        path: str = JOURNAL_PATH,
+        fsync: bool = JOURNAL_FSYNC,
+        batch_size: int = JOURNAL_BATCH_SIZE,
+        flush_interval: float = JOURNAL_FLUSH_INTERVAL
+    ):
+        self.path = path
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.records_written = 0
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+        self._thread.start()
+
+    def record(self, **fields) -> None:
+        """
+        Enqueue a journal record.
+
+        Fields are serialized here, so a value JSON cannot represent raises
+        TypeError in the caller instead of failing on the writer thread.
+        A 'timestamp' (epoch seconds) is added; it is formatted on the
+        writer thread.
+        """
+        if self._closed:
+            raise RuntimeError("Trade journal is closed")
+        timestamp = fields.pop("timestamp") if "timestamp" in fields else time.time()
+        self._queue.put((timestamp, json.dumps(fields, default=_json_default)))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every record enqueued so far is written and flushed.
+
+        Returns immediately once the journal is closed, since the writer
+        thread no longer serves flush requests.
+
+        Returns:
+            bool: True if the flush completed within `timeout`
+        """
+        if self._closed:
+            return not self._thread.is_alive()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = JOURNAL_SHUTDOWN_TIMEOUT) -> bool:
+        """
+        Drain the queue and stop the writer thread.
+
+        Returns:
+            bool: True if all records were written within `timeout`
+        """
+        if self._closed:
+            return not self._thread.is_alive()
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _write(self, records: List[Tuple[float, str]]) -> None:
+        for timestamp, payload in records:
+            try:
+                stamp = json.dumps(datetime.fromtimestamp(timestamp).isoformat(timespec="microseconds"))
+                # Prepend the timestamp to the serialized fields ("{}" when there are none)
+                fields = f", {payload[1:]}" if payload != "{}" else "}"
+                self._file.write(f'{{"timestamp": {stamp}{fields}\n')
+                if self.fsync:
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                self.records_written += 1
+            except Exception as e:
+                # One failing record does not drop the rest of the batch
+                print(f"Error writing trade journal record: {str(e)}")
+
+    def _run(self) -> None:
+        pending: List[Tuple[float, str]] = []
+        last_flush = time.monotonic()
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            waiters = []
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    pending.append(item)
+                if stopping or len(pending) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            try:
+                if pending:
+                    self._write(pending)
+                if waiters or stopping or time.monotonic() - last_flush >= self.flush_interval:
+                    self._file.flush()
+                    last_flush = time.monotonic()
+            except Exception as e:
+                print(f"Error writing trade journal: {str(e)}")
+            pending = []
+            for waiter in waiters:
+                waiter.set()
+
+        self._file.close()
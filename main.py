@@ -1,11 +1,9 @@
 import time
 import logging
-import pandas as pd
-from fetch_data import fetch_stock_data
-from indicators import calculate_moving_averages
-from sentiment import get_news_sentiment
-from strategy import trading_signal
-from broker import place_trade
+import argparse
+from config import (
+    TICKER, INTERVAL, WATCHLIST, SENTIMENT_REFRESH_SECONDS, METRICS_HOST, METRICS_PORT, METRICS_TEXTFILE
+)
 
 # Setup logging to track trades & errors
 logging.basicConfig(
@@ -14,51 +12,194 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+def start_metrics():
+    """Expose stage timings and cache counters on METRICS_PORT, if configured."""
+    from metrics import metrics
+    from sentiment import sentiment_cache
+
+    for stat, value in (("query_hits", "hit"), ("query_misses", "miss"),
+                        ("article_hits", "hit"), ("article_misses", "miss")):
+        cache = "sentiment_" + stat.split("_")[0]
+        metrics.counter_callback("cache_requests_total", lambda stat=stat: sentiment_cache.stats[stat],
+                                 "Cache lookups by result", cache=cache, result=value)
+    if METRICS_PORT:
+        try:
+            metrics.serve(METRICS_PORT, METRICS_HOST)
+            print(f"Serving metrics on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        except OSError as e:
+            logging.warning(f"Could not start metrics endpoint: {str(e)}")
+
 def run_bot():
-    try:
-        while True:
-            print("\nFetching stock data...")
+    # Pipeline modules are imported here so `main.py --help` starts instantly
+    from fetch_data import fetch_stock_data
+    from indicators import StreamingIndicators
+    from sentiment import get_news_sentiment
+    from strategy import trading_signal
+    from broker import place_trade
+    from predictor import load_predictor
+    from scheduler import Scheduler
+    from metrics import metrics
+
+    indicators = StreamingIndicators()
+    predictor = load_predictor()  # Loaded once and kept warm, if a model was saved
+    scheduler = Scheduler()
+    state = {"sentiment": 0.0, "df": None, "latest": None}
+    start_metrics()
+
+    def refresh_sentiment(_):
+        with metrics.timed("sentiment"):
+            state["sentiment"] = float(get_news_sentiment())
+        return True
+
+    def refresh_data(bar_close):
+        print(f"\nFetching stock data for the bar closing at {bar_close:%H:%M}...")
+        with metrics.timed("fetch"):
             df = fetch_stock_data()
 
-            # Check if the DataFrame is empty
-            if df is None or df.empty:
-                print("Skipping this cycle due to empty stock data.")
-                logging.warning("No stock data fetched. Skipping cycle.")
-                time.sleep(60)
-                continue  # Skip this loop iteration
+        # Check if the DataFrame is empty
+        if df is None or df.empty:
+            print("Skipping this cycle due to empty stock data.")
+            logging.warning("No stock data fetched. Skipping cycle.")
+            metrics.counter("cycles_skipped_total", "Cycles skipped before a signal", reason="no_data").inc()
+            return False
 
-            df = calculate_moving_averages(df)
+        if not scheduler.bar_available(df.index[-1], bar_close):
+            print("Latest bar not published yet.")
+            metrics.counter("cycles_skipped_total", "Cycles skipped before a signal", reason="bar_late").inc()
+            return False  # Retried with backoff by the scheduler
 
-            # Extract latest values from DataFrame
-            latest_price = df["Close"].iloc[-1]
-            sma_10 = df["SMA_10"].iloc[-1]
-            sma_50 = df["SMA_50"].iloc[-1]
-            sentiment_score = get_news_sentiment()
+        # Update indicators with the bars added since the last cycle
+        with metrics.timed("indicators"):
+            state["df"] = df
+            state["latest"] = indicators.advance(df)
+        return True
 
-            # Convert Series to scalar values (if necessary)
-            if isinstance(latest_price, pd.Series):
-                latest_price = latest_price.iloc[-1].item()
-            if isinstance(sma_10, pd.Series):
-                sma_10 = sma_10.iloc[-1].item()
-            if isinstance(sma_50, pd.Series):
-                sma_50 = sma_50.iloc[-1].item()
+    def evaluate_signal(_):
+        latest = state["latest"]
+        latest_price = latest["Close"]
+        sma_10 = latest["SMA_10"]
+        sma_50 = latest["SMA_50"]
+        sentiment_score = state["sentiment"]
 
-            # Ensure sentiment is a float
-            sentiment_score = float(sentiment_score)
+        forecast = None
+        if predictor is not None:
+            with metrics.timed("forecast"):
+                forecast = predictor.predict({TICKER: state["df"]["Close"]})[TICKER]
 
-            # Debugging print
-            print(f"DEBUG: Price={latest_price}, SMA_10={sma_10}, SMA_50={sma_50}, Sentiment={sentiment_score}")
+        # Debugging print
+        print(f"DEBUG: Price={latest_price}, SMA_10={sma_10}, SMA_50={sma_50}, Sentiment={sentiment_score}, Forecast={forecast}")
 
-            # Determine trade action
+        # Determine trade action
+        with metrics.timed("signal"):
             decision = trading_signal(latest_price, sma_10, sma_50, sentiment_score)
-            print(f"Trading Signal: {decision} | Price: {latest_price:.2f}")
+        print(f"Trading Signal: {decision} | Price: {latest_price:.2f}")
 
-            # Execute trade if BUY/SELL signal is given
-            if decision in ["BUY", "SELL"]:
-                place_trade(decision, quantity=10)
+        # Execute trade if BUY/SELL signal is given
+        if decision in ["BUY", "SELL"]:
+            with metrics.timed("order"):
+                placed = place_trade(decision, quantity=10)
+            if placed:
                 logging.info(f"Trade executed: {decision} at {latest_price:.2f}")
+            else:
+                metrics.counter("errors_total", "Exceptions raised by run_bot stages", stage="order").inc()
+        metrics.counter("cycles_total", "Completed signal cycles").inc()
+        if METRICS_TEXTFILE:
+            metrics.write_textfile(METRICS_TEXTFILE)
+        return True
+
+    # Sentiment, data and signal stages each run on their own cadence
+    scheduler.add_job("sentiment", refresh_sentiment, every=SENTIMENT_REFRESH_SECONDS)
+    scheduler.add_job("data", refresh_data, on_bar=True, retry=True)
+    scheduler.add_job("signal", evaluate_signal, after="data")
+    print(f"Next bar check at {scheduler.next_wakeup('data'):%Y-%m-%d %H:%M:%S %Z}")
+
+    try:
+        scheduler.run()
+
+    except KeyboardInterrupt:
+        print("\nBot stopped manually. Exiting...")
+        logging.info("Bot stopped manually.")
+
+    except Exception as e:
+        logging.error(f"Unexpected error: {str(e)}")
+        print(f"Error occurred: {e}")
+
+def run_watchlist(tickers):
+    """
+    Evaluate every ticker in the watchlist after each bar close.
+
+    Tickers whose bar for the current close has not been published yet are
+    retried with the scheduler's backoff; tickers already evaluated for that
+    bar are not fetched or traded again on a retry.
+    """
+    from watchlist import fetch_watchlist, evaluate_watchlist
+    from broker import place_trade
+    from predictor import load_predictor
+    from scheduler import Scheduler, interval_to_timedelta
+    from metrics import metrics
+
+    predictor = load_predictor()  # Loaded once and kept warm, if a model was saved
+    scheduler = Scheduler()
+    # Cycles slower than one bar fall behind the schedule; only reported, not interrupted
+    slow_cycle_seconds = interval_to_timedelta(INTERVAL).total_seconds()
+    state = {"bar_close": None, "done": set()}
+    start_metrics()
+
+    def evaluate(bar_close):
+        cycle_start = time.monotonic()
+        if state["bar_close"] != bar_close:
+            state["bar_close"], state["done"] = bar_close, set()
+        pending = [ticker for ticker in tickers if ticker not in state["done"]]
+        print(f"\nFetching data for {len(pending)} tickers...")
+        with metrics.timed("fetch"):
+            frames, errors = fetch_watchlist(pending)
+        for ticker, error in errors.items():
+            print(f"Skipping {ticker}: {error}")
+            logging.warning(f"No stock data for {ticker}: {error}")
+            metrics.counter("tickers_skipped_total", "Tickers without data in a cycle", reason="no_data").inc()
+
+        late = [ticker for ticker, df in frames.items() if not scheduler.bar_available(df.index[-1], bar_close)]
+        for ticker in late:
+            del frames[ticker]
+            metrics.counter("tickers_skipped_total", "Tickers without data in a cycle", reason="bar_late").inc()
+        if late:
+            print(f"Latest bar not published yet for {', '.join(late)}.")
+        if not frames:
+            reason = "bar_late" if late else "no_data"
+            metrics.counter("cycles_skipped_total", "Cycles skipped before a signal", reason=reason).inc()
+            return False
 
-            time.sleep(60)  # Run every minute
+        with metrics.timed("signal"):
+            signals = evaluate_watchlist(frames)
+        if predictor is not None:
+            # One batched forward pass for the whole watchlist
+            with metrics.timed("forecast"):
+                forecasts = predictor.predict({t: f["Close"] for t, f in frames.items()})
+            signals["forecast"] = signals.index.map(forecasts)
+        print(signals.to_string(float_format="%.2f"))
+
+        with metrics.timed("order"):
+            for ticker, row in signals[signals["signal"] != "HOLD"].iterrows():
+                if place_trade(row["signal"], quantity=10, ticker=ticker):
+                    logging.info(f"Trade executed: {row['signal']} {ticker} at {row['price']:.2f}")
+                else:
+                    metrics.counter("errors_total", "Exceptions raised by run_bot stages", stage="order").inc()
+        state["done"].update(frames)
+
+        elapsed = time.monotonic() - cycle_start
+        if elapsed > slow_cycle_seconds:
+            logging.warning(f"Watchlist cycle took {elapsed:.1f}s (over {slow_cycle_seconds:.0f}s bar interval)")
+        print(f"Cycle completed in {elapsed:.1f}s")
+        metrics.counter("cycles_total", "Completed signal cycles").inc()
+        if METRICS_TEXTFILE:
+            metrics.write_textfile(METRICS_TEXTFILE)
+        return not late  # Late tickers are retried with backoff by the scheduler
+
+    scheduler.add_job("watchlist", evaluate, on_bar=True, retry=True)
+    print(f"Next bar check at {scheduler.next_wakeup('watchlist'):%Y-%m-%d %H:%M:%S %Z}")
+
+    try:
+        scheduler.run()
 
     except KeyboardInterrupt:
         print("\nBot stopped manually. Exiting...")
@@ -68,5 +209,18 @@ def run_bot():
         logging.error(f"Unexpected error: {str(e)}")
         print(f"Error occurred: {e}")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ibovespa trading bot")
+    parser.add_argument("--watchlist", action="store_true",
+                        help="Trade every ticker in config.WATCHLIST")
+    parser.add_argument("--tickers", nargs="+", default=None,
+                        help="Tickers to watch (implies --watchlist)")
+    args = parser.parse_args(argv)
+
+    if args.watchlist or args.tickers:
+        run_watchlist(args.tickers or WATCHLIST)
+    else:
+        run_bot()
+
 if __name__ == "__main__":
-    run_bot()
+    main()
@@ -0,0 +1,200 @@
+import os
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Sequence, Tuple
+from config import METRICS_PREFIX, METRICS_HOST
+
+# Seconds; spans from sub-millisecond indicator updates to slow downloads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two additions."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Return (cumulative bucket counts, sum, count)."""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total, count
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf if beyond the last bucket)."""
+        cumulative, _, count = self.snapshot()
+        if not count:
+            return float("nan")
+        index = bisect.bisect_left(cumulative, q * count)
+        return self.buckets[index] if index < len(self.buckets) else float("inf")
+
+
+class _Span:
+    """Context manager returned by MetricsRegistry.timed()."""
+    __slots__ = ("registry", "stage", "histogram", "start")
+
+    def __init__(self, registry: "MetricsRegistry", stage: str):
+        self.registry = registry
+        self.stage = stage
+        self.histogram = registry.histogram("stage_duration_seconds", "Duration of run_bot stages", stage=stage)
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.histogram.observe(time.perf_counter() - self.start)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.registry.counter("errors_total", "Exceptions raised by run_bot stages", stage=self.stage).inc()
+        return False
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms rendered in the Prometheus text format.
+
+    Metrics are created on first use and identified by name plus labels.
+    Callback counters read a value at render time, which exposes
+    statistics kept elsewhere (e.g. SentimentCache.stats) without
+    touching their hot path.
+    """
+
+    def __init__(self, prefix: str = METRICS_PREFIX):
+        self.prefix = prefix
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._metrics: Dict[str, Dict[Labels, object]] = {}
+        self._callbacks: Dict[str, Dict[Labels, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str, help_text: str, labels: Dict[str, str], factory):
+        key = tuple(sorted(labels.items()))
+        children = self._metrics.get(name)
+        if children is not None and key in children:
+            return children[key]
+        with self._lock:
+            self._help.setdefault(name, (kind, help_text))
+            children = self._metrics.setdefault(name, {})
+            return children.setdefault(key, factory())
+
+    def counter(self, name: str, help_text: str = "", **labels: str) -> Counter:
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def histogram(self, name: str, help_text: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS,
+                  **labels: str) -> Histogram:
+        return self._get("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+    def counter_callback(self, name: str, func: Callable[[], float], help_text: str = "", **labels: str) -> None:
+        with self._lock:
+            self._help.setdefault(name, ("counter", help_text))
+            self._callbacks.setdefault(name, {})[tuple(sorted(labels.items()))] = func
+
+    def timed(self, stage: str) -> "_Span":
+        """
+        Time a pipeline stage into the stage_duration_seconds histogram.
+
+        Use as `with metrics.timed("fetch"):`. Exceptions are counted in
+        errors_total for the stage and re-raised.
+        """
+        return _Span(self, stage)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            names = sorted(self._help)
+            metrics = {name: dict(self._metrics.get(name, {})) for name in names}
+            callbacks = {name: dict(self._callbacks.get(name, {})) for name in names}
+        for name in names:
+            kind, help_text = self._help[name]
+            full = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            for labels, metric in sorted(metrics[name].items()):
+                if isinstance(metric, Histogram):
+                    cumulative, total, count = metric.snapshot()
+                    bounds = [repr(float(b)) for b in metric.buckets] + ["+Inf"]
+                    for bound, value in zip(bounds, cumulative):
+                        le = 'le="' + bound + '"'
+                        lines.append(f"{full}_bucket{_format_labels(labels, le)} {value}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {total}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {count}")
+                else:
+                    lines.append(f"{full}{_format_labels(labels)} {metric.value}")
+            for labels, func in sorted(callbacks[name].items()):
+                lines.append(f"{full}{_format_labels(labels)} {float(func())}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically replace `path` with the current metrics (textfile collector format)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            file.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+        """Serve /metrics from a daemon thread. Returns the server (call shutdown() to stop)."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes would otherwise flood stderr
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+metrics = MetricsRegistry()
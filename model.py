@@ -1,48 +1,240 @@
+import os
+import pickle
 import numpy as np
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense
-from sklearn.preprocessing import MinMaxScaler
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple
+from config import LSTM_LOOKBACK, MODEL_DIR
 
-scaler = MinMaxScaler(feature_range=(0, 1))
+# TensorFlow and scikit-learn take seconds to import, so they are only
+# loaded when a function needing them is first called.
+if TYPE_CHECKING:
+    from sklearn.preprocessing import MinMaxScaler
 
-def prepare_data(df):
+_scaler = None
+
+def get_scaler() -> "MinMaxScaler":
+    """Return the module-level scaler, creating it on first use."""
+    global _scaler
+    if _scaler is None:
+        from sklearn.preprocessing import MinMaxScaler
+        _scaler = MinMaxScaler(feature_range=(0, 1))
+    return _scaler
+
+def __getattr__(name):
+    # Keep `model.scaler` working without importing scikit-learn up front
+    if name == "scaler":
+        return get_scaler()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _scale_close(df, scaler: Optional["MinMaxScaler"] = None) -> np.ndarray:
+    """
+    Scale 'Close' as float32.
+
+    Fits the module scaler unless an already fitted `scaler` is given.
+    """
+    close = np.asarray(df['Close'], dtype=np.float64).reshape(-1, 1)
+    if scaler is None:
+        scaler = get_scaler()
+        scaler.fit(close)
+    scaled = close.astype(np.float32).reshape(-1)
+    # Same formula as MinMaxScaler.transform, applied in place in float32
+    scaled *= np.float32(scaler.scale_[0])
+    scaled += np.float32(scaler.min_[0])
+    return scaled
+
+def prepare_data(
+    df, lookback: int = LSTM_LOOKBACK, scaler: Optional["MinMaxScaler"] = None
+) -> Tuple[np.ndarray, np.ndarray]:
     """
     Prepare time series data for LSTM model.
-    
+
+    Windows are strided views over a single scaled float32 series, so no
+    per-window copies are made.
+
     Args:
-        df: DataFrame containing 'Close' price column
-    
+        df: DataFrame containing 'Close' price column (or barstore.Bars)
+        lookback (int): Number of past data points per window
+        scaler (MinMaxScaler): Fitted scaler to reuse, e.g. one persisted
+            with a model (the module scaler is refit when omitted)
+
     Returns:
-        tuple: (X, y) arrays for training
+        tuple: (X, y) arrays for training, X shaped (samples, lookback, 1)
     """
     try:
-        df_scaled = scaler.fit_transform(df[['Close']])
-        X, y = [], []
-        for i in range(50, len(df_scaled)):
-            X.append(df_scaled[i-50:i, 0])
-            y.append(df_scaled[i, 0])
-        X = np.array(X)
-        y = np.array(y)
+        scaled = _scale_close(df, scaler)
+        if len(scaled) <= lookback:
+            raise ValueError(f"Need more than {lookback} rows, got {len(scaled)}")
         # Reshape X to match LSTM input shape (samples, time steps, features)
-        X = X.reshape((X.shape[0], X.shape[1], 1))
+        X = sliding_window_view(scaled[:-1], lookback)[:, :, np.newaxis]
+        y = scaled[lookback:]
         return X, y
     except KeyError:
         raise KeyError("DataFrame must contain 'Close' column")
     except Exception as e:
         raise Exception(f"Error preparing data: {str(e)}")
 
-def create_lstm_model():
+def _batches(
+    X: np.ndarray, y: np.ndarray, batch_size: int, rng: Optional[np.random.Generator] = None
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield batches of windows, copying one batch at a time."""
+    order = rng.permutation(len(y)) if rng is not None else None
+    for start in range(0, len(y), batch_size):
+        if order is None:
+            yield np.ascontiguousarray(X[start:start + batch_size]), y[start:start + batch_size]
+        else:
+            idx = order[start:start + batch_size]
+            yield X[idx], y[idx]
+
+def window_batches(
+    df,
+    lookback: int = LSTM_LOOKBACK,
+    batch_size: int = 256,
+    shuffle: bool = False,
+    seed: Optional[int] = None
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Iterate over (X, y) training batches without materializing all windows.
+
+    Only one batch of windows is copied at a time; the full
+    (samples, lookback, 1) tensor is never built.
+
+    Args:
+        df: DataFrame containing 'Close' price column (or barstore.Bars)
+        lookback (int): Number of past data points per window
+        batch_size (int): Windows per batch
+        shuffle (bool): Visit windows in random order
+        seed (int): Random seed for shuffling
+
+    Returns:
+        Iterator: (X, y) float32 arrays, one batch at a time
+    """
+    X, y = prepare_data(df, lookback)
+    rng = np.random.default_rng(seed) if shuffle else None
+    return _batches(X, y, batch_size, rng)
+
+def make_dataset(
+    df,
+    lookback: int = LSTM_LOOKBACK,
+    batch_size: int = 256,
+    shuffle: bool = False,
+    seed: Optional[int] = None
+):
+    """
+    Build a streaming tf.data.Dataset of training batches.
+
+    The series is scaled once; each epoch then streams batches from the
+    strided window view (reshuffled per epoch when shuffle is set).
+
+    Args:
+        df: DataFrame containing 'Close' price column (or barstore.Bars)
+        lookback (int): Number of past data points per window
+        batch_size (int): Windows per batch
+        shuffle (bool): Visit windows in random order each epoch
+        seed (int): Random seed for shuffling
+
+    Returns:
+        tf.data.Dataset: Batches of (X, y) with X shaped (batch, lookback, 1)
+    """
+    import tensorflow as tf
+
+    X, y = prepare_data(df, lookback)
+    rng = np.random.default_rng(seed) if shuffle else None
+    return tf.data.Dataset.from_generator(
+        lambda: _batches(X, y, batch_size, rng),
+        output_signature=(
+            tf.TensorSpec(shape=(None, lookback, 1), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32)
+        )
+    ).prefetch(tf.data.AUTOTUNE)
+
+def create_lstm_model(lookback: int = LSTM_LOOKBACK):
     """
     Create and compile LSTM model for time series prediction.
-    
+
+    Args:
+        lookback (int): Number of past data points per input window
+
     Returns:
         Sequential: Compiled Keras LSTM model
     """
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import LSTM, Dense
+
     model = Sequential([
-        LSTM(50, return_sequences=True, input_shape=(50, 1)),
+        LSTM(50, return_sequences=True, input_shape=(lookback, 1)),
         LSTM(50, return_sequences=False),
         Dense(25),
         Dense(1)
     ])
     model.compile(optimizer="adam", loss="mean_squared_error")
     return model
+
+def save_artifacts(model, directory: str = MODEL_DIR, fitted_scaler: Optional["MinMaxScaler"] = None) -> str:
+    """
+    Save a trained model together with the scaler it was trained with.
+
+    Args:
+        model: Trained Keras model
+        directory (str): Artifact directory
+        fitted_scaler (MinMaxScaler): Scaler to save (defaults to the module scaler)
+
+    Returns:
+        str: Artifact directory
+    """
+    os.makedirs(directory, exist_ok=True)
+    model.save(os.path.join(directory, "model.keras"))
+    with open(os.path.join(directory, "scaler.pkl"), "wb") as file:
+        pickle.dump(fitted_scaler if fitted_scaler is not None else get_scaler(), file)
+    return directory
+
+def _has_artifacts(directory: str) -> bool:
+    return all(
+        os.path.exists(os.path.join(directory, name))
+        for name in ("model.keras", "scaler.pkl")
+    )
+
+def latest_version(directory: str = MODEL_DIR) -> Optional[str]:
+    """
+    Return the newest complete versioned artifact directory (vN) under `directory`.
+
+    Returns:
+        str: Path such as models/lstm/v3, or None when no version exists
+    """
+    if not os.path.isdir(directory):
+        return None
+    versions = sorted(
+        (int(name[1:]), name) for name in os.listdir(directory)
+        if name[:1] == "v" and name[1:].isdigit()
+    )
+    for _, name in reversed(versions):
+        path = os.path.join(directory, name)
+        if _has_artifacts(path):
+            return path
+    return None
+
+def resolve_artifacts(directory: str = MODEL_DIR) -> str:
+    """Directory holding the artifacts: `directory` itself, else its latest version."""
+    if _has_artifacts(directory):
+        return directory
+    return latest_version(directory) or directory
+
+def load_artifacts(directory: str = MODEL_DIR) -> Tuple[object, "MinMaxScaler"]:
+    """
+    Load a model and its scaler saved with save_artifacts.
+
+    A directory of versions (see train.py) resolves to its latest version.
+
+    Returns:
+        tuple: (Keras model, fitted MinMaxScaler)
+    """
+    from tensorflow.keras.models import load_model
+
+    directory = resolve_artifacts(directory)
+    model = load_model(os.path.join(directory, "model.keras"))
+    with open(os.path.join(directory, "scaler.pkl"), "rb") as file:
+        fitted_scaler = pickle.load(file)
+    return model, fitted_scaler
+
+def artifacts_exist(directory: str = MODEL_DIR) -> bool:
+    """Check whether a saved model and scaler are available (directly or as a version)."""
+    return _has_artifacts(resolve_artifacts(directory))
@@ -0,0 +1,229 @@
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List
+from config import PORTFOLIO_MAX_POSITIONS
+from engine import WARMUP_BARS, TRADE_BUY, TRADE_SELL, TRADE_STOP_LOSS, TRADE_TAKE_PROFIT, TRADE_TYPES
+from indicators import rolling_mean
+from strategy import trading_signals, SIGNAL_BUY, SIGNAL_SELL
+
+
+@dataclass
+class PortfolioResult:
+    """Columnar trade ledger and per-bar equity of a portfolio backtest."""
+    tickers: List[str]
+    index: pd.DatetimeIndex
+    trades: Dict[str, np.ndarray]
+    equity: np.ndarray  # Cash plus open positions at each bar's close
+    final_balance: float
+    initial_balance: float
+
+    @property
+    def num_trades(self) -> int:
+        return len(self.trades["bar"])
+
+    def trades_frame(self) -> pd.DataFrame:
+        """One row per trade with date, ticker, type, price, position and cash."""
+        trades = self.trades
+        return pd.DataFrame({
+            "date": self.index[trades["bar"]],
+            "ticker": np.array(self.tickers, dtype=object)[trades["ticker"]],
+            "type": np.array(TRADE_TYPES, dtype=object)[trades["type"]],
+            "price": trades["price"],
+            "position": trades["position"],
+            "cash": trades["cash"],
+        })
+
+
+def align_closes(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Align closes of several tickers on the union of their timestamps.
+
+    Bars a ticker did not trade are NaN; callers forward-fill for valuation.
+
+    Args:
+        frames: DataFrames with 'Close' column, keyed by ticker
+
+    Returns:
+        pd.DataFrame: Time x ticker closes
+    """
+    closes = {
+        ticker: pd.Series(np.asarray(df["Close"], dtype=np.float64).reshape(-1), index=df.index)
+        for ticker, df in frames.items() if df is not None and not df.empty
+    }
+    if not closes:
+        return pd.DataFrame()
+    return pd.DataFrame({ticker: s[~s.index.duplicated(keep="last")] for ticker, s in closes.items()}).sort_index()
+
+
+def run_portfolio(
+    closes: pd.DataFrame,
+    initial_balance: float = 10000,
+    stop_loss_pct: float = 0.02,
+    take_profit_pct: float = 0.03,
+    position_size_pct: float = 0.95,
+    max_positions: int = PORTFOLIO_MAX_POSITIONS,
+    warmup: int = WARMUP_BARS,
+) -> PortfolioResult:
+    """
+    Backtest the long-only SMA strategy on a basket sharing one cash balance.
+
+    Prices, SMAs and signals are time x ticker matrices computed up front.
+    The simulation then steps through time once, updating positions, entry
+    prices and exits for every ticker with array operations, so the cost
+    grows with the number of bars rather than bars times tickers.
+
+    Allocation: each entry targets equity * position_size_pct / max_positions
+    (whole shares). When more tickers signal BUY than there are free slots
+    or cash, the deepest dips below SMA_10 are bought first. Exits (stop
+    loss, take profit, SELL) are processed before entries on every bar and
+    a ticker is not re-entered on the bar it exited. SMAs and the warmup
+    count each ticker's own bars, so with one ticker and max_positions=1
+    this reproduces engine.run_engine on that ticker's history.
+
+    Args:
+        closes (pd.DataFrame): Time x ticker closes (see align_closes)
+        initial_balance (float): Starting cash
+        stop_loss_pct (float): Stop loss as a fraction of entry price
+        take_profit_pct (float): Take profit as a fraction of entry price
+        position_size_pct (float): Fraction of equity invested when all slots are used
+        max_positions (int): Maximum number of tickers held at once
+        warmup (int): Bars each ticker must trade before its first entry
+
+    Returns:
+        PortfolioResult: Trade ledger, per-bar equity and final balance
+    """
+    raw = np.ascontiguousarray(closes.to_numpy(dtype=np.float64))
+    n_bars, n_tickers = raw.shape
+    traded = ~np.isnan(raw)
+    # Valuation uses the last traded price; 0 before a ticker's first bar
+    price = np.nan_to_num(closes.ffill().to_numpy(dtype=np.float64))
+    sma_10, sma_50 = rolling_mean(raw, 10), rolling_mean(raw, 50)
+    signals = trading_signals(raw, sma_10, sma_50)
+    signals[~traded] = 0
+    # Each ticker warms up on its own bars, so late starters are not entered early
+    buy = (signals == SIGNAL_BUY) & (np.cumsum(traded, axis=0) > warmup)
+    sell = signals == SIGNAL_SELL
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Entry priority: deepest dip below SMA_10 first
+        dip = np.where(buy, (raw - sma_10) / sma_10, np.inf)
+
+    cash = float(initial_balance)
+    position = np.zeros(n_tickers)
+    entry = np.zeros(n_tickers)
+    equity = np.empty(n_bars)
+    ledger = {key: [] for key in ("bar", "ticker", "type", "price", "position", "cash")}
+
+    def record(t, tickers, types, prices, positions):
+        ledger["bar"].append(np.full(len(tickers), t, dtype=np.int64))
+        ledger["ticker"].append(tickers)
+        ledger["type"].append(types)
+        ledger["price"].append(prices)
+        ledger["position"].append(positions)
+        ledger["cash"].append(np.full(len(tickers), cash))
+
+    # Entry logic only runs on bars where some ticker signals BUY
+    any_buy = buy.any(axis=1)
+    holding = 0
+    for t in range(n_bars):
+        p = price[t]
+        if holding:
+            held = position > 0
+            change = (p - entry) / np.where(held, entry, 1.0)
+            stop = held & (change <= -stop_loss_pct)
+            take = held & ~stop & (change >= take_profit_pct)
+            exits = stop | take | (held & sell[t])
+            if exits.any():
+                idx = np.flatnonzero(exits)
+                cash += float(position[idx] @ p[idx])
+                types = np.where(stop[idx], TRADE_STOP_LOSS,
+                                 np.where(take[idx], TRADE_TAKE_PROFIT, TRADE_SELL)).astype(np.int8)
+                record(t, idx, types, p[idx], np.zeros(len(idx)))
+                position[idx] = 0.0
+                holding -= len(idx)
+        else:
+            exits = None
+
+        if any_buy[t] and holding < max_positions:
+            candidates = buy[t] & (position == 0)
+            if exits is not None:
+                candidates &= ~exits
+            idx = np.flatnonzero(candidates)
+            if idx.size:
+                idx = idx[np.argsort(dip[t, idx], kind="stable")][:max_positions - holding]
+                value = cash + float(position @ p)
+                shares = (value * position_size_pct / max_positions) // p[idx]
+                cost = shares * p[idx]
+                affordable = (shares > 0) & (np.cumsum(cost) <= cash)
+                idx, shares, cost = idx[affordable], shares[affordable], cost[affordable]
+                if idx.size:
+                    cash -= float(cost.sum())
+                    position[idx] = shares
+                    entry[idx] = p[idx]
+                    record(t, idx, np.full(len(idx), TRADE_BUY, dtype=np.int8), p[idx], shares)
+                    holding += len(idx)
+        equity[t] = cash + float(position @ p) if holding else cash
+
+    def stack(key, dtype):
+        return np.concatenate(ledger[key]).astype(dtype) if ledger[key] else np.empty(0, dtype=dtype)
+
+    trades = {
+        "bar": stack("bar", np.int64),
+        "ticker": stack("ticker", np.int64),
+        "type": stack("type", np.int8),
+        "price": stack("price", np.float64),
+        "position": stack("position", np.float64),
+        "cash": stack("cash", np.float64),
+    }
+    final_balance = float(equity[-1]) if n_bars else float(initial_balance)
+    return PortfolioResult(tickers=list(closes.columns), index=pd.DatetimeIndex(closes.index), trades=trades,
+                           equity=equity, final_balance=final_balance, initial_balance=float(initial_balance))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Portfolio backtest over a basket of tickers")
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols (defaults to config.WATCHLIST)")
+    parser.add_argument("--period", default="60d", help="History period to load")
+    parser.add_argument("--offline", action="store_true", help="Use cached bars only")
+    parser.add_argument("--balance", type=float, default=10000, help="Initial balance")
+    parser.add_argument("--stop-loss", type=float, default=2.0, help="Stop loss %%")
+    parser.add_argument("--take-profit", type=float, default=3.0, help="Take profit %%")
+    parser.add_argument("--position-size", type=float, default=95.0, help="Invested %% of equity at full allocation")
+    parser.add_argument("--max-positions", type=int, default=PORTFOLIO_MAX_POSITIONS, help="Tickers held at once")
+    args = parser.parse_args(argv)
+
+    from config import WATCHLIST
+    from watchlist import fetch_watchlist
+
+    frames, errors = fetch_watchlist(args.tickers or WATCHLIST, period=args.period, offline=args.offline)
+    for ticker, error in errors.items():
+        print(f"{ticker}: {error}")
+    closes = align_closes(frames)
+    if closes.empty:
+        print("No data available for portfolio backtest")
+        return None
+
+    result = run_portfolio(
+        closes,
+        initial_balance=args.balance,
+        stop_loss_pct=args.stop_loss / 100,
+        take_profit_pct=args.take_profit / 100,
+        position_size_pct=args.position_size / 100,
+        max_positions=args.max_positions
+    )
+    print(f"\nPortfolio Backtest ({len(result.tickers)} tickers, {len(closes):,} bars):")
+    print(f"Initial Balance: ${result.initial_balance:,.2f}")
+    print(f"Final Balance: ${result.final_balance:,.2f}")
+    print(f"Return: {(result.final_balance / result.initial_balance - 1) * 100:.2f}%")
+    print(f"Number of Trades: {result.num_trades}")
+    if result.num_trades:
+        trades = result.trades_frame()
+        print("\nTrades per ticker:")
+        print(trades.groupby("ticker").size().to_string())
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() is not None else 1)
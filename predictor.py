@@ -0,0 +1,104 @@
+import time
+import logging
+import numpy as np
+from collections import deque
+from typing import Dict, Mapping, Optional
+from config import MODEL_DIR, PREDICTION_BUDGET_MS
+from model import artifacts_exist, load_artifacts
+
+
+class LSTMPredictor:
+    """
+    Long-lived LSTM inference component for the live loop.
+
+    The model and scaler are loaded once and the model is traced and
+    warmed up at construction, so each cycle only pays for a single
+    batched forward pass covering every ticker.
+    """
+
+    def __init__(self, directory: str = MODEL_DIR, budget_ms: float = PREDICTION_BUDGET_MS):
+        import tensorflow as tf
+
+        self.model, self.scaler = load_artifacts(directory)
+        self.lookback = int(self.model.input_shape[1])
+        self.budget_ms = budget_ms
+        self.latencies_ms = deque(maxlen=1000)
+
+        # A fixed input signature avoids retracing for each batch size
+        self._forward = tf.function(
+            lambda x: self.model(x, training=False),
+            input_signature=[tf.TensorSpec(shape=(None, self.lookback, 1), dtype=tf.float32)]
+        )
+        self.warm_up()
+
+    def warm_up(self, batch_size: int = 8) -> None:
+        """Run a dummy batch so the first real prediction is not slowed by tracing."""
+        self._forward(np.zeros((batch_size, self.lookback, 1), dtype=np.float32))
+
+    def _windows(self, series: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Take and scale the last `lookback` closes of each series."""
+        scale = np.float32(self.scaler.scale_[0])
+        offset = np.float32(self.scaler.min_[0])
+        windows = {}
+        for ticker, close in series.items():
+            close = np.asarray(close, dtype=np.float32).reshape(-1)[-self.lookback:]
+            if len(close) == self.lookback and np.isfinite(close).all():
+                windows[ticker] = close * scale + offset
+        return windows
+
+    def predict(self, series: Mapping[str, np.ndarray]) -> Dict[str, float]:
+        """
+        Forecast the next close for many tickers in one forward pass.
+
+        Args:
+            series: Close prices keyed by ticker (at least `lookback` bars each)
+
+        Returns:
+            Dict[str, float]: Forecast next close per ticker (NaN when a
+            ticker has too little or invalid history)
+        """
+        start = time.perf_counter()
+        forecasts = {ticker: float("nan") for ticker in series}
+        windows = self._windows(series)
+
+        if windows:
+            batch = np.stack(list(windows.values()))[:, :, np.newaxis]
+            scaled = self._forward(batch).numpy().reshape(-1)
+            prices = (scaled - self.scaler.min_[0]) / self.scaler.scale_[0]
+            forecasts.update(zip(windows, prices.tolist()))
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.latencies_ms.append(elapsed_ms)
+        if elapsed_ms > self.budget_ms:
+            logging.warning(
+                f"Prediction for {len(windows)} tickers took {elapsed_ms:.0f}ms "
+                f"(budget {self.budget_ms:.0f}ms)"
+            )
+        return forecasts
+
+    def latency_stats(self) -> Dict[str, float]:
+        """Return p50/p99/max prediction latency in milliseconds."""
+        if not self.latencies_ms:
+            return {"p50": 0.0, "p99": 0.0, "max": 0.0}
+        latencies = np.asarray(self.latencies_ms)
+        return {
+            "p50": float(np.percentile(latencies, 50)),
+            "p99": float(np.percentile(latencies, 99)),
+            "max": float(latencies.max()),
+        }
+
+
+def load_predictor(directory: str = MODEL_DIR) -> Optional[LSTMPredictor]:
+    """
+    Load the predictor if model artifacts exist.
+
+    Returns:
+        Optional[LSTMPredictor]: Warm predictor, or None if unavailable
+    """
+    if not artifacts_exist(directory):
+        return None
+    try:
+        return LSTMPredictor(directory)
+    except Exception as e:
+        print(f"Error loading LSTM model: {str(e)}")
+        return None
@@ -0,0 +1,360 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool
+from typing import Dict, Optional
+from config import (
+    ROBUSTNESS_PATHS, ROBUSTNESS_BLOCK_BARS, ROBUSTNESS_CHUNK_PATHS,
+    ROBUSTNESS_CONFIDENCE, ROBUSTNESS_SEED, BARS_PER_YEAR
+)
+from analytics import round_trips
+from engine import WARMUP_BARS, column_values, run_engine
+from indicators import rolling_mean
+from strategy import trading_signals, SIGNAL_BUY, SIGNAL_SELL
+
+METRICS = ["return_pct", "max_drawdown_pct", "sharpe", "num_trades"]
+
+# Source history and backtest parameters attached by each worker process (see _init_worker)
+_worker_state: Dict[str, object] = {}
+
+
+def block_bootstrap_paths(close: np.ndarray, n_paths: int, block_bars: int,
+                          rng: np.random.Generator) -> np.ndarray:
+    """
+    Resample a price history with the circular block bootstrap.
+
+    Log returns are cut into blocks of `block_bars` consecutive bars
+    starting at random positions (wrapping around), so volatility
+    clustering and intraday patterns within a block survive. Every path
+    starts at the first observed close.
+
+    Returns:
+        np.ndarray: Time x path close prices (n_bars, n_paths)
+    """
+    close = np.asarray(close, dtype=np.float64)
+    close = close[~np.isnan(close)]
+    returns = np.diff(np.log(close))
+    n_returns = len(returns)
+    if n_returns == 0:
+        return np.repeat(close[:, None], n_paths, axis=1)
+    block_bars = max(1, min(block_bars, n_returns))
+    n_blocks = -(-n_returns // block_bars)
+    starts = rng.integers(0, n_returns, size=(n_paths, n_blocks))
+    indices = (starts[:, :, None] + np.arange(block_bars)).reshape(n_paths, -1)[:, :n_returns] % n_returns
+    log_paths = np.cumsum(returns[indices.T], axis=0)
+    return close[0] * np.exp(np.vstack((np.zeros((1, n_paths)), log_paths)))
+
+
+def simulate_paths(
+    close: np.ndarray,
+    initial_balance: float = 10000,
+    stop_loss_pct: float = 0.02,
+    take_profit_pct: float = 0.03,
+    position_size_pct: float = 0.95,
+    warmup: int = WARMUP_BARS,
+    bars_per_year: int = BARS_PER_YEAR,
+) -> Dict[str, np.ndarray]:
+    """
+    Run the SMA strategy on many price paths at once.
+
+    Each column of `close` is an independent account. The state machine
+    of engine.run_engine (entries, stop loss, take profit, SELL) is
+    stepped through time with every path updated by array operations,
+    and equity statistics are accumulated on the fly so no per-bar
+    equity matrix is kept.
+
+    Args:
+        close (np.ndarray): Time x path close prices
+        initial_balance (float): Starting cash of every path
+        stop_loss_pct (float): Stop loss as a fraction of entry price
+        take_profit_pct (float): Take profit as a fraction of entry price
+        position_size_pct (float): Fraction of cash used per entry
+        warmup (int): Number of leading bars without entries
+        bars_per_year (int): Bars per year used to annualize the Sharpe ratio
+
+    Returns:
+        dict: Per-path arrays of final_balance, return_pct, max_drawdown_pct
+        (per-bar equity), sharpe (annualized, per-bar equity returns) and
+        num_trades (round trips)
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    n_bars, n_paths = close.shape
+    signals = trading_signals(close, rolling_mean(close, 10), rolling_mean(close, 50))
+    buy, sell = signals == SIGNAL_BUY, signals == SIGNAL_SELL
+
+    balance = np.full(n_paths, float(initial_balance))
+    position = np.zeros(n_paths)
+    entry = np.ones(n_paths)
+    held = np.zeros(n_paths, dtype=bool)
+    trades = np.zeros(n_paths, dtype=np.int64)
+    equity = balance.copy()
+    peak = balance.copy()
+    max_drawdown = np.zeros(n_paths)
+    sum_returns = np.zeros(n_paths)
+    sum_squares = np.zeros(n_paths)
+
+    for t in range(n_bars):
+        price = close[t]
+        exited = None
+        if held.any():
+            change = (price - entry) / entry
+            exited = held & ((change <= -stop_loss_pct) | (change >= take_profit_pct) | sell[t])
+            balance += np.where(exited, position * price, 0.0)
+            position[exited] = 0.0
+            held &= ~exited
+            trades += exited
+
+        if t >= warmup:
+            # run_engine resumes its search on the bar after an exit
+            enter = ~held & buy[t] & (price < balance)
+            if exited is not None:
+                enter &= ~exited
+            if enter.any():
+                shares = np.where(enter, (balance * position_size_pct) // price, 0.0)
+                balance -= shares * price
+                position += shares
+                entry = np.where(enter, price, entry)
+                held |= shares > 0
+
+        previous = equity
+        equity = balance + position * price
+        returns = equity / previous - 1
+        sum_returns += returns
+        sum_squares += returns * returns
+        np.maximum(peak, equity, out=peak)
+        np.maximum(max_drawdown, (peak - equity) / peak, out=max_drawdown)
+
+    trades += held  # Open positions are closed at the last price
+    mean = sum_returns / max(n_bars, 1)
+    std = np.sqrt(np.maximum(sum_squares / max(n_bars, 1) - mean * mean, 0.0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(bars_per_year), 0.0)
+    return {
+        "final_balance": equity,
+        "return_pct": (equity / initial_balance - 1) * 100,
+        "max_drawdown_pct": max_drawdown * 100,
+        "sharpe": sharpe,
+        "num_trades": trades,
+    }
+
+
+def backtest(close: np.ndarray, **params):
+    """
+    Run engine.run_engine on one history with the SMAs used by simulate_paths.
+
+    Returns:
+        BacktestResult: Columnar trade ledger and final balance
+    """
+    return run_engine(close, rolling_mean(close, 10), rolling_mean(close, 50), **params)
+
+
+def shuffle_trades(result, n_paths: int, rng: Optional[np.random.Generator], bars_per_year: int = BARS_PER_YEAR,
+                   n_bars: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Reorder the round trips of one backtest at random.
+
+    Each round trip (see analytics.round_trips, which values a position
+    still open at the end at the last price) multiplies equity by
+    (equity after exit) / (equity before entry). Shuffling the order
+    keeps the final return but shows
+    how deep the drawdown could have been with a less lucky sequence.
+    Sharpe is computed from per-trade returns, annualized with the
+    backtest's trade frequency.
+
+    Args:
+        result (BacktestResult): Backtest of the observed history
+        n_paths (int): Number of permutations
+        rng (np.random.Generator): Random generator, or None to keep the
+            observed order (the baseline the permutations are compared to)
+        bars_per_year (int): Bars per year used to annualize the Sharpe ratio
+        n_bars (int): Bars covered by the backtest (for the trade frequency)
+
+    Returns:
+        dict: Per-path arrays like simulate_paths
+    """
+    pnl = round_trips(result)["pnl"]
+    # Equity is all cash between round trips, so each one starts from the previous one's end
+    before = result.initial_balance + np.concatenate(([0.0], np.cumsum(pnl)[:-1]))
+    multipliers = 1 + pnl / before
+    if len(multipliers) == 0:
+        multipliers = np.ones(1)
+
+    if rng is None:
+        order = np.broadcast_to(np.arange(len(multipliers)), (n_paths, len(multipliers)))
+    else:
+        order = np.argsort(rng.random((n_paths, len(multipliers))), axis=1)
+    equity = result.initial_balance * np.cumprod(multipliers[order], axis=1)
+    equity = np.hstack((np.full((n_paths, 1), result.initial_balance), equity))
+    peak = np.maximum.accumulate(equity, axis=1)
+    returns = multipliers - 1
+    per_year = len(returns) / (n_bars / bars_per_year) if n_bars else len(returns)
+    std = returns.std()
+    sharpe = returns.mean() / std * np.sqrt(per_year) if std > 0 else 0.0
+    return {
+        "final_balance": equity[:, -1],
+        "return_pct": (equity[:, -1] / result.initial_balance - 1) * 100,
+        "max_drawdown_pct": np.max((peak - equity) / peak, axis=1) * 100,
+        "sharpe": np.full(n_paths, sharpe),
+        "num_trades": np.full(n_paths, len(pnl)),
+    }
+
+
+def _init_worker(close: np.ndarray, params: Dict[str, float]):
+    """Keep the source history and backtest parameters once per worker process."""
+    global _worker_state
+    _worker_state = {"close": close, "params": params}
+
+
+def _simulate_chunk(task) -> Dict[str, np.ndarray]:
+    """Bootstrap and simulate one chunk of paths; seeds are fixed per chunk."""
+    chunk, n_paths, block_bars, seed_seq = task
+    rng = np.random.default_rng(seed_seq)
+    paths = block_bootstrap_paths(_worker_state["close"], n_paths, block_bars, rng)
+    stats = simulate_paths(paths, **_worker_state["params"])
+    stats["chunk"] = np.full(n_paths, chunk)
+    return stats
+
+
+def run_robustness(
+    df,
+    n_paths: int = ROBUSTNESS_PATHS,
+    method: str = "block",
+    block_bars: int = ROBUSTNESS_BLOCK_BARS,
+    initial_balance: float = 10000,
+    stop_loss_pct: float = 0.02,
+    take_profit_pct: float = 0.03,
+    position_size_pct: float = 0.95,
+    seed: int = ROBUSTNESS_SEED,
+    processes: Optional[int] = None,
+    chunk_paths: int = ROBUSTNESS_CHUNK_PATHS,
+) -> pd.DataFrame:
+    """
+    Backtest the strategy on thousands of resampled versions of a history.
+
+    method="block" resamples returns with the circular block bootstrap and
+    runs the strategy on every path; chunks of `chunk_paths` paths are
+    simulated as arrays and spread over a process pool. Each chunk has
+    its own seed spawned from `seed`, so results do not depend on the
+    number of processes. method="shuffle" reorders the trades of the
+    observed backtest instead (cheap; only the drawdown varies).
+
+    Args:
+        df (pd.DataFrame): DataFrame with 'Close' price column
+        n_paths (int): Number of resampled paths
+        method (str): "block" or "shuffle"
+        block_bars (int): Bars per bootstrap block
+        initial_balance (float): Starting cash
+        stop_loss_pct (float): Stop loss as a fraction of entry price
+        take_profit_pct (float): Take profit as a fraction of entry price
+        position_size_pct (float): Fraction of cash used per entry
+        seed (int): Base random seed
+        processes (int): Worker processes (defaults to CPU count)
+        chunk_paths (int): Paths simulated together per task
+
+    Returns:
+        pd.DataFrame: One row per path with the METRICS columns
+    """
+    close = column_values(df, "Close")
+    close = close[~np.isnan(close)]
+    params = {
+        "initial_balance": initial_balance,
+        "stop_loss_pct": stop_loss_pct,
+        "take_profit_pct": take_profit_pct,
+        "position_size_pct": position_size_pct,
+    }
+
+    if method == "shuffle":
+        result = backtest(close, **params)
+        stats = shuffle_trades(result, n_paths, np.random.default_rng(seed), n_bars=len(close))
+        return pd.DataFrame({name: stats[name] for name in METRICS})
+    if method != "block":
+        raise ValueError(f"Unknown resampling method: {method}")
+
+    sizes = [min(chunk_paths, n_paths - start) for start in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(i, size, block_bars, seeds[i]) for i, size in enumerate(sizes)]
+    processes = min(processes or os.cpu_count() or 1, max(len(tasks), 1))
+
+    if processes == 1:
+        _init_worker(close, params)
+        chunks = [_simulate_chunk(task) for task in tasks]
+    else:
+        with Pool(processes, initializer=_init_worker, initargs=(close, params)) as pool:
+            chunks = pool.map(_simulate_chunk, tasks)
+    return pd.DataFrame({name: np.concatenate([chunk[name] for chunk in chunks]) for name in METRICS})
+
+
+def confidence_intervals(paths: pd.DataFrame, confidence: float = ROBUSTNESS_CONFIDENCE) -> pd.DataFrame:
+    """
+    Percentile confidence intervals of the per-path metrics.
+
+    Returns:
+        pd.DataFrame: mean, median, lower and upper bound per metric
+    """
+    tail = (1 - confidence) / 2 * 100
+    values = paths[METRICS].to_numpy(dtype=np.float64)
+    lower, median, upper = np.nanpercentile(values, [tail, 50, 100 - tail], axis=0)
+    return pd.DataFrame({
+        "mean": np.nanmean(values, axis=0),
+        "median": median,
+        "lower": lower,
+        "upper": upper,
+    }, index=pd.Index(METRICS, name="metric"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo robustness analysis of the backtest")
+    parser.add_argument("--ticker", default=None, help="Ticker symbol (defaults to config.TICKER)")
+    parser.add_argument("--period", default="60d", help="History period to load")
+    parser.add_argument("--offline", action="store_true", help="Use cached bars only")
+    parser.add_argument("--paths", type=int, default=ROBUSTNESS_PATHS, help="Number of resampled paths")
+    parser.add_argument("--method", choices=("block", "shuffle"), default="block", help="Resampling method")
+    parser.add_argument("--block-bars", type=int, default=ROBUSTNESS_BLOCK_BARS, help="Bars per bootstrap block")
+    parser.add_argument("--confidence", type=float, default=ROBUSTNESS_CONFIDENCE, help="Interval coverage")
+    parser.add_argument("--stop-loss", type=float, default=2.0, help="Stop loss %%")
+    parser.add_argument("--take-profit", type=float, default=3.0, help="Take profit %%")
+    parser.add_argument("--position-size", type=float, default=95.0, help="Position size %%")
+    parser.add_argument("--balance", type=float, default=10000, help="Initial balance")
+    parser.add_argument("--seed", type=int, default=ROBUSTNESS_SEED, help="Random seed")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes")
+    parser.add_argument("--output", default=None, help="Write the per-path metrics to this CSV file")
+    args = parser.parse_args(argv)
+
+    from fetch_data import fetch_stock_data
+    from config import TICKER
+
+    df = fetch_stock_data(ticker=args.ticker or TICKER, period=args.period, offline=args.offline)
+    if df is None or df.empty:
+        print("No data available for robustness analysis")
+        return None
+
+    params = {
+        "initial_balance": args.balance,
+        "stop_loss_pct": args.stop_loss / 100,
+        "take_profit_pct": args.take_profit / 100,
+        "position_size_pct": args.position_size / 100,
+    }
+    close = column_values(df, "Close")
+    close = close[~np.isnan(close)]
+    if args.method == "shuffle":
+        # Shuffled paths measure drawdown from trade to trade, so the observed order is measured the same way
+        observed = shuffle_trades(backtest(close, **params), 1, None, n_bars=len(close))
+    else:
+        observed = simulate_paths(close[:, None], **params)
+    paths = run_robustness(df, n_paths=args.paths, method=args.method, block_bars=args.block_bars,
+                           seed=args.seed, processes=args.processes, **params)
+    intervals = confidence_intervals(paths, args.confidence)
+    intervals.insert(0, "observed", [float(observed[name][0]) for name in METRICS])
+
+    print(f"\nRobustness ({args.paths:,} {args.method} paths, {args.confidence:.0%} intervals):")
+    print(f"Drawdown is measured {'between trades' if args.method == 'shuffle' else 'per bar'}")
+    print(intervals.to_string(float_format="%.2f"))
+    print(f"Paths losing money: {(paths['return_pct'] < 0).mean() * 100:.1f}%")
+    if args.output:
+        paths.to_csv(args.output, index=False)
+    return intervals
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import heapq
+import logging
+import itertools
+import time as _time
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+from config import (
+    INTERVAL, MARKET_TIMEZONE, MARKET_OPEN, MARKET_CLOSE, MARKET_HOLIDAYS,
+    BAR_CLOSE_DELAY_SECONDS, BAR_RETRY_BASE_SECONDS, BAR_RETRY_MAX_ATTEMPTS
+)
+
+_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def interval_to_timedelta(interval: str) -> timedelta:
+    """Convert a yfinance interval such as '15m', '1h' or '1d' into a timedelta."""
+    if interval.endswith("wk") or interval.endswith("mo"):
+        raise ValueError(f"Unsupported bar interval: {interval}")
+    try:
+        return timedelta(seconds=int(interval[:-1]) * _UNITS[interval[-1]])
+    except (KeyError, ValueError):
+        raise ValueError(f"Unsupported bar interval: {interval}")
+
+
+class MarketCalendar:
+    """
+    Trading sessions of one exchange (B3 by default: 10:00-17:55
+    America/Sao_Paulo, Monday to Friday, excluding configured holidays).
+    """
+
+    def __init__(
+        self,
+        timezone: str = MARKET_TIMEZONE,
+        open_time: str = MARKET_OPEN,
+        close_time: str = MARKET_CLOSE,
+        holidays: Iterable[str] = MARKET_HOLIDAYS
+    ):
+        self.tz = ZoneInfo(timezone)
+        self.open_time = time.fromisoformat(open_time)
+        self.close_time = time.fromisoformat(close_time)
+        self.holidays = {date.fromisoformat(day) for day in holidays}
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def session(self, day: date):
+        """Return the (open, close) datetimes of a trading day."""
+        return (datetime.combine(day, self.open_time, self.tz),
+                datetime.combine(day, self.close_time, self.tz))
+
+    def is_open(self, moment: datetime) -> bool:
+        moment = moment.astimezone(self.tz)
+        if not self.is_trading_day(moment.date()):
+            return False
+        session_open, session_close = self.session(moment.date())
+        return session_open <= moment < session_close
+
+    def next_open(self, moment: datetime) -> datetime:
+        """Return `moment` if the market is open, otherwise the next session open."""
+        moment = moment.astimezone(self.tz)
+        day = moment.date()
+        while True:
+            if self.is_trading_day(day):
+                session_open, session_close = self.session(day)
+                if moment < session_close:
+                    return max(moment, session_open)
+            day += timedelta(days=1)
+
+    def next_bar_close(self, moment: datetime, interval: str = INTERVAL) -> datetime:
+        """
+        Return the first bar close strictly after `moment`.
+
+        Intraday bars are aligned to the clock (e.g. :00, :15, :30, :45 for
+        15m bars) and the last bar of a session closes at the session close.
+        Daily bars close at the session close.
+        """
+        step = interval_to_timedelta(interval)
+        moment = moment.astimezone(self.tz)
+        day = moment.date()
+        while True:
+            if self.is_trading_day(day):
+                session_open, session_close = self.session(day)
+                if step >= timedelta(days=1):
+                    if moment < session_close:
+                        return session_close
+                elif moment < session_close:
+                    start = max(moment, session_open)
+                    midnight = datetime.combine(day, time(0), self.tz)
+                    boundary = midnight + step * ((start - midnight) // step + 1)
+                    return min(boundary, session_close)
+            day += timedelta(days=1)
+
+
+@dataclass
+class Job:
+    """
+    A pipeline stage run by the Scheduler.
+
+    `func` receives the datetime the run is for (the bar close for bar
+    jobs, including their retries) and returns a falsy value when it
+    should be retried (e.g. the expected bar is not published yet).
+    """
+    name: str
+    func: Callable[[datetime], object]
+    every: Optional[float] = None  # Seconds between runs while the market is open
+    on_bar: bool = False  # Run shortly after every bar close
+    after: Optional[str] = None  # Run whenever this other job succeeds
+    retry: bool = False  # Retry failed runs with exponential backoff
+    attempt: int = 0
+    runs: int = 0
+    failures: int = 0
+    last_success: Optional[datetime] = field(default=None, repr=False)
+
+
+class Scheduler:
+    """
+    Run pipeline stages on bar boundaries and fixed cadences during market hours.
+
+    Bar jobs wake `bar_delay` seconds after each bar close; fixed-cadence
+    jobs run every `every` seconds; dependent jobs run after the job they
+    follow succeeds. Nothing runs while the market is closed: the next run
+    is pushed to the following session. The clock and sleep functions can
+    be replaced for testing.
+    """
+
+    def __init__(
+        self,
+        interval: str = INTERVAL,
+        calendar: Optional[MarketCalendar] = None,
+        bar_delay: float = BAR_CLOSE_DELAY_SECONDS,
+        retry_base: float = BAR_RETRY_BASE_SECONDS,
+        max_attempts: int = BAR_RETRY_MAX_ATTEMPTS,
+        clock: Optional[Callable[[], datetime]] = None,
+        sleep: Callable[[float], None] = _time.sleep
+    ):
+        self.interval = interval
+        self.calendar = calendar or MarketCalendar()
+        self.bar_delay = timedelta(seconds=bar_delay)
+        self.retry_base = retry_base
+        self.max_attempts = max_attempts
+        self.clock = clock or (lambda: datetime.now(self.calendar.tz))
+        self.sleep = sleep
+        self.jobs: Dict[str, Job] = {}
+        self._queue: List = []  # (due, seq, name, scheduled_for)
+        self._seq = itertools.count()
+
+    def add_job(self, name: str, func: Callable[[datetime], object], every: Optional[float] = None,
+                on_bar: bool = False, after: Optional[str] = None, retry: bool = False) -> Job:
+        """Register a stage; exactly one of `every`, `on_bar` or `after` must be given."""
+        if sum((every is not None, on_bar, after is not None)) != 1:
+            raise ValueError(f"Job {name} needs exactly one of every, on_bar or after")
+        job = self.jobs[name] = Job(name, func, every=every, on_bar=on_bar, after=after, retry=retry)
+        if after is None:
+            self._schedule_next(job, self.clock())
+        return job
+
+    def _push(self, due: datetime, name: str, scheduled_for: datetime) -> None:
+        heapq.heappush(self._queue, (due, next(self._seq), name, scheduled_for))
+
+    def _schedule_next(self, job: Job, moment: datetime) -> None:
+        """Queue the first regular run of `job` at or after `moment`."""
+        if job.on_bar:
+            bar_close = self.calendar.next_bar_close(moment, self.interval)
+            self._push(bar_close + self.bar_delay, job.name, bar_close)
+        else:
+            due = self.calendar.next_open(moment)
+            self._push(due, job.name, due)
+
+    def _run_job(self, job: Job, scheduled: datetime) -> bool:
+        job.runs += 1
+        try:
+            ok = bool(job.func(scheduled))
+        except Exception as e:
+            logging.error(f"Stage {job.name} failed: {str(e)}")
+            print(f"Error in stage {job.name}: {e}")
+            ok = False
+        if ok:
+            job.last_success = scheduled
+            for dependent in self.jobs.values():
+                if dependent.after == job.name:
+                    self._run_job(dependent, scheduled)
+        else:
+            job.failures += 1
+        return ok
+
+    def _reschedule(self, job: Job, scheduled: datetime, ok: bool) -> None:
+        now = self.clock()
+        if not ok and job.retry and job.attempt < self.max_attempts:
+            # The bar may be published late; back off before asking again
+            delay = self.retry_base * 2 ** job.attempt
+            job.attempt += 1
+            logging.warning(f"Stage {job.name} not ready, retry {job.attempt} in {delay:.0f}s")
+            self._push(now + timedelta(seconds=delay), job.name, scheduled)
+            return
+        job.attempt = 0
+        if job.on_bar:
+            self._schedule_next(job, max(now, scheduled))
+        else:
+            self._schedule_next(job, scheduled + timedelta(seconds=job.every))
+
+    def run_pending(self) -> int:
+        """Run every job that is due now. Returns the number of jobs run."""
+        count = 0
+        now = self.clock()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, name, scheduled = heapq.heappop(self._queue)
+            job = self.jobs[name]
+            self._reschedule(job, scheduled, self._run_job(job, scheduled))
+            count += 1
+        return count
+
+    def bar_available(self, last_bar: datetime, bar_close: datetime) -> bool:
+        """
+        Check whether data ending at `last_bar` (a bar start timestamp, as
+        labelled by yfinance) includes the bar that closed at `bar_close`.
+        """
+        if last_bar.tzinfo is None:
+            last_bar = last_bar.replace(tzinfo=self.calendar.tz)
+        return last_bar >= bar_close - interval_to_timedelta(self.interval)
+
+    def next_wakeup(self, name: Optional[str] = None) -> Optional[datetime]:
+        """Return when the scheduler (or the job `name`) next runs."""
+        dues = [entry[0] for entry in self._queue if name is None or entry[2] == name]
+        return min(dues) if dues else None
+
+    def run(self, until: Optional[datetime] = None) -> None:
+        """Sleep until each job is due and run it, forever or until `until`."""
+        while self._queue:
+            due = self._queue[0][0]
+            if until is not None and due > until:
+                return
+            wait = (due - self.clock()).total_seconds()
+            if wait > 0:
+                self.sleep(wait)
+            self.run_pending()
@@ -1,40 +1,110 @@
-import requests
-from textblob import TextBlob
-from typing import List, Optional
-from config import NEWS_API_KEY
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from config import NEWS_API_KEY, SENTIMENT_TTL_SECONDS, SENTIMENT_ARTICLE_CACHE_SIZE
 
-def get_news_sentiment() -> float:
+
+class SentimentCache:
+    """
+    Two-level cache for news sentiment.
+
+    Query results are kept for `ttl` seconds, so repeated calls within the
+    TTL make no HTTP request. Article polarities are memoized by a hash of
+    the analyzed text with LRU eviction, so articles already seen are not
+    re-run through TextBlob when the query is refreshed.
+    """
+
+    def __init__(self, ttl: float = SENTIMENT_TTL_SECONDS, max_articles: int = SENTIMENT_ARTICLE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_articles = max_articles
+        self._queries: Dict[tuple, Tuple[float, float]] = {}
+        self._articles: "OrderedDict[str, float]" = OrderedDict()
+        self.stats = {"query_hits": 0, "query_misses": 0, "article_hits": 0, "article_misses": 0}
+
+    def get_query(self, key: tuple) -> Optional[float]:
+        """Return the cached score for a query, or None if missing or expired."""
+        entry = self._queries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.stats["query_hits"] += 1
+            return entry[1]
+        self.stats["query_misses"] += 1
+        return None
+
+    def put_query(self, key: tuple, score: float) -> None:
+        self._queries[key] = (time.monotonic() + self.ttl, score)
+
+    def polarity(self, text: str) -> float:
+        """Return the TextBlob polarity of `text`, memoized by content hash."""
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if key in self._articles:
+            self._articles.move_to_end(key)
+            self.stats["article_hits"] += 1
+            return self._articles[key]
+
+        from textblob import TextBlob  # Deferred: pulls in NLTK
+
+        self.stats["article_misses"] += 1
+        score = TextBlob(text).sentiment.polarity
+        self._articles[key] = score
+        if len(self._articles) > self.max_articles:
+            self._articles.popitem(last=False)
+        return score
+
+    def clear(self) -> None:
+        self._queries.clear()
+        self._articles.clear()
+
+
+sentiment_cache = SentimentCache()
+
+
+def get_news_sentiment(query: str = "Ibovespa", use_cache: bool = True) -> float:
     """
     Fetch and analyze sentiment from news articles about Ibovespa.
-    
+
+    Args:
+        query (str): NewsAPI search query
+        use_cache (bool): Serve results from sentiment_cache when fresh
+
     Returns:
         float: Average sentiment score between -1 and 1
     """
+    import requests
+
     url = "https://newsapi.org/v2/everything"
     params = {
-        "q": "Ibovespa",
+        "q": query,
         "language": "pt",
         "apiKey": NEWS_API_KEY,
         "pageSize": 5  # Limit to 5 articles directly in API call
     }
+    cache_key = (params["q"], params["language"], params["pageSize"])
+
+    if use_cache:
+        cached = sentiment_cache.get_query(cache_key)
+        if cached is not None:
+            return cached
 
     try:
         response = requests.get(url, params=params, timeout=10)
         response.raise_for_status()  # Raise exception for bad status codes
-        
+
         articles = response.json().get("articles", [])
         if not articles:
             print("Warning: No articles found")
-            return 0.0
-
-        sentiment_scores: List[float] = []
-        for article in articles:
-            text = f"{article.get('title', '')} {article.get('description', '')}"
-            if text.strip():  # Only analyze non-empty text
-                sentiment = TextBlob(text).sentiment.polarity
-                sentiment_scores.append(sentiment)
+            score = 0.0
+        else:
+            sentiment_scores: List[float] = []
+            for article in articles:
+                text = f"{article.get('title', '')} {article.get('description', '')}"
+                if text.strip():  # Only analyze non-empty text
+                    sentiment_scores.append(sentiment_cache.polarity(text))
+            score = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0.0
 
-        return sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0.0
+        if use_cache:
+            sentiment_cache.put_query(cache_key, score)
+        return score
 
     except requests.RequestException as e:
         print(f"Error fetching news: {str(e)}")
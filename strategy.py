@@ -1,31 +1,93 @@
-import pandas as pd
+import numpy as np
+from typing import Optional
+
+# Signal codes returned by trading_signals
+SIGNAL_HOLD = 0
+SIGNAL_BUY = 1
+SIGNAL_SELL = -1
+SIGNAL_NAMES = {SIGNAL_HOLD: "HOLD", SIGNAL_BUY: "BUY", SIGNAL_SELL: "SELL"}
+
+# Rule thresholds in percent, shared by trading_signal and trading_signals
+BUY_DIP_PCT = -1.0  # Price below SMA_10 by more than this in an uptrend
+SELL_RALLY_PCT = 1.5  # Price above SMA_10 by more than this
+CUT_LOSS_PCT = -2.0  # Price below SMA_10 by more than this in a downtrend
+
+
+def trading_signals(
+    price: np.ndarray,
+    sma_10: np.ndarray,
+    sma_50: np.ndarray,
+    sentiment: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Generate trading signals for arrays of prices and moving averages.
+
+    Inputs are broadcast against each other. A zero moving average or a
+    NaN input yields HOLD, as in the scalar rule.
+
+    Args:
+        price (np.ndarray): Stock prices
+        sma_10 (np.ndarray): 10-period Simple Moving Averages
+        sma_50 (np.ndarray): 50-period Simple Moving Averages
+        sentiment (np.ndarray): Sentiment scores between -1 and 1
+            (accepted for parity with trading_signal; not used by the rule)
+
+    Returns:
+        np.ndarray: int8 array of SIGNAL_BUY, SIGNAL_SELL or SIGNAL_HOLD
+    """
+    price = np.asarray(price, dtype=np.float64)
+    sma_10 = np.asarray(sma_10, dtype=np.float64)
+    sma_50 = np.asarray(sma_50, dtype=np.float64)
+
+    # Calculate percentage differences
+    with np.errstate(all="ignore"):
+        price_vs_sma10 = ((price - sma_10) / sma_10) * 100
+        sma10_vs_sma50 = ((sma_10 - sma_50) / sma_50) * 100
+
+    # Buy on dips when trend is up
+    buy = (price_vs_sma10 < BUY_DIP_PCT) & (sma10_vs_sma50 > 0)
+    # Sell on significant price increase, or cut losses in downtrend
+    sell = (price_vs_sma10 > SELL_RALLY_PCT) | ((price_vs_sma10 < CUT_LOSS_PCT) & (sma10_vs_sma50 < 0))
+    # Division by zero falls back to HOLD
+    valid = (sma_10 != 0) & (sma_50 != 0)
+
+    signals = np.zeros(np.broadcast(price_vs_sma10, sma10_vs_sma50).shape, dtype=np.int8)
+    signals[sell & valid] = SIGNAL_SELL
+    signals[buy & valid] = SIGNAL_BUY
+    return signals
+
 
 def trading_signal(price: float, sma_10: float, sma_50: float, sentiment: float) -> str:
     """
     Generate trading signals based on price, moving averages and sentiment.
-    
+
+    Scalar counterpart of trading_signals for the live loop, kept as plain
+    float arithmetic because it runs once per tick.
+
     Args:
         price (float): Current stock price
         sma_10 (float): 10-period Simple Moving Average
         sma_50 (float): 50-period Simple Moving Average
         sentiment (float): Sentiment score between -1 and 1
-        
+
     Returns:
         str: Trading signal ('BUY', 'SELL', or 'HOLD')
     """
     try:
+        # Division by zero falls back to HOLD (numpy scalars would return inf instead of raising)
+        if sma_10 == 0 or sma_50 == 0:
+            return "HOLD"
         # Calculate percentage differences
         price_vs_sma10 = ((price - sma_10) / sma_10) * 100
         sma10_vs_sma50 = ((sma_10 - sma_50) / sma_50) * 100
-        
-        # Enhanced trading conditions
-        if (price_vs_sma10 < -1.0 and sma10_vs_sma50 > 0):  # Buy on dips when trend is up
+
+        if price_vs_sma10 < BUY_DIP_PCT and sma10_vs_sma50 > 0:  # Buy on dips when trend is up
             return "BUY"
-        elif (price_vs_sma10 > 1.5 or  # Sell on significant price increase
-              (price_vs_sma10 < -2.0 and sma10_vs_sma50 < 0)):  # Or cut losses in downtrend
+        elif (price_vs_sma10 > SELL_RALLY_PCT or  # Sell on significant price increase
+              (price_vs_sma10 < CUT_LOSS_PCT and sma10_vs_sma50 < 0)):  # Or cut losses in downtrend
             return "SELL"
         return "HOLD"
-        
+
     except Exception as e:
         print(f"Error in trading_signal: {str(e)}")
         return "HOLD"
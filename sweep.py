@@ -0,0 +1,199 @@
+import argparse
+import itertools
+import os
+import numpy as np
+from multiprocessing import Pool, shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+from analytics import drawdown
+from engine import column_values, run_engine, win_rate
+from strategy import trading_signals
+
+RESULT_COLUMNS = [
+    "stop_loss_pct", "take_profit_pct", "position_size_pct",
+    "final_balance", "return_pct", "num_trades", "win_rate", "max_drawdown_pct"
+]
+
+# Arrays attached by each worker process (see _init_worker)
+_worker_arrays: Dict[str, np.ndarray] = {}
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_balance: float = 0.0
+
+
+def pack_shared(arrays: Dict[str, np.ndarray]) -> Tuple[shared_memory.SharedMemory, List[tuple]]:
+    """
+    Copy arrays into a single shared memory block.
+
+    The creator closes and unlinks the block; worker processes attach to
+    it with attach_shared.
+
+    Returns:
+        tuple: (SharedMemory block, layout of (name, dtype, shape, offset))
+    """
+    layout, offset = [], 0
+    for name, array in arrays.items():
+        offset = (offset + 7) // 8 * 8  # Keep every array 8-byte aligned
+        layout.append((name, array.dtype.str, array.shape, offset))
+        offset += array.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (name, dtype, shape, start), array in zip(layout, arrays.values()):
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = array
+    return shm, layout
+
+
+def attach_shared(shm_name: str, layout: List[tuple]) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+    """
+    Attach to a block written by pack_shared.
+
+    Returns:
+        tuple: (SharedMemory block, which must stay referenced while the
+        arrays are used, and the arrays by name as views into it)
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    arrays = {
+        name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+        for name, dtype, shape, start in layout
+    }
+    return shm, arrays
+
+
+def _init_worker(shm_name: str, layout: List[tuple], initial_balance: float):
+    """Attach to the shared block once per worker process."""
+    global _worker_shm, _worker_arrays, _worker_balance
+    _worker_shm, _worker_arrays = attach_shared(shm_name, layout)
+    _worker_balance = initial_balance
+
+
+def _evaluate(params: Tuple[float, float, float]) -> tuple:
+    """Run one parameter combination against the shared arrays."""
+    stop_loss_pct, take_profit_pct, position_size_pct = params
+    result = run_engine(
+        _worker_arrays["close"],
+        _worker_arrays["sma_10"],
+        _worker_arrays["sma_50"],
+        initial_balance=_worker_balance,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        position_size_pct=position_size_pct,
+        signals=_worker_arrays["signals"]
+    )
+    return (
+        stop_loss_pct, take_profit_pct, position_size_pct,
+        result.final_balance,
+        (result.final_balance / _worker_balance - 1) * 100,
+        result.num_trades,
+        win_rate(result),
+        drawdown(result.equity)[0]
+    )
+
+
+def run_sweep(
+    df,
+    stop_loss_grid: Iterable[float],
+    take_profit_grid: Iterable[float],
+    position_size_grid: Iterable[float],
+    initial_balance: float = 10000,
+    processes: Optional[int] = None
+):
+    """
+    Backtest every combination of the parameter grids in a process pool.
+
+    Price, SMA and signal arrays are placed in shared memory once and
+    attached by each worker, so only parameter tuples and result rows
+    cross process boundaries.
+
+    Args:
+        df (pd.DataFrame): DataFrame from calculate_moving_averages
+        stop_loss_grid: Stop loss fractions to try
+        take_profit_grid: Take profit fractions to try
+        position_size_grid: Position size fractions to try
+        initial_balance (float): Starting cash
+        processes (int): Worker processes (defaults to CPU count)
+
+    Returns:
+        pd.DataFrame: One row per combination, ranked by final balance
+    """
+    import pandas as pd
+
+    close = column_values(df, "Close")
+    sma_10 = column_values(df, "SMA_10")
+    sma_50 = column_values(df, "SMA_50")
+    arrays = {
+        "close": close,
+        "sma_10": sma_10,
+        "sma_50": sma_50,
+        "signals": trading_signals(close, sma_10, sma_50),
+    }
+    combos = list(itertools.product(stop_loss_grid, take_profit_grid, position_size_grid))
+    processes = min(processes or os.cpu_count() or 1, max(len(combos), 1))
+    chunksize = max(1, len(combos) // (processes * 4))
+
+    shm, layout = pack_shared(arrays)
+    try:
+        with Pool(processes, initializer=_init_worker,
+                  initargs=(shm.name, layout, initial_balance)) as pool:
+            rows = list(pool.imap_unordered(_evaluate, combos, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    return results.sort_values(
+        ["final_balance", "max_drawdown_pct"], ascending=[False, True]
+    ).reset_index(drop=True)
+
+
+def parse_grid(spec: str) -> List[float]:
+    """
+    Parse a grid given as 'start:stop:step' (inclusive) or 'a,b,c'.
+
+    Values are percentages and are returned as fractions.
+    """
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        values = np.arange(start, stop + step / 2, step)
+    else:
+        values = [float(x) for x in spec.split(",")]
+    return [round(v / 100, 10) for v in values]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parameter sweep for the SMA backtest")
+    parser.add_argument("--ticker", default=None, help="Ticker symbol (defaults to config.TICKER)")
+    parser.add_argument("--period", default="60d", help="History period to fetch")
+    parser.add_argument("--stop-loss", default="0.5:10:0.5", help="Stop loss %% grid")
+    parser.add_argument("--take-profit", default="0.5:10:0.5", help="Take profit %% grid")
+    parser.add_argument("--position-size", default="50:100:10", help="Position size %% grid")
+    parser.add_argument("--balance", type=float, default=10000, help="Initial balance")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    parser.add_argument("--output", default=None, help="Write the full table to this CSV file")
+    args = parser.parse_args(argv)
+
+    from fetch_data import fetch_stock_data
+    from indicators import calculate_moving_averages
+    from config import TICKER
+
+    df = fetch_stock_data(ticker=args.ticker or TICKER, period=args.period)
+    if df is None or df.empty:
+        print("No data available for sweep")
+        return None
+    df = calculate_moving_averages(df)
+
+    results = run_sweep(
+        df,
+        parse_grid(args.stop_loss),
+        parse_grid(args.take_profit),
+        parse_grid(args.position_size),
+        initial_balance=args.balance,
+        processes=args.processes
+    )
+    print(f"\nEvaluated {len(results)} combinations")
+    print(results.head(args.top).to_string())
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\nResults written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,47 @@
 import unittest
+import importlib
+import importlib.util
+import inspect
+import sys
+import types
+import tempfile
+import time
+from unittest import mock
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from model import prepare_data, create_lstm_model
-from strategy import trading_signal
-from sentiment import get_news_sentiment
-from indicators import calculate_moving_averages
-from broker import place_trade
+from model import prepare_data, create_lstm_model, window_batches, save_artifacts
+import model
+from strategy import trading_signal, trading_signals, SIGNAL_NAMES
+from sentiment import get_news_sentiment, SentimentCache
+import sentiment
+from indicators import calculate_moving_averages, StreamingIndicators, IndicatorEngine, compute_indicators
+from broker import place_trade, set_journal, set_exchange
+from exchange import SimulatedExchange, OrderBook, Order
+from scheduler import Scheduler, MarketCalendar
+from zoneinfo import ZoneInfo
+from journal import TradeJournal
+import json
 from fetch_data import fetch_stock_data
+from engine import run_engine, run_engine_on_bars, run_engine_on_frame, trades_to_frame, TRADE_TYPES
+from sweep import run_sweep
+from walkforward import make_folds, run_walkforward, summarize_folds
+from portfolio import align_closes, run_portfolio
+from analytics import performance, round_trips, drawdown
+from robustness import block_bootstrap_paths, simulate_paths, run_robustness, confidence_intervals, backtest, shuffle_trades
+import bar_cache
+import barstore
+import benchmarks
+from synthetic import generate_ohlcv
+from downsample import minmax_indices, downsample_indices
+from metrics import MetricsRegistry
+import urllib.request
+from watchlist import fetch_watchlist, evaluate_watchlist
+
+# Optional heavy dependencies: their tests are skipped when missing, and the
+# modules that need them are imported inside those tests
+HAS_TENSORFLOW = importlib.util.find_spec('tensorflow') is not None
+HAS_TEXTBLOB = importlib.util.find_spec('textblob') is not None
 
 class TestTradingBot(unittest.TestCase):
     def setUp(self):
@@ -55,6 +89,22 @@ class TestTradingBot(unittest.TestCase):
         signal = trading_signal(price=14.0, sma_10=14.0, sma_50=14.0, sentiment=0)
         self.assertEqual(signal, "HOLD")
 
+    def test_trading_signals_array(self):
+        """Test array signals match the scalar rule, including edge cases"""
+        values = [0.0, 13.0, 13.5, 14.0, 14.2, 15.0, np.nan, np.inf]
+        grid = np.array(np.meshgrid(values, values, values)).reshape(3, -1)
+        signals = trading_signals(grid[0], grid[1], grid[2])
+        self.assertEqual(signals.dtype, np.int8)
+        for k, (price, sma_10, sma_50) in enumerate(grid.T):
+            self.assertEqual(
+                SIGNAL_NAMES[signals[k]],
+                trading_signal(price.item(), sma_10.item(), sma_50.item(), 0)
+            )
+            # numpy scalars (as read from DataFrames) follow the same rule
+            with np.errstate(all="ignore"):
+                self.assertEqual(SIGNAL_NAMES[signals[k]], trading_signal(price, sma_10, sma_50, 0))
+
+    @unittest.skipUnless(HAS_TEXTBLOB, 'textblob is not installed')
     def test_sentiment_analysis(self):
         """Test sentiment analysis"""
         sentiment = get_news_sentiment()
@@ -68,6 +118,7 @@ class TestTradingBot(unittest.TestCase):
         result = place_trade("SELL", quantity=10)
         self.assertTrue(result)
 
+    @unittest.skipUnless(HAS_TENSORFLOW, 'TensorFlow is not installed')
     def test_model(self):
         """Test LSTM model creation and data preparation"""
         # Test data preparation
@@ -79,6 +130,879 @@ class TestTradingBot(unittest.TestCase):
         model = create_lstm_model()
         self.assertEqual(model.layers[0].input_shape, (None, 50, 1))
 
+    def test_streaming_indicators(self):
+        """Test streaming SMAs match pandas rolling values exactly"""
+        rng = np.random.default_rng(3)
+        dates = pd.date_range(start='2024-01-01', periods=600, freq='15min')
+        df = pd.DataFrame({'Close': np.round(15 * np.exp(np.cumsum(rng.normal(0, 0.01, 600))), 2)}, index=dates)
+        expected = calculate_moving_averages(df)
+
+        stream = StreamingIndicators()
+        for end in range(300, 601, 25):
+            # Each cycle sees a shifting window whose last bar is still forming
+            latest = stream.advance(df.iloc[end - 300:end])
+            self.assertEqual(latest['SMA_10'], expected['SMA_10'].iloc[end - 1])
+            self.assertEqual(latest['SMA_50'], expected['SMA_50'].iloc[end - 1])
+
+    def test_indicator_engine(self):
+        """Test single-pass indicators match pandas and streaming matches batch"""
+        df = generate_ohlcv(3000, seed=4)
+        df.iloc[100, df.columns.get_loc('Close')] = np.nan
+        names = ['SMA_10', 'EMA_20', 'RSI_14', 'MACD_12_26_9', 'BB_20_2', 'ATR_14']
+        out = compute_indicators(df, names)
+        close, filled = df['Close'], df['Close'].ffill()
+
+        np.testing.assert_allclose(out['SMA_10'], close.rolling(10, min_periods=1).mean(), rtol=1e-9)
+        np.testing.assert_allclose(out['EMA_20'], filled.ewm(span=20, adjust=False).mean(), rtol=1e-9)
+        delta = filled.diff().fillna(0)
+        gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+        loss = (-delta).clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+        np.testing.assert_allclose(out['RSI_14'][1:], (100 - 100 / (1 + gain / loss))[1:], rtol=1e-9)
+        macd = filled.ewm(span=12, adjust=False).mean() - filled.ewm(span=26, adjust=False).mean()
+        np.testing.assert_allclose(out['MACD_12_26_9_signal'], macd.ewm(span=9, adjust=False).mean(),
+                                   rtol=1e-7, atol=1e-12)
+        std = close.rolling(20, min_periods=1).std(ddof=0)
+        np.testing.assert_allclose(out['BB_20_2_upper'], close.rolling(20, min_periods=1).mean() + 2 * std, rtol=1e-9)
+
+        single = compute_indicators(df, names, dtype=np.float32)
+        self.assertEqual(single['ATR_14'].dtype, np.float32)
+
+        engine = IndicatorEngine(names)
+        engine.prime(df.iloc[:2500])
+        for high, low, close_price in df[['High', 'Low', 'Close']].values[2500:]:
+            latest = engine.update(high, low, close_price)
+        for key, value in latest.items():
+            self.assertAlmostEqual(value, out[key][-1], delta=1e-7 * max(1.0, abs(value)))
+
+        # Leading NaNs stay NaN and recursive indicators start at the first close, as in pandas
+        df.iloc[:5, df.columns.get_loc('Close')] = np.nan
+        out = compute_indicators(df, names)
+        filled = df['Close'].ffill()
+        np.testing.assert_allclose(out['EMA_20'], filled.ewm(span=20, adjust=False).mean(), rtol=1e-9)
+        self.assertTrue(np.isnan(out['RSI_14'][:5]).all())
+        delta = filled.diff().fillna(0)
+        gain = delta.clip(lower=0)[5:].ewm(alpha=1 / 14, adjust=False).mean()
+        loss = (-delta).clip(lower=0)[5:].ewm(alpha=1 / 14, adjust=False).mean()
+        np.testing.assert_allclose(out['RSI_14'][6:], (100 - 100 / (1 + gain / loss))[1:], rtol=1e-9)
+        macd = filled.ewm(span=12, adjust=False).mean() - filled.ewm(span=26, adjust=False).mean()
+        np.testing.assert_allclose(out['MACD_12_26_9_signal'], macd.ewm(span=9, adjust=False).mean(),
+                                   rtol=1e-7, atol=1e-12)
+        self.assertFalse(np.isnan(out['ATR_14']).any())
+
+    def test_watchlist_evaluation(self):
+        """Test vectorized watchlist signals match per-ticker computation"""
+        rng = np.random.default_rng(5)
+        frames = {
+            f'T{i}': pd.DataFrame({'Close': 15 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))})
+            for i, n in enumerate([30, 80, 200, 200, 200, 200])
+        }
+        result = evaluate_watchlist(frames)
+        for ticker, df in frames.items():
+            df = calculate_moving_averages(df)
+            self.assertAlmostEqual(result.loc[ticker, 'SMA_10'], df['SMA_10'].iloc[-1])
+            self.assertAlmostEqual(result.loc[ticker, 'SMA_50'], df['SMA_50'].iloc[-1])
+            self.assertEqual(result.loc[ticker, 'signal'], trading_signal(
+                df['Close'].iloc[-1], df['SMA_10'].iloc[-1], df['SMA_50'].iloc[-1], 0))
+
+    def test_prepare_data_windows(self):
+        """Test strided float32 windows match explicit slicing"""
+        X, y = prepare_data(self.sample_data, lookback=20)
+        self.assertEqual(X.shape, (80, 20, 1))
+        self.assertEqual(X.dtype, np.float32)
+        self.assertTrue(np.shares_memory(X, y))  # Views over one scaled series
+        scaled = model.scaler.transform(self.sample_data[['Close']])[:, 0]
+        for i in (0, 41, 79):
+            np.testing.assert_allclose(X[i, :, 0], scaled[i:i + 20], atol=1e-6)
+            self.assertAlmostEqual(y[i], scaled[i + 20], places=6)
+
+        batches = list(window_batches(self.sample_data, lookback=20, batch_size=32))
+        self.assertEqual([len(b[1]) for b in batches], [32, 32, 16])
+        np.testing.assert_array_equal(np.concatenate([b[0] for b in batches]), X)
+
+    def test_lazy_imports(self):
+        """Test importing project modules does not load heavy dependencies"""
+        for module in ('main', 'model', 'sentiment', 'fetch_data', 'predictor'):
+            self.assertEqual(benchmarks.heavy_imports(module), [], module)
+
+    def test_backtest_engine(self):
+        """Test vectorized backtest engine against the bar-by-bar loop"""
+        rng = np.random.default_rng(42)
+        close = 15 * np.exp(np.cumsum(rng.normal(0, 0.01, 2000)))
+        df = calculate_moving_averages(pd.DataFrame({'Close': close}))
+        sma_10 = df['SMA_10'].to_numpy()
+        sma_50 = df['SMA_50'].to_numpy()
+
+        # Reference: the original per-bar loop
+        balance, position, entry_price, expected = 10000, 0, 0, []
+        for i in range(50, len(close)):
+            price = close[i].item()
+            if position > 0:
+                change = (price - entry_price) / entry_price
+                if change <= -0.02 or change >= 0.03:
+                    balance += position * price
+                    expected.append((i, 'STOP_LOSS' if change <= -0.02 else 'TAKE_PROFIT', balance))
+                    position = 0
+                    continue
+            decision = trading_signal(price, sma_10[i].item(), sma_50[i].item(), 0)
+            if decision == "BUY" and balance > price and position == 0:
+                position = (balance * 0.95) // price
+                balance -= position * price
+                entry_price = price
+                expected.append((i, 'BUY', balance))
+            elif decision == "SELL" and position > 0:
+                balance += position * price
+                expected.append((i, 'SELL', balance))
+                position = 0
+        if position > 0:
+            balance += position * close[-1].item()
+
+        result = run_engine(close, sma_10, sma_50, 10000, 0.02, 0.03, 0.95)
+        actual = list(zip(
+            result.trades['bar'].tolist(),
+            [TRADE_TYPES[t] for t in result.trades['type']],
+            result.trades['balance'].tolist()
+        ))
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(actual, expected)
+        self.assertEqual(result.final_balance, balance)
+
+    def test_portfolio_backtest(self):
+        """Test the portfolio engine shares capital and matches the single-ticker engine"""
+        df = generate_ohlcv(4000, seed=3, freq='15min')
+        single = run_portfolio(align_closes({'A': df}), max_positions=1)
+        expected = run_engine_on_frame(calculate_moving_averages(df))
+        self.assertGreater(expected.num_trades, 0)
+        np.testing.assert_array_equal(single.trades['bar'], expected.trades['bar'])
+        self.assertAlmostEqual(single.final_balance, expected.final_balance, places=6)
+
+        # A late-starting ticker with gaps on a shared calendar trades as it would alone
+        late = generate_ohlcv(6000, seed=5, freq='15min').iloc[1500::3]
+        closes = align_closes({'A': df, 'B': late})
+        single = run_portfolio(closes[['B']], max_positions=1)
+        expected = run_engine_on_frame(calculate_moving_averages(late))
+        self.assertGreater(expected.num_trades, 0)
+        np.testing.assert_array_equal(single.index[single.trades['bar']], late.index[expected.trades['bar']])
+        self.assertAlmostEqual(single.final_balance, expected.final_balance, places=6)
+
+        # Tickers on different calendars: one starts late, one has gaps
+        frames = {f'T{i}': generate_ohlcv(4000, seed=i, freq='15min') for i in range(8)}
+        frames['T1'] = frames['T1'].iloc[1000:]
+        frames['T2'] = frames['T2'].iloc[::2]
+        closes = align_closes(frames)
+        self.assertEqual(closes.shape, (4000, 8))
+        result = run_portfolio(closes, max_positions=3)
+        trades = result.trades_frame()
+        self.assertGreater(result.num_trades, 0)
+        self.assertTrue((trades['cash'] >= -1e-9).all())
+        self.assertGreaterEqual(trades[trades['ticker'] == 'T1']['date'].min(), frames['T1'].index[0])
+
+        # Never more than max_positions open at once
+        signed = np.where(trades['type'] == 'BUY', 1, -1)
+        self.assertLessEqual(np.cumsum(signed).max(), 3)
+        self.assertAlmostEqual(result.equity[-1], result.final_balance)
+
+    def test_performance_analytics(self):
+        """Test the equity curve and analytics against explicit per-bar bookkeeping"""
+        df = calculate_moving_averages(generate_ohlcv(3000, seed=2, freq='15min'))
+        result = run_engine_on_frame(df)
+        close = df['Close'].to_numpy()
+
+        cash, position, expected = 10000.0, 0.0, []
+        rows = dict(zip(result.trades['bar'].tolist(), range(result.num_trades)))
+        for i in range(len(close)):
+            if i in rows:
+                cash, position = result.trades['balance'][rows[i]], result.trades['position'][rows[i]]
+            expected.append(cash + position * close[i])
+        np.testing.assert_allclose(result.equity, expected)
+        self.assertAlmostEqual(result.equity[-1], result.final_balance)
+
+        trips = round_trips(result)
+        self.assertAlmostEqual(trips['pnl'].sum(), result.final_balance - result.initial_balance, places=6)
+        stats = performance(result)
+        self.assertEqual(stats['num_trades'], len(trips['pnl']))
+        # Same statistics as the batched simulation used for robustness analysis
+        simulated = simulate_paths(close[:, None])
+        self.assertAlmostEqual(stats['sharpe'], simulated['sharpe'][0])
+        self.assertAlmostEqual(stats['max_drawdown_pct'], simulated['max_drawdown_pct'][0])
+
+        self.assertEqual(drawdown(np.array([1.0, 2.0, 1.0, 1.5, 2.5, 2.0])), (50.0, 2))
+
+        def exposure_and_turnover(result):
+            # Bars holding shares, and the value of every executed fill
+            position, held, traded = 0.0, [], 0.0
+            rows = dict(zip(result.trades['bar'].tolist(), range(result.num_trades)))
+            for i in range(len(result.equity)):
+                if i in rows:
+                    shares = result.trades['position'][rows[i]]
+                    traded += abs(shares - position) * result.trades['price'][rows[i]]
+                    position = shares
+                held.append(position > 0)
+            return np.mean(held) * 100, traded / result.equity.mean()
+
+        # A position still open at the end is held through the last bar and never sold
+        longest = np.argmax(trips['exit_bar'] - trips['entry_bar'])
+        truncated = run_engine_on_frame(df.iloc[:trips['exit_bar'][longest]])
+        self.assertTrue(round_trips(truncated)['is_open'][-1])
+        for backtest in (result, truncated):
+            stats = performance(backtest)
+            exposure, turnover = exposure_and_turnover(backtest)
+            self.assertAlmostEqual(stats['exposure_pct'], exposure)
+            self.assertAlmostEqual(stats['turnover'], turnover)
+
+    def test_robustness(self):
+        """Test batched path simulation matches the engine and resampling is reproducible"""
+        df = generate_ohlcv(1500, seed=5, freq='15min')
+        paths = block_bootstrap_paths(df['Close'].values, 20, 32, np.random.default_rng(0))
+        self.assertEqual(paths.shape, (1500, 20))
+        self.assertTrue(np.all(paths[0] == df['Close'].iloc[0]))
+        stats = simulate_paths(paths)
+        for j in range(paths.shape[1]):
+            close = pd.Series(paths[:, j])
+            expected = run_engine(paths[:, j], close.rolling(10, min_periods=1).mean().values,
+                                  close.rolling(50, min_periods=1).mean().values)
+            self.assertAlmostEqual(stats['final_balance'][j], expected.final_balance, places=6)
+
+        serial = run_robustness(df, n_paths=300, chunk_paths=100, processes=1)
+        parallel = run_robustness(df, n_paths=300, chunk_paths=100, processes=2)
+        pd.testing.assert_frame_equal(serial, parallel)
+        intervals = confidence_intervals(serial, 0.9)
+        self.assertTrue((intervals['lower'] <= intervals['median']).all())
+        self.assertTrue((intervals['median'] <= intervals['upper']).all())
+        self.assertGreater(intervals.loc['return_pct', 'upper'], intervals.loc['return_pct', 'lower'])
+
+        shuffled = run_robustness(df, n_paths=50, method='shuffle')
+        # Reordering trades changes the drawdown, never the final return
+        self.assertAlmostEqual(shuffled['return_pct'].std(), 0.0, places=9)
+        # Both methods share one SMA implementation, and the observed order is measured like the shuffles
+        close = df['Close'].to_numpy()
+        observed = backtest(close)
+        self.assertAlmostEqual(observed.final_balance, simulate_paths(close[:, None])['final_balance'][0], places=6)
+        unshuffled = shuffle_trades(observed, 1, None, n_bars=len(close))
+        self.assertAlmostEqual(unshuffled['return_pct'][0], shuffled['return_pct'].iloc[0], places=9)
+
+        # A position still open at the end is one of the shuffled round trips
+        close = generate_ohlcv(1500, seed=2)['Close'].to_numpy()
+        holding = backtest(close)
+        self.assertTrue(round_trips(holding)['is_open'][-1])
+        expected = (holding.final_balance / holding.initial_balance - 1) * 100
+        for stats in (shuffle_trades(holding, 1, None), shuffle_trades(holding, 20, np.random.default_rng(1))):
+            np.testing.assert_allclose(stats['return_pct'], expected, rtol=1e-9)
+            self.assertEqual(stats['num_trades'][0], len(round_trips(holding)['pnl']))
+
+    def test_walkforward(self):
+        """Test walk-forward folds are out of sample and reproducible"""
+        self.assertEqual(make_folds(10, 4, 2), [(0, 4, 6), (2, 6, 8), (4, 8, 10)])
+        self.assertEqual(make_folds(10, 4, 3, anchored=True), [(0, 4, 7), (0, 7, 10)])
+
+        rng = np.random.default_rng(3)
+        n = 3000
+        df = pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))},
+                          index=pd.date_range('2024-01-01', periods=n, freq='15min'))
+        df = calculate_moving_averages(df)
+        grids = ([0.01, 0.02], [0.02, 0.04], [0.95])
+        results = run_walkforward(df, *grids, train_bars=1000, test_bars=500, processes=2)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(results.equals(run_walkforward(df, *grids, train_bars=1000, test_bars=500, processes=1)))
+
+        # Each fold's test row matches a direct backtest of its test window
+        row = results.iloc[1]
+        start, stop = int(row['train_end']), int(row['test_end'])
+        result = run_engine(df['Close'].values[start:stop], df['SMA_10'].values[start:stop],
+                            df['SMA_50'].values[start:stop], stop_loss_pct=row['stop_loss_pct'],
+                            take_profit_pct=row['take_profit_pct'],
+                            position_size_pct=row['position_size_pct'], warmup=0)
+        self.assertAlmostEqual(row['test_return_pct'], (result.final_balance / 10000 - 1) * 100)
+        self.assertEqual(summarize_folds(results)['folds'], 4)
+
+    def test_synthetic_data(self):
+        """Test the synthetic OHLCV generator is seeded and consistent"""
+        df = generate_ohlcv(5000, seed=7)
+        self.assertTrue(df.equals(generate_ohlcv(5000, seed=7)))
+        self.assertFalse(df.equals(generate_ohlcv(5000, seed=8)))
+        self.assertEqual(list(df.columns), ['Open', 'High', 'Low', 'Close', 'Volume'])
+        self.assertTrue((df['High'] >= df[['Open', 'Close']].max(axis=1)).all())
+        self.assertTrue((df['Low'] <= df[['Open', 'Close']].min(axis=1)).all())
+        self.assertTrue((df['Open'].values[1:] == df['Close'].values[:-1]).all())
+
+    def test_chart_downsampling(self):
+        """Test min/max downsampling keeps extremes and trade bars exact"""
+        close = generate_ohlcv(100_003, seed=2)['Close'].to_numpy()
+        close[500] = np.nan
+        indices = minmax_indices(close, 1000)
+        self.assertLessEqual(len(indices), 2002)
+        self.assertEqual((indices[0], indices[-1]), (0, len(close) - 1))
+        self.assertEqual(np.nanmax(close[indices]), np.nanmax(close))
+        self.assertEqual(np.nanmin(close[indices]), np.nanmin(close))
+        # Every bucket's extremes survive, not just the global ones
+        self.assertEqual(np.nanmax(close[:101]), np.nanmax(close[indices[indices < 101]]))
+        np.testing.assert_array_equal(minmax_indices(close[:50], 1000), np.arange(50))
+
+        sma = pd.Series(close).rolling(50, min_periods=1).mean().to_numpy()
+        shared = downsample_indices([close, sma], 1000, keep=[12345, 67890, -1])
+        self.assertTrue({12345, 67890} <= set(shared))
+        self.assertTrue(set(indices) <= set(shared))
+        self.assertEqual(sma[shared].max(), sma.max())
+
+    def test_benchmark_regressions(self):
+        """Test benchmark results are compared against a baseline"""
+        def run(seconds):
+            return {"results": {name: {"seconds": value} for name, value in seconds.items()}}
+        baseline = run({"a[1000]": 0.1, "b[1000]": 0.1, "c[1000]": 0.0001})
+        current = run({"a[1000]": 0.11, "b[1000]": 0.2, "c[1000]": 0.0005, "d[1000]": 1.0})
+        regressions = benchmarks.compare_to_baseline(current, baseline, tolerance=0.25)
+        self.assertEqual([r["benchmark"] for r in regressions], ["b[1000]"])
+
+    def test_parameter_sweep(self):
+        """Test parallel sweep results match single engine runs"""
+        rng = np.random.default_rng(7)
+        df = calculate_moving_averages(pd.DataFrame({
+            'Close': 15 * np.exp(np.cumsum(rng.normal(0, 0.01, 1000)))
+        }))
+        results = run_sweep(df, [0.01, 0.02], [0.03], [0.5, 0.95], processes=2)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(results['final_balance'].is_monotonic_decreasing)
+
+        best = results.iloc[0]
+        result = run_engine(
+            df['Close'].to_numpy(), df['SMA_10'].to_numpy(), df['SMA_50'].to_numpy(),
+            10000, best['stop_loss_pct'], best['take_profit_pct'], best['position_size_pct']
+        )
+        self.assertEqual(result.final_balance, best['final_balance'])
+
+class TestBarCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(bar_cache, 'CACHE_DIR', self.cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.cache_dir.cleanup)
+
+        end = pd.Timestamp.now(tz='America/Sao_Paulo').floor('15min')
+        dates = pd.date_range(end=end, periods=100, freq='15min')
+        self.bars = pd.DataFrame(
+            {col: np.arange(100, dtype=float) for col in ['Open', 'High', 'Low', 'Close', 'Volume']},
+            index=dates
+        )
+
+    def test_incremental_fetch(self):
+        """Test that only bars after the last cached timestamp are fetched"""
+        bar_cache.save_bars(self.bars.iloc[:90], 'TEST', '15m')
+        with mock.patch('yfinance.download', return_value=self.bars.iloc[89:]) as download:
+            df = fetch_stock_data(ticker='TEST', period='1d', interval='15m')
+        self.assertEqual(download.call_args.kwargs['start'], self.bars.index[89])
+        pd.testing.assert_frame_equal(df, bar_cache.trim_to_period(self.bars, '1d'), check_freq=False)
+        pd.testing.assert_frame_equal(bar_cache.load_bars('TEST', '15m'), self.bars, check_freq=False)
+
+    def test_longer_period_refetch(self):
+        """Test that a cache shorter than the requested period triggers a full download"""
+        bar_cache.save_bars(self.bars.iloc[-10:], 'TEST', '15m')
+        with mock.patch('yfinance.download', return_value=self.bars) as download:
+            df = fetch_stock_data(ticker='TEST', period='60d', interval='15m')
+        self.assertEqual(download.call_args.kwargs['period'], '60d')
+        self.assertNotIn('start', download.call_args.kwargs)
+        self.assertEqual(len(df), 100)
+
+    def test_watchlist_fetch(self):
+        """Test batched watchlist fetch isolates per-ticker failures"""
+        raw = pd.concat({'AAA': self.bars, 'BBB': self.bars * 2}, axis=1).swaplevel(axis=1)
+        raw.columns.names = ['Price', 'Ticker']
+        with mock.patch('yfinance.download', return_value=raw) as download:
+            frames, errors = fetch_watchlist(['AAA', 'BBB', 'MISSING'], interval='15m', batch_size=2)
+        self.assertEqual(download.call_count, 2)
+        self.assertEqual(sorted(frames), ['AAA', 'BBB'])
+        self.assertIn('MISSING', errors)
+        self.assertEqual(frames['BBB']['Close'].iloc[-1].item(), 198.0)
+        self.assertIsNotNone(bar_cache.load_bars('AAA', '15m'))
+
+        # A ticker whose cache does not reach the period start forces a full batch download
+        bar_cache.save_bars(self.bars.iloc[-10:], 'BBB', '15m')
+        with mock.patch('yfinance.download', return_value=raw) as download:
+            frames, _ = fetch_watchlist(['AAA', 'BBB'], period='1d', interval='15m')
+        self.assertIn('start', download.call_args.kwargs)
+        with mock.patch('yfinance.download', return_value=raw) as download:
+            frames, _ = fetch_watchlist(['AAA', 'BBB'], period='60d', interval='15m')
+        self.assertEqual(download.call_args.kwargs['period'], '60d')
+        self.assertEqual(len(frames['BBB']), 100)
+
+    def test_offline_mode(self):
+        """Test that offline mode serves the cache without network access"""
+        bar_cache.save_bars(self.bars, 'TEST', '15m')
+        with mock.patch('yfinance.download') as download:
+            df = fetch_stock_data(ticker='TEST', interval='15m', offline=True)
+            self.assertIsNone(fetch_stock_data(ticker='OTHER', interval='15m', offline=True))
+        download.assert_not_called()
+        self.assertEqual(len(df), 100)
+
+class TestBarStore(unittest.TestCase):
+    def test_memory_mapped_ranges(self):
+        """Test the columnar store round-trips bars and serves zero-copy ranges"""
+        df = generate_ohlcv(20_000, seed=5, freq='15min', tz='America/Sao_Paulo')
+        with tempfile.TemporaryDirectory() as tmp:
+            barstore.write_bars(df.iloc[:15_000], "PETR4.SA", "15m", tmp, index_stride=256)
+            before = barstore.open_bars("PETR4.SA", "15m", tmp)
+            with mock.patch.object(barstore, '_write_rows', wraps=barstore._write_rows) as write_rows:
+                barstore.append_bars(df.iloc[14_000:], "PETR4.SA", "15m", tmp)
+            self.assertEqual(write_rows.call_args.args[2], 14_000)  # Rows before the overlap are not rewritten
+            self.assertEqual(len(before), 15_000)  # Open readers keep their committed rows
+            bars = barstore.open_bars("PETR4.SA", "15m", tmp)
+
+            self.assertEqual(len(bars), len(df))
+            np.testing.assert_array_equal(bars.close, df['Close'].to_numpy(np.float32))
+            np.testing.assert_array_equal(bars.volume, df['Volume'].to_numpy())
+            self.assertTrue(bars.index.equals(df.index))
+
+            for a, b in [(0, 0), (255, 256), (3000, 17_777), (19_000, 19_999)]:
+                view = bars.range(df.index[a], df.index[b])
+                self.assertEqual((len(view), view.timestamps[0]), (b - a + 1, df.index[a].value))
+                self.assertTrue(np.shares_memory(view.close, bars.close))
+            # Bounds between bars, naive bounds in the market time zone, and nested ranges
+            between = bars.range(df.index[100] + pd.Timedelta('1min'), df.index[200].tz_localize(None))
+            self.assertEqual(len(between), 100)
+            self.assertEqual(len(between.range(df.index[150])), 51)
+            self.assertEqual(len(bars.range(end=df.index[0] - pd.Timedelta('1d'))), 0)
+
+            # Readers take Bars directly
+            view = bars.range(df.index[5000], df.index[15_000])
+            frame = calculate_moving_averages(view.to_frame())
+            expected = run_engine_on_frame(frame)
+            result = run_engine_on_bars(view)
+            self.assertGreater(result.num_trades, 0)
+            self.assertEqual(result.final_balance, expected.final_balance)
+            X, y = prepare_data(view)
+            self.assertEqual(X.shape, (len(view) - 50, 50, 1))
+
+@unittest.skipUnless(HAS_TEXTBLOB, 'textblob is not installed')
+class TestSentimentCache(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(sentiment, 'sentiment_cache', SentimentCache(ttl=900, max_articles=2))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.response = mock.Mock()
+        self.response.json.return_value = {'articles': [
+            {'title': 'Ibovespa sobe', 'description': 'good great news'},
+            {'title': 'Ibovespa cai', 'description': 'bad terrible news'},
+        ]}
+
+    def test_query_ttl(self):
+        """Test repeated calls within the TTL make no HTTP request"""
+        with mock.patch('requests.get', return_value=self.response) as get:
+            first = get_news_sentiment()
+            second = get_news_sentiment()
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.stats['query_hits'], 1)
+
+    def test_article_memoization(self):
+        """Test articles seen before are not re-analyzed after the TTL expires"""
+        import textblob
+
+        self.cache.ttl = 0
+        with mock.patch('requests.get', return_value=self.response) as get, \
+                mock.patch('textblob.TextBlob', wraps=textblob.TextBlob) as blob:
+            get_news_sentiment()
+            get_news_sentiment()
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(blob.call_count, 2)
+        self.assertEqual(self.cache.stats['article_hits'], 2)
+
+        # LRU eviction keeps at most max_articles entries
+        self.cache.polarity('another article')
+        self.assertEqual(len(self.cache._articles), 2)
+
+@unittest.skipUnless(HAS_TENSORFLOW, 'TensorFlow is not installed')
+class TestPredictor(unittest.TestCase):
+    def test_batched_prediction(self):
+        """Test the warm predictor serves batched forecasts from saved artifacts"""
+        from predictor import LSTMPredictor
+
+        rng = np.random.default_rng(11)
+        df = pd.DataFrame({'Close': rng.uniform(10, 20, 100)})
+        prepare_data(df, lookback=10)  # Fits the module scaler
+        lstm = create_lstm_model(lookback=10)
+
+        with tempfile.TemporaryDirectory() as directory:
+            save_artifacts(lstm, directory)
+            predictor = LSTMPredictor(directory)
+
+        series = {'AAA': df['Close'], 'BBB': df['Close'] * 1.1, 'SHORT': df['Close'][:5]}
+        forecasts = predictor.predict(series)
+        self.assertTrue(np.isnan(forecasts['SHORT']))
+
+        window = model.scaler.transform(df[['Close']].iloc[-10:]).reshape(1, 10, 1)
+        expected = model.scaler.inverse_transform(lstm.predict(window, verbose=0))[0, 0]
+        self.assertAlmostEqual(forecasts['AAA'], expected, places=3)
+        self.assertEqual(len(predictor.latencies_ms), 1)
+        self.assertGreaterEqual(predictor.latency_stats()['p99'], 0)
+
+@unittest.skipUnless(HAS_TENSORFLOW, 'TensorFlow is not installed')
+class TestTraining(unittest.TestCase):
+    def test_versioned_fine_tuning(self):
+        """Test full training, warm-start fine-tuning and versioned artifacts"""
+        from train import train_model, read_meta
+
+        df = generate_ohlcv(600, seed=8, freq='15min')
+        with tempfile.TemporaryDirectory() as directory:
+            first = train_model(df.iloc[:500], directory, lookback=10, epochs=2, seed=1)
+            self.assertEqual((first['version'], first['parent'], first['new_bars']), (1, None, 500))
+            _, scaler = model.load_artifacts(directory)
+            fitted = (scaler.data_min_[0], scaler.data_max_[0])
+
+            second = train_model(df, directory, epochs=2, replay_bars=20, seed=1)
+            self.assertEqual((second['version'], second['parent'], second['new_bars']), (2, 'v1', 100))
+            self.assertEqual(second['samples'] + int(120 * 0.1), 120)  # New and replayed bars only
+            self.assertEqual(second['trained_through'], df.index[-1].isoformat())
+            self.assertEqual(read_meta(model.latest_version(directory)), second)
+
+            # The persisted scaler is reused, not refit on the new bars
+            _, scaler = model.load_artifacts(directory)
+            self.assertEqual((scaler.data_min_[0], scaler.data_max_[0]), fitted)
+            X, _ = prepare_data(df, lookback=10, scaler=scaler)
+            np.testing.assert_allclose(X[-1, :, 0], scaler.transform(df[['Close']].iloc[-11:-1])[:, 0], atol=1e-6)
+
+            # No new bars: nothing is trained
+            self.assertEqual(train_model(df, directory)['version'], 2)
+            self.assertTrue(model.artifacts_exist(directory))
+
+    def test_walkforward_lstm_refit(self):
+        """Test per-fold LSTM refits run in worker processes after TensorFlow is loaded here"""
+        import tensorflow as tf
+
+        tf.constant(1.0) + 1  # Initialize the TensorFlow runtime in the parent
+        df = calculate_moving_averages(generate_ohlcv(700, seed=4, freq='15min'))
+        results = run_walkforward(df, [0.02], [0.03], [0.95], train_bars=400, test_bars=150,
+                                  refit_lstm=True, lstm_epochs=1, processes=2)
+        self.assertEqual(len(results), 2)
+        self.assertTrue(np.isfinite(results['lstm_rmse']).all())
+        self.assertTrue(results['lstm_direction_acc'].between(0, 1).all())
+
+@unittest.skipUnless(HAS_TENSORFLOW, 'TensorFlow is not installed')
+class TestDataset(unittest.TestCase):
+    def test_sharded_window_cache(self):
+        """Test per-ticker scaled float32 shards, incremental rebuilds and the tf.data pipeline"""
+        from dataset import build_dataset, make_tf_dataset, measure_input_throughput
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache_dir = f'{directory}/cache'
+            frames = {'LOW': generate_ohlcv(300, seed=1, start_price=5),
+                      'LOW_B': generate_ohlcv(260, seed=2, start_price=300)}
+            for ticker, df in frames.items():
+                bar_cache.save_bars(df, ticker, '15m', cache_dir)
+
+            with mock.patch('bar_cache.CACHE_DIR', cache_dir):
+                build = lambda: build_dataset(list(frames) + ['NONE'], '15m', 10, f'{directory}/ds', shard_windows=100)
+                manifest = build()
+                self.assertEqual(manifest['missing'], ['NONE'])
+                self.assertEqual(manifest['samples'], 290 + 250)
+                self.assertEqual(len(manifest['tickers']['LOW']['shards']), 3)
+
+                # Windows match prepare_data with a scaler fitted on that ticker only (which scales in float32)
+                X, y = prepare_data(frames['LOW_B'], lookback=10)
+                shard = np.load(f"{manifest['path']}/{manifest['tickers']['LOW_B']['shards'][0]['file']}")
+                self.assertEqual(shard.dtype, np.float32)
+                np.testing.assert_allclose(shard[:, :10], X[:100, :, 0], atol=1e-5)
+                np.testing.assert_allclose(shard[:, 10], y[:100], atol=1e-5)
+
+                self.assertEqual(build()['rebuilt'], [])
+                bar_cache.save_bars(generate_ohlcv(320, seed=1, start_price=5), 'LOW', '15m', cache_dir)
+                manifest = build()
+                self.assertEqual(manifest['rebuilt'], ['LOW'])
+                self.assertEqual(manifest['samples'], 310 + 250)
+
+                # Revised history with the same row count and last bar is rebuilt too
+                revised = generate_ohlcv(320, seed=1, start_price=5)
+                revised.iloc[5, revised.columns.get_loc('Close')] *= 1.01
+                bar_cache.save_bars(revised, 'LOW', '15m', cache_dir)
+                manifest = build()
+                self.assertEqual(manifest['rebuilt'], ['LOW'])
+
+            dataset = make_tf_dataset(manifest, batch_size=64, seed=0)
+            batches = list(dataset)
+            self.assertEqual(batches[0][0].shape, (64, 10, 1))
+            self.assertEqual(sum(int(y.shape[0]) for _, y in batches), 560)
+            # A seeded shuffle is reproducible
+            again = list(make_tf_dataset(manifest, batch_size=64, seed=0))
+            for (_, y), (_, y_again) in zip(batches, again):
+                np.testing.assert_array_equal(y, y_again)
+            self.assertGreater(measure_input_throughput(dataset)['samples_per_sec'], 0)
+
+class TestTradeJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = f"{self.directory.name}/trades.jsonl"
+
+    def read_records(self):
+        with open(self.path) as file:
+            return [json.loads(line) for line in file]
+
+    def test_batched_journal(self):
+        """Test queued records are all written when the journal is closed"""
+        journal = TradeJournal(self.path, batch_size=16, flush_interval=60)
+        for i in range(100):
+            journal.record(order_type="BUY", quantity=i + 1)
+        self.assertTrue(journal.close(timeout=5))
+        records = self.read_records()
+        self.assertEqual([r['quantity'] for r in records], list(range(1, 101)))
+        self.assertEqual(journal.records_written, 100)
+        self.assertTrue(journal.flush(timeout=None))  # Returns at once after close
+
+    def test_journal_serialization(self):
+        """Test numpy fields are serialized and unserializable records fail at the call site"""
+        journal = TradeJournal(self.path, batch_size=16, flush_interval=60)
+        journal.record(order_type="BUY", quantity=np.int64(3), price=np.float32(10.5), timestamp=0.0)
+        with self.assertRaises(TypeError):
+            journal.record(order_type="BUY", quantity=object())
+        journal.record()
+        self.assertTrue(journal.close(timeout=5))
+        records = self.read_records()
+        self.assertEqual(journal.records_written, 2)
+        self.assertEqual((records[0]['quantity'], records[0]['price']), (3, 10.5))
+        self.assertEqual(records[0]['timestamp'], datetime.fromtimestamp(0.0).isoformat(timespec="microseconds"))
+        self.assertEqual(list(records[1]), ['timestamp'])
+
+    def test_place_trade_fsync_journal(self):
+        """Test place_trade records orders through the journal"""
+        journal = TradeJournal(self.path, fsync=True)
+        previous = set_journal(journal)
+        self.addCleanup(set_journal, previous)
+
+        self.assertTrue(place_trade("SELL", quantity=3, ticker="PETR4.SA"))
+        self.assertTrue(journal.flush(timeout=5))
+        record = self.read_records()[-1]
+        self.assertEqual((record['order_type'], record['quantity'], record['ticker']), ("SELL", 3, "PETR4.SA"))
+        journal.close()
+
+class TestExchange(unittest.TestCase):
+    def test_order_matching(self):
+        """Test price-time priority, limit resting and partial fills"""
+        book = OrderBook()
+        book.add(Order(1, "SELL", 5, "X", 10.02))
+        book.add(Order(2, "SELL", 5, "X", 10.01))
+        book.add(Order(3, "SELL", 5, "X", 10.01))
+        fills = book.match(Order(4, "BUY", 12, "X", 10.01))
+        self.assertEqual([(f.price, f.quantity) for f in fills], [(10.01, 5), (10.01, 5)])
+        self.assertEqual(book.best_bid(), 10.01)  # Unfilled remainder rests
+        self.assertEqual(book.best_ask(), 10.02)
+        self.assertEqual(book.match(Order(5, "SELL", 1, "X"))[0].price, 10.01)
+
+    def test_simulated_exchange(self):
+        """Test asynchronous fills with slippage and routing through place_trade"""
+        exchange = SimulatedExchange(latency_ms=1, jitter_ms=0, slippage_bps=10,
+                                     reference_prices={"PETR4.SA": 30.0, "X": 10.0}, seed=0)
+        self.addCleanup(exchange.close)
+        report = exchange.submit("BUY", 10, "PETR4.SA").result(timeout=5)
+        self.assertEqual(report.status, "FILLED")
+        self.assertAlmostEqual(report.average_price, 30.01 * 1.001, places=4)
+        self.assertGreaterEqual(report.latency_ms, 1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = TradeJournal(f"{tmp}/trades.jsonl")
+            previous_journal = set_journal(journal)
+            previous_exchange = set_exchange(exchange)
+            try:
+                self.assertTrue(place_trade("SELL", quantity=5, ticker="PETR4.SA"))
+                for _ in range(100):
+                    journal.flush(timeout=5)
+                    with open(journal.path) as file:
+                        events = [json.loads(line)['event'] for line in file]
+                    if "ORDER_FILLED" in events:
+                        break
+                    time.sleep(0.01)
+                self.assertEqual(events, ["ORDER_SUBMITTED", "ORDER_FILLED"])
+            finally:
+                set_exchange(previous_exchange)
+                set_journal(previous_journal)
+                journal.close()
+
+        # A limit sell that sweeps the bids and rests below the last fill leaves the book uncrossed
+        sweep = exchange.submit("SELL", 20000, "X", price=9.80).result(timeout=5)
+        self.assertEqual(sweep.status, "PARTIAL")
+        book = exchange.books["X"]
+        self.assertEqual(book.best_ask(), 9.80)
+        for side in ("BUY", "SELL", "BUY"):
+            exchange.submit(side, 10, "X").result(timeout=5)
+            self.assertLess(book.best_bid(), book.best_ask())
+
+        # Orders submitted after close fail instead of hanging
+        exchange.close()
+        with self.assertRaises(RuntimeError):
+            exchange.submit("BUY", 1, "PETR4.SA").result(timeout=1)
+
+class TestScheduler(unittest.TestCase):
+    def make_scheduler(self, start):
+        clock = {"now": start}
+        def sleep(seconds):
+            clock["now"] += timedelta(seconds=seconds)
+        return clock, Scheduler("15m", MarketCalendar(), bar_delay=20, retry_base=5, max_attempts=3,
+                                clock=lambda: clock["now"], sleep=sleep)
+
+    def test_bar_schedule(self):
+        """Test bar-aligned wakeups, independent cadences and off-market skipping"""
+        tz = ZoneInfo("America/Sao_Paulo")
+        clock, scheduler = self.make_scheduler(datetime(2024, 3, 1, 20, 0, tzinfo=tz))  # Friday evening
+        runs = {"data": [], "signal": [], "sentiment": []}
+        scheduler.add_job("sentiment", lambda t: runs["sentiment"].append(clock["now"]) or True, every=900)
+        scheduler.add_job("data", lambda t: runs["data"].append(t) or True, on_bar=True)
+        scheduler.add_job("signal", lambda t: runs["signal"].append(t) or True, after="data")
+        scheduler.run(until=datetime(2024, 3, 5, 0, 0, tzinfo=tz))
+
+        # Weekend skipped; 31 quarter-hour bars plus the 17:55 session close on Monday
+        self.assertEqual(len(runs["data"]), 32)
+        self.assertEqual(runs["data"][0], datetime(2024, 3, 4, 10, 15, tzinfo=tz))
+        self.assertEqual(runs["data"][-1], datetime(2024, 3, 4, 17, 55, tzinfo=tz))
+        self.assertEqual(runs["signal"], runs["data"])
+        self.assertEqual(len(runs["sentiment"]), 32)
+        self.assertTrue(all(scheduler.calendar.is_open(t) for t in runs["sentiment"]))
+
+    def test_late_bar_retry(self):
+        """Test backoff retries when a bar is published late"""
+        tz = ZoneInfo("America/Sao_Paulo")
+        clock, scheduler = self.make_scheduler(datetime(2024, 3, 4, 10, 5, tzinfo=tz))
+        attempts = []
+        def fetch(bar_close):
+            attempts.append(clock["now"])
+            return len(attempts) >= 3
+        scheduler.add_job("data", fetch, on_bar=True, retry=True)
+        scheduler.run(until=datetime(2024, 3, 4, 10, 20, tzinfo=tz))
+
+        start = datetime(2024, 3, 4, 10, 15, 20, tzinfo=tz)
+        self.assertEqual(attempts, [start, start + timedelta(seconds=5), start + timedelta(seconds=15)])
+        self.assertEqual(scheduler.next_wakeup("data"), datetime(2024, 3, 4, 10, 30, 20, tzinfo=tz))
+        bar_close = datetime(2024, 3, 4, 10, 15, tzinfo=tz)
+        self.assertTrue(scheduler.bar_available(pd.Timestamp("2024-03-04 10:00", tz=tz), bar_close))
+        self.assertFalse(scheduler.bar_available(pd.Timestamp("2024-03-04 09:45"), bar_close))
+
+    def test_watchlist_late_bar_retry(self):
+        """Test the watchlist retries only tickers whose bar is late and trades each once per bar"""
+        import main
+
+        tz = ZoneInfo("America/Sao_Paulo")
+        clock, scheduler = self.make_scheduler(datetime(2024, 3, 4, 10, 5, tzinfo=tz))
+        advance = scheduler.sleep
+        def sleep(seconds):
+            if clock["now"] > datetime(2024, 3, 4, 10, 20, tzinfo=tz):
+                raise KeyboardInterrupt  # Ends run_watchlist's scheduler loop
+            advance(seconds)
+        scheduler.sleep = sleep
+
+        closes = np.append(np.full(59, 10.0), 9.7)  # SELL on the last bar
+        fetched = []
+        def fetch(tickers):
+            fetched.append(list(tickers))
+            late = len(fetched) < 3
+            frames = {}
+            for ticker in tickers:
+                end = pd.Timestamp("2024-03-04 09:45" if ticker == "LATE" and late else "2024-03-04 10:00", tz=tz)
+                frames[ticker] = pd.DataFrame({"Close": closes}, index=pd.date_range(end=end, periods=60, freq="15min"))
+            return frames, {}
+
+        with mock.patch("scheduler.Scheduler", return_value=scheduler), \
+                mock.patch("watchlist.fetch_watchlist", side_effect=fetch), \
+                mock.patch("predictor.load_predictor", return_value=None), \
+                mock.patch("broker.place_trade", return_value=True) as place, \
+                mock.patch.object(main, "start_metrics"):
+            main.run_watchlist(["AAA", "LATE"])
+
+        self.assertEqual(fetched[:3], [["AAA", "LATE"], ["LATE"], ["LATE"]])
+        self.assertEqual(sorted(call.kwargs["ticker"] for call in place.call_args_list), ["AAA", "LATE"])
+
+class TestMetrics(unittest.TestCase):
+    def test_stage_metrics(self):
+        """Test stage spans, error counters and the Prometheus endpoint"""
+        registry = MetricsRegistry(prefix="test")
+        with registry.timed("fetch"):
+            time.sleep(0.002)
+        with self.assertRaises(ValueError):
+            with registry.timed("order"):
+                raise ValueError("rejected")
+        registry.counter("cycles_skipped_total", "Skipped cycles", reason="no_data").inc()
+        registry.counter_callback("cache_requests_total", lambda: 7, "Cache lookups", cache="sentiment_query")
+
+        fetch = registry.histogram("stage_duration_seconds", stage="fetch")
+        self.assertEqual(fetch.count, 1)
+        self.assertGreaterEqual(fetch.sum, 0.002)
+        histogram = registry.histogram("latency_seconds", buckets=(0.01, 0.1, 1.0))
+        for value in (0.005, 0.05, 0.06, 5.0):
+            histogram.observe(value)
+        self.assertEqual((histogram.quantile(0.5), histogram.quantile(0.99)), (0.1, float("inf")))
+
+        server = registry.serve(0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.assertEqual(server.server_address[0], "127.0.0.1")  # Not exposed on all interfaces by default
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+            text = response.read().decode()
+        self.assertIn('test_stage_duration_seconds_bucket{stage="fetch",le="+Inf"} 1', text)
+        self.assertIn('test_stage_duration_seconds_count{stage="order"} 1', text)
+        self.assertIn('test_errors_total{stage="order"} 1.0', text)
+        self.assertIn('test_cycles_skipped_total{reason="no_data"} 1.0', text)
+        self.assertIn('test_cache_requests_total{cache="sentiment_query"} 7.0', text)
+        self.assertIn('# TYPE test_stage_duration_seconds histogram', text)
+
+class TestDashboard(unittest.TestCase):
+    def setUp(self):
+        """Import ui against a stub streamlit whose cache_data memoizes like the real one"""
+        def cache_data(**options):
+            def decorator(func):
+                signature, cache = inspect.signature(func), {}
+                def cached(*args, **kwargs):
+                    # Arguments starting with an underscore are not hashed, as in streamlit
+                    arguments = signature.bind(*args, **kwargs).arguments
+                    key = tuple((name, value) for name, value in arguments.items() if not name.startswith('_'))
+                    if key not in cache:
+                        cache[key] = func(*args, **kwargs)
+                    return cache[key]
+                cached.clear = cache.clear
+                return cached
+            return decorator
+
+        streamlit = types.ModuleType('streamlit')
+        streamlit.cache_data = cache_data
+        modules = mock.patch.dict(sys.modules, {'streamlit': streamlit})
+        modules.start()
+        self.addCleanup(modules.stop)
+        sys.modules.pop('ui', None)
+        self.ui = importlib.import_module('ui')
+
+    def test_backtest_caching(self):
+        """Test parameter changes rerun only the engine, with bars and indicators served from cache"""
+        ui = self.ui
+        df = generate_ohlcv(2000, seed=6)
+        with mock.patch.object(ui, 'fetch_stock_data', return_value=df) as fetch, \
+                mock.patch.object(ui, 'calculate_moving_averages', wraps=calculate_moving_averages) as indicators, \
+                mock.patch.object(ui, 'run_engine_on_frame', wraps=run_engine_on_frame) as engine:
+            first = ui.run_backtest(10000, 0.02, 0.03, 0.95)
+            again = ui.run_backtest(10000, 0.02, 0.03, 0.95)
+            tighter = ui.run_backtest(10000, 0.01, 0.03, 0.95)
+        self.addCleanup(ui.clear_caches)
+
+        self.assertEqual((fetch.call_count, indicators.call_count, engine.call_count), (1, 1, 2))
+        self.assertIs(first[1], again[1])
+
+        expected = run_engine_on_frame(calculate_moving_averages(df), initial_balance=10000,
+                                       stop_loss_pct=0.01, take_profit_pct=0.03, position_size_pct=0.95)
+        self.assertEqual(len(tighter[1]), expected.num_trades)
+        self.assertAlmostEqual(tighter[2]['total_return_pct'], (expected.final_balance / 10000 - 1) * 100)
+
+    def test_chart_multiindex_columns(self):
+        """Test charts downsample yfinance-style MultiIndex frames to flat traces"""
+        go = mock.MagicMock()
+        plotly = types.ModuleType('plotly')
+        plotly.graph_objects = go
+        df = calculate_moving_averages(generate_ohlcv(5000, seed=7))
+        trades = trades_to_frame(run_engine_on_frame(df), df.index)
+        df.columns = pd.MultiIndex.from_product([df.columns, ['AAPL']])
+
+        with mock.patch.dict(sys.modules, {'plotly': plotly, 'plotly.graph_objects': go}):
+            self.ui.plot_trades(df, trades, max_points=100)
+
+        price, sma_10, sma_50 = (call.kwargs for call in go.Scatter.call_args_list[:3])
+        self.assertEqual(price['y'].ndim, 1)
+        self.assertLessEqual(len(price['y']), 3 * 200 + len(trades) + 2)  # Min/max of each line plus trade bars
+        self.assertEqual(len(price['x']), len(sma_50['y']))
+        self.assertEqual(price['y'].max(), df['Close'].to_numpy().max())
+
 def run_integration_test():
     """Run a full integration test"""
     try:
@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+from config import (
+    LSTM_LOOKBACK, MODEL_DIR, TRAIN_EPOCHS, TRAIN_FINETUNE_EPOCHS, TRAIN_PATIENCE,
+    TRAIN_BATCH_SIZE, TRAIN_VALIDATION_FRACTION, TRAIN_REPLAY_BARS, TRAIN_KEEP_VERSIONS,
+    TRAIN_INTRA_OP_THREADS, TRAIN_INTER_OP_THREADS
+)
+from model import prepare_data, get_scaler, create_lstm_model, save_artifacts, load_artifacts, latest_version
+
+
+def configure_threads(intra_op: int = TRAIN_INTRA_OP_THREADS, inter_op: int = TRAIN_INTER_OP_THREADS) -> None:
+    """
+    Set TensorFlow's CPU thread pools.
+
+    Intra-op threads parallelize a single kernel (the LSTM matmuls);
+    inter-op threads run independent kernels concurrently. 0 keeps
+    TensorFlow's default (one per core). Must run before TensorFlow
+    executes its first operation; later calls are ignored with a warning.
+    """
+    import tensorflow as tf
+
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as e:
+        print(f"Thread settings not applied: {str(e)}")
+
+
+def read_meta(directory: str) -> Dict:
+    """Read meta.json of a versioned artifact directory."""
+    with open(os.path.join(directory, "meta.json")) as file:
+        return json.load(file)
+
+
+def _next_version(directory: str) -> str:
+    versions = [int(name[1:]) for name in os.listdir(directory) if name[:1] == "v" and name[1:].isdigit()]
+    return os.path.join(directory, f"v{max(versions, default=0) + 1}")
+
+
+def _prune_versions(directory: str, keep: int) -> None:
+    """Delete all but the newest `keep` versions."""
+    versions = sorted(int(name[1:]) for name in os.listdir(directory) if name[:1] == "v" and name[1:].isdigit())
+    for version in versions[:-keep] if keep > 0 else []:
+        shutil.rmtree(os.path.join(directory, f"v{version}"), ignore_errors=True)
+
+
+def _split(X: np.ndarray, y: np.ndarray, validation_fraction: float):
+    """Chronological split: the most recent windows validate."""
+    n_val = int(len(y) * validation_fraction)
+    if n_val < 1 or n_val >= len(y):
+        return (X, y), None
+    return (X[:-n_val], y[:-n_val]), (X[-n_val:], y[-n_val:])
+
+
+def train_model(
+    df,
+    directory: str = MODEL_DIR,
+    full: bool = False,
+    lookback: int = LSTM_LOOKBACK,
+    epochs: Optional[int] = None,
+    patience: int = TRAIN_PATIENCE,
+    batch_size: int = TRAIN_BATCH_SIZE,
+    validation_fraction: float = TRAIN_VALIDATION_FRACTION,
+    replay_bars: int = TRAIN_REPLAY_BARS,
+    keep_versions: int = TRAIN_KEEP_VERSIONS,
+    seed: Optional[int] = None,
+    source: Optional[str] = None
+) -> Dict:
+    """
+    Train or fine-tune the LSTM and save it as a new artifact version.
+
+    Each version (directory/vN) holds model.keras, scaler.pkl and
+    meta.json, which records the last bar trained on. Without `full`, the
+    latest version is loaded and fine-tuned only on bars added since that
+    bar (plus `replay_bars` earlier bars, so recent history is not
+    forgotten), scaled with the persisted scaler so inputs keep the
+    meaning the weights were trained on. Training stops early when the
+    validation loss (most recent windows) stops improving, and the best
+    weights are kept.
+
+    Args:
+        df (pd.DataFrame): Bars with 'Close' column and a DatetimeIndex
+        directory (str): Root of the versioned artifacts
+        full (bool): Retrain from scratch (also when no version exists)
+        lookback (int): Window length for a full retrain
+        epochs (int): Maximum epochs (TRAIN_EPOCHS or TRAIN_FINETUNE_EPOCHS)
+        patience (int): Epochs without validation improvement before stopping
+        batch_size (int): Windows per batch
+        validation_fraction (float): Share of the newest windows used for validation
+        replay_bars (int): Earlier bars mixed into a fine-tune
+        keep_versions (int): Versions kept on disk (0 keeps all)
+        seed (int): Random seed for weights and shuffling
+        source (str): Description of the data (e.g. ticker/interval) for meta.json
+
+    Returns:
+        dict: Metadata of the new version, or of the current one when
+        there are no new bars
+    """
+    import tensorflow as tf
+
+    start = time.perf_counter()
+    if seed is not None:
+        tf.keras.utils.set_random_seed(seed)
+    parent = None if full else latest_version(directory)
+
+    if parent is None:
+        model = create_lstm_model(lookback)
+        X, y = prepare_data(df, lookback)
+        scaler = get_scaler()
+        new_bars = len(df)
+        epochs = epochs or TRAIN_EPOCHS
+    else:
+        meta = read_meta(parent)
+        model, scaler = load_artifacts(parent)
+        lookback = int(model.input_shape[1])
+        new_bars = len(df) - int(df.index.searchsorted(pd.Timestamp(meta["trained_through"]), side="right"))
+        if new_bars == 0:
+            print(f"{parent} is up to date (trained through {meta['trained_through']})")
+            return meta
+        # New bars need `lookback` earlier bars as context for their windows
+        window = df.iloc[-(new_bars + lookback + replay_bars):]
+        X, y = prepare_data(window, lookback, scaler=scaler)
+        epochs = epochs or TRAIN_FINETUNE_EPOCHS
+
+    train, validation = _split(X, y, validation_fraction)
+    callbacks = []
+    if validation is not None:
+        callbacks.append(tf.keras.callbacks.EarlyStopping(
+            monitor="val_loss", patience=patience, restore_best_weights=True
+        ))
+    history = model.fit(
+        *train, validation_data=validation, epochs=epochs, batch_size=batch_size,
+        shuffle=True, callbacks=callbacks, verbose=0
+    )
+
+    os.makedirs(directory, exist_ok=True)
+    version_dir = _next_version(directory)
+    losses = history.history
+    meta = {
+        "version": int(os.path.basename(version_dir)[1:]),
+        "parent": os.path.basename(parent) if parent else None,
+        "source": source,
+        "lookback": lookback,
+        "trained_through": df.index[-1].isoformat(),
+        "new_bars": new_bars,
+        "samples": int(len(train[1])),
+        "epochs": len(losses["loss"]),
+        "loss": float(losses["loss"][-1]),
+        "val_loss": float(min(losses["val_loss"])) if "val_loss" in losses else None,
+        "seconds": round(time.perf_counter() - start, 3),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    # Write into a temporary directory first so readers never see a partial version
+    tmp_dir = f"{version_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    save_artifacts(model, tmp_dir, scaler)
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as file:
+        json.dump(meta, file, indent=2)
+    os.replace(tmp_dir, version_dir)
+    _prune_versions(directory, keep_versions)
+    return meta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train or fine-tune the LSTM on cached bars")
+    parser.add_argument("--ticker", default=None, help="Ticker symbol (defaults to config.TICKER)")
+    parser.add_argument("--period", default="max", help="History period to load")
+    parser.add_argument("--offline", action="store_true", help="Use cached bars only")
+    parser.add_argument("--directory", default=MODEL_DIR, help="Versioned artifact directory")
+    parser.add_argument("--full", action="store_true", help="Retrain from scratch instead of fine-tuning")
+    parser.add_argument("--epochs", type=int, default=None, help="Maximum epochs")
+    parser.add_argument("--patience", type=int, default=TRAIN_PATIENCE, help="Early stopping patience")
+    parser.add_argument("--batch-size", type=int, default=TRAIN_BATCH_SIZE, help="Windows per batch")
+    parser.add_argument("--intra-op-threads", type=int, default=TRAIN_INTRA_OP_THREADS,
+                        help="Threads per TensorFlow kernel (0 = default)")
+    parser.add_argument("--inter-op-threads", type=int, default=TRAIN_INTER_OP_THREADS,
+                        help="Concurrent TensorFlow kernels (0 = default)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    args = parser.parse_args(argv)
+
+    from fetch_data import fetch_stock_data
+    from config import TICKER, INTERVAL
+
+    configure_threads(args.intra_op_threads, args.inter_op_threads)
+    ticker = args.ticker or TICKER
+    df = fetch_stock_data(ticker=ticker, period=args.period, offline=args.offline)
+    if df is None or df.empty:
+        print("No data available for training")
+        return None
+
+    meta = train_model(
+        df,
+        directory=args.directory,
+        full=args.full,
+        epochs=args.epochs,
+        patience=args.patience,
+        batch_size=args.batch_size,
+        seed=args.seed,
+        source=f"{ticker} {INTERVAL}"
+    )
+    print(json.dumps(meta, indent=2))
+    return meta
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() is not None else 1)
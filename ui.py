@@ -1,42 +1,71 @@
+import hashlib
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from config import (
+    TICKER, INTERVAL, UI_DATA_TTL_SECONDS, UI_INDICATOR_CACHE_SIZE, UI_BACKTEST_CACHE_SIZE,
+    UI_CHART_POINTS, UI_WEBGL_THRESHOLD
+)
 from fetch_data import fetch_stock_data
 from indicators import calculate_moving_averages
-from strategy import trading_signal
+from engine import column_values, run_engine_on_frame, trades_to_frame
+from analytics import performance
+from downsample import downsample_indices
 import numpy as np
 
-def plot_trades(df, trades_df):
-    """Create an interactive plot with price, MAs, and trade points"""
+def plot_trades(df, trades_df, visible_range=None, max_points=UI_CHART_POINTS):
+    """
+    Create an interactive plot with price, MAs, and trade points
+
+    Only the visible date range is drawn, downsampled to min/max per
+    bucket so price extremes and the bars with trades stay exact. Trade
+    markers are never downsampled. Large traces are drawn with WebGL.
+    """
+    import plotly.graph_objects as go  # Deferred until the first chart is drawn
+
+    if visible_range is not None:
+        start, end = (pd.Timestamp(t) for t in visible_range)
+        if df.index.tz is not None and start.tz is None:
+            # The date slider works in wall-clock time of the exchange
+            start, end = start.tz_localize(df.index.tz), end.tz_localize(df.index.tz)
+        df = df.loc[start:end]
+        trades_df = trades_df[(trades_df['date'] >= start) & (trades_df['date'] <= end)]
+
+    trade_bars = df.index.get_indexer(trades_df['date'])
+    lines = {column: column_values(df, column) for column in ('Close', 'SMA_10', 'SMA_50')}
+    indices = downsample_indices(list(lines.values()), max_points, keep=trade_bars[trade_bars >= 0])
+    bars = df.index[indices]
+    lines = {column: values[indices] for column, values in lines.items()}
+    line_trace = go.Scattergl if len(bars) > UI_WEBGL_THRESHOLD else go.Scatter
+    marker_trace = go.Scattergl if len(trades_df) > UI_WEBGL_THRESHOLD else go.Scatter
+
     fig = go.Figure()
 
     # Add price line
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df['Close'],
+    fig.add_trace(line_trace(
+        x=bars,
+        y=lines['Close'],
         name='Price',
         line=dict(color='#1f77b4', width=2)
     ))
 
     # Add moving averages
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df['SMA_10'],
+    fig.add_trace(line_trace(
+        x=bars,
+        y=lines['SMA_10'],
         name='SMA 10',
         line=dict(color='#ff7f0e', width=1.5, dash='dot')
     ))
 
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df['SMA_50'],
+    fig.add_trace(line_trace(
+        x=bars,
+        y=lines['SMA_50'],
         name='SMA 50',
         line=dict(color='#2ca02c', width=1.5, dash='dot')
     ))
 
     # Add buy points
     buy_points = trades_df[trades_df['type'] == 'BUY']
-    fig.add_trace(go.Scatter(
+    fig.add_trace(marker_trace(
         x=buy_points['date'],
         y=buy_points['price'],
         mode='markers',
@@ -50,7 +79,7 @@ def plot_trades(df, trades_df):
 
     # Add sell points
     sell_points = trades_df[trades_df['type'].isin(['SELL', 'STOP_LOSS', 'TAKE_PROFIT'])]
-    fig.add_trace(go.Scatter(
+    fig.add_trace(marker_trace(
         x=sell_points['date'],
         y=sell_points['price'],
         mode='markers',
@@ -62,8 +91,11 @@ def plot_trades(df, trades_df):
         )
     ))
 
+    title = 'Trading Strategy Backtest Results'
+    if len(bars) < len(df):
+        title += f' ({len(bars):,} of {len(df):,} bars shown)'
     fig.update_layout(
-        title='Trading Strategy Backtest Results',
+        title=title,
         xaxis_title='Date',
         yaxis_title='Price',
         template='plotly_dark',
@@ -72,91 +104,56 @@ def plot_trades(df, trades_df):
 
     return fig
 
-def run_backtest(initial_balance, stop_loss_pct, take_profit_pct, position_size_pct):
+@st.cache_data(ttl=UI_DATA_TTL_SECONDS, show_spinner=False)
+def load_data(ticker, interval, period="60d"):
+    """Fetch bars, cached per ticker/interval/period for UI_DATA_TTL_SECONDS"""
+    return fetch_stock_data(ticker=ticker, period=period, interval=interval)
+
+def frame_hash(df):
+    """Content hash of a DataFrame (index and values), used as a cache key"""
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=True).values.tobytes()).hexdigest()
+
+@st.cache_data(max_entries=UI_INDICATOR_CACHE_SIZE, show_spinner=False)
+def compute_indicators(data_hash, _df):
+    """Moving averages, cached by the hash of the underlying bars"""
+    return calculate_moving_averages(_df)
+
+@st.cache_data(max_entries=UI_BACKTEST_CACHE_SIZE, show_spinner=False)
+def backtest_trades(data_hash, initial_balance, stop_loss_pct, take_profit_pct, position_size_pct, _df):
+    """Trade history and performance stats, cached by data hash and parameters (least recently used entries are evicted)"""
+    result = run_engine_on_frame(
+        _df,
+        initial_balance=initial_balance,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        position_size_pct=position_size_pct
+    )
+    return trades_to_frame(result, _df.index), performance(result)
+
+def clear_caches():
+    """Drop cached bars, indicators and backtest results"""
+    load_data.clear()
+    compute_indicators.clear()
+    backtest_trades.clear()
+
+def run_backtest(initial_balance, stop_loss_pct, take_profit_pct, position_size_pct, ticker=TICKER):
     """Run backtest with given parameters"""
-    df = fetch_stock_data(period="60d")
+    df = load_data(ticker, INTERVAL)
     if df is None or df.empty:
-        return None, None
-        
-    df = calculate_moving_averages(df)
-    
-    balance = initial_balance
-    position = 0
-    trades = []
-    entry_price = 0
-    
-    for i in range(50, len(df)):
-        price = df["Close"].iloc[i].item()
-        sma_10 = df["SMA_10"].iloc[i].item()
-        sma_50 = df["SMA_50"].iloc[i].item()
-        
-        if position > 0:
-            loss_pct = (price - entry_price) / entry_price
-            if loss_pct <= -stop_loss_pct:
-                revenue = position * price
-                balance += revenue
-                trades.append({
-                    'date': df.index[i],
-                    'type': 'STOP_LOSS',
-                    'price': price,
-                    'position': 0,
-                    'balance': balance,
-                    'return_pct': (balance - initial_balance) / initial_balance * 100
-                })
-                position = 0
-                continue
-                
-            if loss_pct >= take_profit_pct:
-                revenue = position * price
-                balance += revenue
-                trades.append({
-                    'date': df.index[i],
-                    'type': 'TAKE_PROFIT',
-                    'price': price,
-                    'position': 0,
-                    'balance': balance,
-                    'return_pct': (balance - initial_balance) / initial_balance * 100
-                })
-                position = 0
-                continue
-        
-        decision = trading_signal(price, sma_10, sma_50, sentiment=0)
-        
-        if decision == "BUY" and balance > price and position == 0:
-            position = (balance * position_size_pct) // price
-            cost = position * price
-            balance -= cost
-            entry_price = price
-            trades.append({
-                'date': df.index[i],
-                'type': 'BUY',
-                'price': price,
-                'position': position,
-                'balance': balance,
-                'return_pct': (balance - initial_balance) / initial_balance * 100
-            })
-            
-        elif decision == "SELL" and position > 0:
-            revenue = position * price
-            balance += revenue
-            trades.append({
-                'date': df.index[i],
-                'type': 'SELL',
-                'price': price,
-                'position': 0,
-                'balance': balance,
-                'return_pct': (balance - initial_balance) / initial_balance * 100
-            })
-            position = 0
-    
-    if position > 0:
-        final_price = df["Close"].iloc[-1].item()
-        final_position_value = position * final_price
-        balance += final_position_value
-        position = 0
-    
-    trades_df = pd.DataFrame(trades)
-    return df, trades_df
+        return None, None, None
+
+    # Parameter changes only rerun the engine; unchanged inputs are served from cache
+    data_hash = frame_hash(df)
+    df = compute_indicators(data_hash, df)
+    trades_df, stats = backtest_trades(
+        data_hash,
+        initial_balance,
+        stop_loss_pct,
+        take_profit_pct,
+        position_size_pct,
+        df
+    )
+    return df, trades_df, stats
 
 def main():
     st.set_page_config(page_title="Trading Bot Backtest", layout="wide")
@@ -165,7 +162,9 @@ def main():
     
     # Sidebar controls
     st.sidebar.header("Backtest Parameters")
-    
+
+    ticker = st.sidebar.text_input("Ticker", value=TICKER)
+
     initial_balance = st.sidebar.number_input(
         "Initial Balance ($)",
         min_value=1000,
@@ -198,59 +197,92 @@ def main():
         step=5
     ) / 100
     
+    if st.sidebar.button("Refresh Data"):
+        load_data.clear()
+
     if st.sidebar.button("Run Backtest"):
-        with st.spinner("Running backtest..."):
-            df, trades_df = run_backtest(
-                initial_balance,
-                stop_loss_pct,
-                take_profit_pct,
-                position_size_pct
+        # Kept across reruns, so zooming the chart does not need another click
+        st.session_state["backtest_params"] = (
+            initial_balance, stop_loss_pct, take_profit_pct, position_size_pct, ticker
+        )
+    if "backtest_params" not in st.session_state:
+        return
+    initial_balance, stop_loss_pct, take_profit_pct, position_size_pct, ticker = st.session_state["backtest_params"]
+
+    with st.spinner("Running backtest..."):
+        df, trades_df, stats = run_backtest(
+            initial_balance,
+            stop_loss_pct,
+            take_profit_pct,
+            position_size_pct,
+            ticker=ticker
+        )
+        
+        if trades_df is not None and not trades_df.empty:
+            # Zooming redraws only the selected range, at full resolution when small enough
+            wall_clock = df.index.tz_localize(None) if df.index.tz is not None else df.index
+            first, last = wall_clock[0].to_pydatetime(), wall_clock[-1].to_pydatetime()
+            visible_range = st.sidebar.slider(
+                "Visible Range",
+                min_value=first,
+                max_value=last,
+                value=(first, last),
+                format="YYYY-MM-DD HH:mm"
+            )
+
+            # Display chart
+            fig = plot_trades(df, trades_df, visible_range)
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Display metrics in columns
+            col1, col2, col3, col4 = st.columns(4)
+            
+            col1.metric(
+                "Final Balance",
+                f"${initial_balance * (1 + stats['total_return_pct'] / 100):,.2f}",
+                f"{stats['total_return_pct']:+.2f}%"
             )
             
-            if trades_df is not None and not trades_df.empty:
-                # Display chart
-                fig = plot_trades(df, trades_df)
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Display metrics in columns
-                col1, col2, col3, col4 = st.columns(4)
-                
-                final_balance = trades_df['balance'].iloc[-1] if len(trades_df) > 0 else initial_balance
-                total_return = ((final_balance/initial_balance)-1)*100
-                
-                col1.metric(
-                    "Final Balance",
-                    f"${final_balance:,.2f}",
-                    f"{total_return:+.2f}%"
-                )
-                
-                col2.metric(
-                    "Number of Trades",
-                    len(trades_df)
-                )
-                
-                if len(trades_df) > 0:
-                    win_rate = len(trades_df[trades_df['return_pct'] > 0])/len(trades_df)*100
-                    col3.metric(
-                        "Win Rate",
-                        f"{win_rate:.1f}%"
-                    )
-                    
-                    avg_return = trades_df['return_pct'].mean()
-                    col4.metric(
-                        "Avg Return per Trade",
-                        f"{avg_return:.2f}%"
-                    )
-                
-                # Display trade history
-                st.subheader("Trade History")
-                st.dataframe(
-                    trades_df.style.format({
-                        'price': '${:.2f}',
-                        'balance': '${:.2f}',
-                        'return_pct': '{:.2f}%'
-                    })
-                )
+            col2.metric(
+                "Number of Trades",
+                stats['num_trades']
+            )
+            
+            col3.metric(
+                "Win Rate",
+                f"{stats['win_rate']:.1f}%"
+            )
+            
+            col4.metric(
+                "Avg Return per Trade",
+                f"{stats['avg_trade_pct']:.2f}%"
+            )
+            
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Sharpe Ratio", f"{stats['sharpe']:.2f}")
+            col2.metric("Sortino Ratio", f"{stats['sortino']:.2f}")
+            col3.metric(
+                "Max Drawdown",
+                f"{stats['max_drawdown_pct']:.2f}%",
+                f"{stats['max_drawdown_bars']} bars",
+                delta_color="off"
+            )
+            col4.metric(
+                "Exposure",
+                f"{stats['exposure_pct']:.1f}%",
+                f"turnover {stats['turnover']:.1f}x",
+                delta_color="off"
+            )
+            
+            # Display trade history
+            st.subheader("Trade History")
+            st.dataframe(
+                trades_df.style.format({
+                    'price': '${:.2f}',
+                    'balance': '${:.2f}',
+                    'return_pct': '{:.2f}%'
+                })
+            )
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,306 @@
+import argparse
+import itertools
+import os
+import numpy as np
+from multiprocessing import get_context, shared_memory
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import (
+    LSTM_LOOKBACK, WALKFORWARD_TRAIN_BARS, WALKFORWARD_TEST_BARS,
+    WALKFORWARD_LSTM_EPOCHS, WALKFORWARD_SEED
+)
+from analytics import drawdown
+from engine import WARMUP_BARS, column_values, run_engine, win_rate
+from strategy import trading_signals
+from sweep import attach_shared, pack_shared, parse_grid
+
+FOLD_COLUMNS = [
+    "fold", "train_start", "train_end", "test_end",
+    "stop_loss_pct", "take_profit_pct", "position_size_pct",
+    "train_return_pct", "test_return_pct", "num_trades", "win_rate", "max_drawdown_pct",
+    "lstm_rmse", "lstm_direction_acc",
+]
+
+# Arrays attached by each worker process (see _init_worker)
+_worker_arrays: Dict[str, np.ndarray] = {}
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+
+
+def make_folds(
+    n_bars: int,
+    train_bars: int = WALKFORWARD_TRAIN_BARS,
+    test_bars: int = WALKFORWARD_TEST_BARS,
+    step: Optional[int] = None,
+    anchored: bool = False
+) -> List[Tuple[int, int, int]]:
+    """
+    Split `n_bars` into consecutive train/test folds.
+
+    Rolling folds keep a fixed-length training window; anchored folds
+    always train from bar 0. Test windows never overlap their training
+    window and advance by `step` bars (defaults to `test_bars`).
+
+    Returns:
+        list: (train_start, train_end, test_end) bar indices per fold;
+        the test window is [train_end, test_end)
+    """
+    if train_bars < 1 or test_bars < 1:
+        raise ValueError("train_bars and test_bars must be positive")
+    step = step or test_bars
+    folds = []
+    train_end = train_bars
+    while train_end + test_bars <= n_bars:
+        train_start = 0 if anchored else train_end - train_bars
+        folds.append((train_start, train_end, train_end + test_bars))
+        train_end += step
+    return folds
+
+
+def _init_worker(shm_name: str, layout: List[tuple]):
+    """Attach to the shared block once per worker process."""
+    global _worker_shm, _worker_arrays
+    _worker_shm, _worker_arrays = attach_shared(shm_name, layout)
+
+
+def _backtest(start: int, stop: int, params: Tuple[float, float, float], initial_balance: float):
+    """Backtest bars [start, stop) with indicators computed on the full history."""
+    arrays = _worker_arrays
+    stop_loss_pct, take_profit_pct, position_size_pct = params
+    return run_engine(
+        arrays["close"][start:stop],
+        arrays["sma_10"][start:stop],
+        arrays["sma_50"][start:stop],
+        initial_balance=initial_balance,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        position_size_pct=position_size_pct,
+        signals=arrays["signals"][start:stop],
+        warmup=max(0, WARMUP_BARS - start)  # Later folds already have valid SMAs
+    )
+
+
+def _lstm_fold(train_start: int, train_end: int, test_end: int,
+               lookback: int, epochs: int, seed: int) -> Tuple[float, float]:
+    """
+    Refit the LSTM on the training window and score it on the test window.
+
+    Scaling uses only the training window. Seeds are fixed per fold, so
+    a fold gives the same result regardless of which worker runs it.
+
+    Returns:
+        tuple: (RMSE in price units, fraction of correctly predicted directions)
+    """
+    import tensorflow as tf
+    from model import create_lstm_model
+
+    tf.keras.utils.set_random_seed(seed)
+    close = _worker_arrays["close"]
+    train = close[train_start:train_end]
+    low, high = float(train.min()), float(train.max())
+    scale = 1.0 / (high - low) if high > low else 1.0
+
+    def windows(start, stop):
+        scaled = ((close[start:stop] - low) * scale).astype(np.float32)
+        return sliding_window_view(scaled[:-1], lookback)[:, :, None], scaled[lookback:]
+
+    X_train, y_train = windows(train_start, train_end)
+    model = create_lstm_model(lookback)
+    model.fit(X_train, y_train, epochs=epochs, batch_size=256, verbose=0)
+
+    X_test, y_test = windows(max(0, train_end - lookback), test_end)
+    predicted = model.predict(X_test, batch_size=1024, verbose=0).reshape(-1)
+    previous = X_test[:, -1, 0]
+    rmse = float(np.sqrt(np.mean((predicted - y_test) ** 2)) / scale)
+    direction = float(np.mean(np.sign(predicted - previous) == np.sign(y_test - previous)))
+    return rmse, direction
+
+
+def _run_fold(task: tuple) -> tuple:
+    """Grid-search on the training window, then backtest the best parameters out of sample."""
+    fold, (train_start, train_end, test_end), grid, initial_balance, lstm = task
+
+    best, best_key = None, None
+    for params in grid:
+        result = _backtest(train_start, train_end, params, initial_balance)
+        # Same ranking as run_sweep: highest balance, then smallest drawdown
+        key = (-result.final_balance, drawdown(result.equity)[0])
+        if best_key is None or key < best_key:
+            best, best_key = (params, result), key
+    params, train_result = best
+
+    test = _backtest(train_end, test_end, params, initial_balance)
+    lstm_rmse, lstm_direction = np.nan, np.nan
+    if lstm is not None:
+        lookback, epochs, seed = lstm
+        lstm_rmse, lstm_direction = _lstm_fold(train_start, train_end, test_end,
+                                               lookback, epochs, seed + fold)
+    return (
+        fold, train_start, train_end, test_end, *params,
+        (train_result.final_balance / initial_balance - 1) * 100,
+        (test.final_balance / initial_balance - 1) * 100,
+        test.num_trades, win_rate(test), drawdown(test.equity)[0],
+        lstm_rmse, lstm_direction,
+    )
+
+
+def run_walkforward(
+    df,
+    stop_loss_grid: Sequence[float],
+    take_profit_grid: Sequence[float],
+    position_size_grid: Sequence[float],
+    train_bars: int = WALKFORWARD_TRAIN_BARS,
+    test_bars: int = WALKFORWARD_TEST_BARS,
+    step: Optional[int] = None,
+    anchored: bool = False,
+    initial_balance: float = 10000,
+    refit_lstm: bool = False,
+    lstm_epochs: int = WALKFORWARD_LSTM_EPOCHS,
+    seed: int = WALKFORWARD_SEED,
+    processes: Optional[int] = None
+):
+    """
+    Walk-forward evaluation of the SMA strategy over a long history.
+
+    Each fold picks the best grid parameters on its training window and
+    backtests them on the following test window; with `refit_lstm` the
+    LSTM is also retrained per fold and scored out of sample. Folds run
+    in a process pool against arrays shared once, and depend only on
+    their bar range and seed, so results are reproducible.
+
+    Args:
+        df (pd.DataFrame): DataFrame from calculate_moving_averages
+        stop_loss_grid: Stop loss fractions to try
+        take_profit_grid: Take profit fractions to try
+        position_size_grid: Position size fractions to try
+        train_bars (int): Bars per training window (initial window if anchored)
+        test_bars (int): Bars per test window
+        step (int): Bars between folds (defaults to test_bars)
+        anchored (bool): Grow the training window from bar 0 instead of rolling it
+        initial_balance (float): Starting cash for every backtest
+        refit_lstm (bool): Retrain and score the LSTM on every fold
+        lstm_epochs (int): Training epochs per LSTM refit
+        seed (int): Base random seed (fold i uses seed + i)
+        processes (int): Worker processes (defaults to CPU count)
+
+    Returns:
+        pd.DataFrame: One row per fold, in fold order
+    """
+    import pandas as pd
+
+    close = column_values(df, "Close")
+    sma_10 = column_values(df, "SMA_10")
+    sma_50 = column_values(df, "SMA_50")
+    arrays = {
+        "close": close,
+        "sma_10": sma_10,
+        "sma_50": sma_50,
+        "signals": trading_signals(close, sma_10, sma_50),
+    }
+    folds = make_folds(len(close), train_bars, test_bars, step, anchored)
+    if not folds:
+        raise ValueError(f"Need at least {train_bars + test_bars} bars, got {len(close)}")
+
+    grid = list(itertools.product(stop_loss_grid, take_profit_grid, position_size_grid))
+    lstm = (LSTM_LOOKBACK, lstm_epochs, seed) if refit_lstm else None
+    tasks = [(i, fold, grid, initial_balance, lstm) for i, fold in enumerate(folds)]
+    processes = min(processes or os.cpu_count() or 1, len(tasks))
+    # TensorFlow is not fork-safe: forked workers of a parent that already
+    # loaded it can deadlock, so LSTM refits run in spawned workers
+    context = get_context("spawn" if refit_lstm else None)
+
+    shm, layout = pack_shared(arrays)
+    try:
+        with context.Pool(processes, initializer=_init_worker, initargs=(shm.name, layout)) as pool:
+            rows = list(pool.imap_unordered(_run_fold, tasks))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results = pd.DataFrame(sorted(rows), columns=FOLD_COLUMNS)
+    results.insert(1, "test_start_date", df.index[results["train_end"]])
+    return results
+
+
+def summarize_folds(results) -> Dict[str, float]:
+    """
+    Aggregate out-of-sample metrics across folds.
+
+    Returns:
+        dict: Fold count, mean/median/std test return, share of profitable
+        folds, compounded return, total trades and mean/worst drawdown
+    """
+    returns = results["test_return_pct"]
+    summary = {
+        "folds": len(results),
+        "mean_return_pct": float(returns.mean()),
+        "median_return_pct": float(returns.median()),
+        "std_return_pct": float(returns.std(ddof=0)),
+        "profitable_folds_pct": float((returns > 0).mean() * 100),
+        "compounded_return_pct": float(((1 + returns / 100).prod() - 1) * 100),
+        "total_trades": int(results["num_trades"].sum()),
+        "mean_drawdown_pct": float(results["max_drawdown_pct"].mean()),
+        "worst_drawdown_pct": float(results["max_drawdown_pct"].max()),
+    }
+    if results["lstm_rmse"].notna().any():
+        summary["mean_lstm_rmse"] = results["lstm_rmse"].mean()
+        summary["mean_lstm_direction_acc"] = results["lstm_direction_acc"].mean()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest over cached history")
+    parser.add_argument("--ticker", default=None, help="Ticker symbol (defaults to config.TICKER)")
+    parser.add_argument("--period", default="max", help="History period to load")
+    parser.add_argument("--offline", action="store_true", help="Use cached bars only")
+    parser.add_argument("--train-bars", type=int, default=WALKFORWARD_TRAIN_BARS, help="Bars per training window")
+    parser.add_argument("--test-bars", type=int, default=WALKFORWARD_TEST_BARS, help="Bars per test window")
+    parser.add_argument("--step", type=int, default=None, help="Bars between folds")
+    parser.add_argument("--anchored", action="store_true", help="Anchor training windows at the first bar")
+    parser.add_argument("--stop-loss", default="1:5:1", help="Stop loss %% grid")
+    parser.add_argument("--take-profit", default="1:6:1", help="Take profit %% grid")
+    parser.add_argument("--position-size", default="95", help="Position size %% grid")
+    parser.add_argument("--balance", type=float, default=10000, help="Initial balance")
+    parser.add_argument("--lstm", action="store_true", help="Refit and score the LSTM on every fold")
+    parser.add_argument("--epochs", type=int, default=WALKFORWARD_LSTM_EPOCHS, help="LSTM epochs per fold")
+    parser.add_argument("--seed", type=int, default=WALKFORWARD_SEED, help="Base random seed")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes")
+    parser.add_argument("--output", default=None, help="Write the per-fold table to this CSV file")
+    args = parser.parse_args(argv)
+
+    from fetch_data import fetch_stock_data
+    from indicators import calculate_moving_averages
+    from config import TICKER
+
+    df = fetch_stock_data(ticker=args.ticker or TICKER, period=args.period, offline=args.offline)
+    if df is None or df.empty:
+        print("No data available for walk-forward backtest")
+        return None
+    df = calculate_moving_averages(df)
+
+    results = run_walkforward(
+        df,
+        parse_grid(args.stop_loss),
+        parse_grid(args.take_profit),
+        parse_grid(args.position_size),
+        train_bars=args.train_bars,
+        test_bars=args.test_bars,
+        step=args.step,
+        anchored=args.anchored,
+        initial_balance=args.balance,
+        refit_lstm=args.lstm,
+        lstm_epochs=args.epochs,
+        seed=args.seed,
+        processes=args.processes
+    )
+    print(results.to_string(float_format="%.2f"))
+    print("\nOut-of-sample summary:")
+    for name, value in summarize_folds(results).items():
+        print(f"{name}: {value:.2f}" if isinstance(value, float) else f"{name}: {value}")
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\nResults written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
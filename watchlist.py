@@ -0,0 +1,152 @@
+import warnings
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+from config import (
+    LOOKBACK_DAYS, INTERVAL, OFFLINE_MODE,
+    WATCHLIST_BATCH_SIZE, WATCHLIST_MAX_WORKERS
+)
+from bar_cache import load_bars, save_bars, merge_bars, covers_period, trim_to_period
+from strategy import trading_signals, SIGNAL_NAMES
+from fetch_data import REQUIRED_COLUMNS
+
+SMA_WINDOWS = (10, 50)
+
+
+def _batch_start(cached: Dict[str, pd.DataFrame], period: str):
+    """
+    Pick the download start for a batch.
+
+    Returns the earliest last-cached timestamp when the cache of every
+    ticker in the batch covers the period, or None when a full period
+    download is needed.
+    """
+    if not all(covers_period(df, period) for df in cached.values()):
+        return None
+    return min(df.index[-1] for df in cached.values())
+
+
+def _split_batch(raw: pd.DataFrame, ticker: str) -> pd.DataFrame:
+    """
+    Extract one ticker from a multi-ticker download.
+
+    Keeps the (Price, Ticker) column layout of a single-ticker download so
+    the frame can be merged with bars cached by fetch_stock_data.
+    """
+    df = raw.xs(ticker, axis=1, level=1, drop_level=False).dropna(how="all")
+    if df.empty:
+        raise ValueError("No data returned")
+    if not all(col in df.columns.get_level_values(0) for col in REQUIRED_COLUMNS):
+        raise ValueError("Missing required columns in data")
+    return df
+
+
+def _fetch_batch(
+    batch: List[str], period: str, interval: str, offline: bool
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+    """Fetch one batch with a single yfinance call and update the bar cache."""
+    frames, errors = {}, {}
+    cached = {ticker: load_bars(ticker, interval) for ticker in batch}
+
+    raw = None
+    if not offline:
+        import yfinance as yf
+
+        start = _batch_start(cached, period)
+        try:
+            if start is None:
+                raw = yf.download(batch, period=period, interval=interval,
+                                  progress=False, threads=False)
+            else:
+                raw = yf.download(batch, start=start, interval=interval,
+                                  progress=False, threads=False)
+        except Exception as e:
+            print(f"Error fetching batch {batch[0]}..{batch[-1]}: {str(e)}")
+
+    for ticker in batch:
+        try:
+            new = None
+            if raw is not None and not raw.empty and ticker in raw.columns.get_level_values(1):
+                new = _split_batch(raw, ticker)
+            df = merge_bars(cached[ticker], new)
+            if df is None or df.empty:
+                raise ValueError("No data available")
+            if new is not None:
+                save_bars(df, ticker, interval)
+            frames[ticker] = trim_to_period(df, period)
+        except Exception as e:
+            errors[ticker] = str(e)
+    return frames, errors
+
+
+def fetch_watchlist(
+    tickers: Sequence[str],
+    period: str = f"{LOOKBACK_DAYS}d",
+    interval: str = INTERVAL,
+    batch_size: int = WATCHLIST_BATCH_SIZE,
+    max_workers: int = WATCHLIST_MAX_WORKERS,
+    offline: bool = OFFLINE_MODE
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+    """
+    Fetch bars for many tickers using batched, concurrent downloads.
+
+    Tickers are grouped into multi-ticker yfinance requests which run on a
+    bounded thread pool. A failing ticker (or batch) only affects itself:
+    its error is reported and cached bars are used where available.
+
+    Args:
+        tickers: Ticker symbols
+        period (str): Time period to fetch
+        interval (str): Data interval
+        batch_size (int): Tickers per yfinance request
+        max_workers (int): Concurrent requests
+        offline (bool): Serve from the local cache only
+
+    Returns:
+        tuple: (frames by ticker, error messages by ticker)
+    """
+    batches = [list(tickers[i:i + batch_size]) for i in range(0, len(tickers), batch_size)]
+    frames, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch_frames, batch_errors in executor.map(
+            lambda batch: _fetch_batch(batch, period, interval, offline), batches
+        ):
+            frames.update(batch_frames)
+            errors.update(batch_errors)
+    return frames, errors
+
+
+def evaluate_watchlist(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Compute SMAs and trading signals for every ticker in one pass.
+
+    The last 50 closes of each ticker are stacked into a right-aligned
+    (tickers x 50) matrix, so both SMAs and the signals are evaluated with
+    a handful of array operations regardless of watchlist size.
+
+    Args:
+        frames: DataFrames with 'Close' column, keyed by ticker
+
+    Returns:
+        pd.DataFrame: Latest price, SMA_10, SMA_50 and signal per ticker
+    """
+    tickers = list(frames)
+    window = max(SMA_WINDOWS)
+    closes = np.full((len(tickers), window), np.nan)
+    for row, ticker in enumerate(tickers):
+        tail = np.asarray(frames[ticker]["Close"], dtype=np.float64).reshape(-1)[-window:]
+        if len(tail):
+            closes[row, window - len(tail):] = tail
+
+    with warnings.catch_warnings():
+        # All-NaN rows (no recent closes) simply yield NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        # Equivalent to rolling(window, min_periods=1).mean() at the last bar
+        smas = {f"SMA_{w}": np.nanmean(closes[:, -w:], axis=1) for w in SMA_WINDOWS}
+    price = closes[:, -1]
+    signals = trading_signals(price, smas["SMA_10"], smas["SMA_50"])
+
+    names = [SIGNAL_NAMES[code] for code in signals.tolist()]
+    return pd.DataFrame({"price": price, **smas, "signal": names},
+                        index=pd.Index(tickers, name="ticker"))